@@ -50,16 +50,11 @@ import rdflib
 from rdflib.serializer import Serializer
 from rdflib import plugin, Graph, Literal, URIRef, BNode
 from rdflib.store import Store
-from rdflib.plugins.sparql.processor import processUpdate
 from rdflib.graph import Graph, ConjunctiveGraph
 from rdflib.collection import Collection
 from rdflib.util import guess_format
 
-# PySHACL
-from pyshacl import validate
-
 # other
-from SPARQLWrapper import SPARQLWrapper, JSON
 from warnings import warn
 import re
 
@@ -250,7 +245,18 @@ class config_graph_shacl():
                 shape['properties'].append(prop)
 
         # Add instances for fdrop down
-        for prop in shape['properties']:
+        self.add_shape_instances(shape['properties'])
+
+        # return
+        return shape
+
+    # support function for get_shape, instances for drop down lists
+    def add_shape_instances(self, properties):
+        '''
+        Args:
+            properties (list):  property dictionaries of a shape
+        '''
+        for prop in properties:
             if 'class' in prop.keys():
                 instances = self.get_labeled_instances(prop['class'])
                 prop.update({'in': instances})
@@ -293,9 +299,6 @@ class config_graph_shacl():
                     # #TODO should support all types
                     # if datatype_instances and 'datatype' not in prop.keys():
                     #     prop.update({'datatype': datatype_instances[0]})
-        
-        # return
-        return shape
 
     # support function for get_shape
     def get_property(self, uri, path_required=True):
@@ -492,6 +495,9 @@ class config_graph_shacl():
     def add_graph(self, gin):
         # validate
         if self.pyshacl:
+            # only loaded if validating
+            from pyshacl import validate
+
             try:
                 #r = validate(gin, shacl_graph='../landrsOntTest_full/sensor/sensor_shape.ttl', ont_graph=self.g1, inference='rdfs', abort_on_error=False, meta_shacl=False, advanced=False, debug=False)
                 r = validate(gin, shacl_graph=self.g2, ont_graph=self.g1) #, inference='rdfs', abort_on_error=False, meta_shacl=False, advanced=False, debug=False)
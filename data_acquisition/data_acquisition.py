@@ -9,7 +9,6 @@ Main loop runs on a thread created at class instantiation
 '''
 # Imports ######################################################################
 import time
-import requests
 import datetime
 import json
 import logging
@@ -25,6 +24,8 @@ from queue import Queue
 # LANDRS imports
 from data_acquisition.data_acquisition_mavlink import MavLink
 from data_acquisition.data_acquisition_sensor import Sensor
+from data_acquisition.data_acquisition_sink import Sink, Http_sink
+from graph.py_drone_graph_labels import label_dict
 
 sensor_config_file = "data_acquisition/py_drone_sensors.ini"
 
@@ -104,11 +105,11 @@ class Data_acquisition(object):
     #######################
     # class initialization, starts main loop thread
     #######################
-    def __init__(self, dataacquisition_dict, api_callback, instance_data):
+    def __init__(self, dataacquisition_dict, sink, instance_data):
         '''
         Args:
             dataacquisition_dict (dict):    dictionary of data acquisition settings
-            api_callback (url):     API callback url
+            sink (Sink):            where to store data, or API callback url
             instance_data (dict.)           dictionary of instance data for sensors
 
         Returns:
@@ -117,9 +118,13 @@ class Data_acquisition(object):
         # create queue
         self.q_to_data_acqu = Queue()
 
-        # create thread for mavlink link, send api callback
+        # url? Then post to the API
+        if not isinstance(sink, Sink):
+            sink = Http_sink(sink)
+
+        # create thread for mavlink link, send sink
         self.loop_thread = Thread(target=self.main_loop, daemon=True,
-                                  args=(self.q_to_data_acqu, dataacquisition_dict, api_callback))
+                                  args=(self.q_to_data_acqu, dataacquisition_dict, sink))
 
         # read configuation file?
         self.sensor_config = ConfigParser(interpolation=ExtendedInterpolation())
@@ -148,9 +153,8 @@ class Data_acquisition(object):
         # get sensors #########################################################
         # get list of sensors
         prop_label = 'sensor'
-        self.sensors = {key: val for key, val in dataacquisition_dict.items() \
-                        if prop_label == key[:len(prop_label)] and \
-                            (len(key) == len(prop_label) or key[len(prop_label)] == '-')}
+        settings = label_dict(dataacquisition_dict)
+        self.sensors = {key: settings[key] for key in settings.family(prop_label)}
 
         # create list of sensor instances
         self.create_sensor_list(instance_data)
@@ -230,12 +234,12 @@ class Data_acquisition(object):
     ###############################################
     # MavLink setup and main loop to read messages
     ###############################################
-    def main_loop(self, in_q, dataacquisition_dict, api_callback):
+    def main_loop(self, in_q, dataacquisition_dict, sink):
         '''
         Args:
             in_q (Queue):           quue for API to turn logging on/off etc.
             dataacquisition_dict (dict):    dictionary of data acquisition settings
-            api_callback (url):     API callback url
+            sink (Sink):            where to store data
 
         Returns:
         never
@@ -295,12 +299,8 @@ class Data_acquisition(object):
                             ts = datetime.datetime.now().isoformat()
                             req_store_end.update({"time_stamp": str(ts)})
 
-                            req_data = {"data": json.dumps(req_store_end)}
-                            # post to the local flask server
-                            r = requests.post(api_callback, params=req_data)
-
-                            # log return
-                            logger.info("POST return: %s.", r.text)
+                            # send to the sink
+                            sink.store(req_store_end)
 
                         # start logging ###########################################
                         if mess['action'] == 'start':
@@ -340,13 +340,8 @@ class Data_acquisition(object):
                                 ts = datetime.datetime.now().isoformat()
                                 req_store_end.update({"time_stamp": str(ts)})
 
-                                req_data = {"data": json.dumps(req_store_end)}
-                                # post to the local flask server
-                                r = requests.post(
-                                    api_callback, params=req_data)
-
-                                # log return
-                                logger.info("POST return: %s.", r.text)
+                                # send to the sink
+                                sink.store(req_store_end)
 
                             # update store params #################################
                             observation_collection = mess['observation_collection']
@@ -417,16 +412,8 @@ class Data_acquisition(object):
                         # reset first reading?
                         first_reading = False
 
-                        # create parameters
-                        datas = {"data": json.dumps(sensor_data)}
-
-                        # post to the local flask server
-                        r = requests.post(
-                            api_callback, params=datas)
-                        logger.info("POST return: %s.", r.text)
-
-                        # parse return
-                        ret = json.loads(r.text)
+                        # send to the sink
+                        ret = sink.store(sensor_data)
 
                         # if we used * for observation collection then we should get back a obs coll uuid
                         # use so all obs. get added to the same obs. coll.
@@ -11,7 +11,6 @@ LANDRS project https://www.landrs.org
 Runs on a thread created from the Flask API
 '''
 # Imports ######################################################################
-from pymavlink import mavutil
 import logging
 from string import Template
 
@@ -177,6 +176,9 @@ class MavLink(Sensor):
         Returns:
             comms object or false
         '''
+        # loaded on first connection
+        from pymavlink import mavutil
+
         try:
             master = mavutil.mavlink_connection(cls.address, 115200, 255)
 
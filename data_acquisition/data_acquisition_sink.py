@@ -0,0 +1,161 @@
+'''
+Data sinks for py_drone_toast data acquisition.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+The acquisition loop hands each sample (and the end of store message) to a
+sink,
+1) Graph_sink, stores directly into the py_drone_graph living in the same
+   process.
+2) Http_sink, POSTs to the /api/v1/store endpoint, for remote deployments.
+'''
+# Imports ######################################################################
+import json
+import logging
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+##############################
+# Sink base class
+##############################
+class Sink(object):
+
+    ##############################
+    # Store data
+    ##############################
+    def store(self, data):
+        '''
+        Args:
+            data (dict.):   data for store_data_point
+
+        Returns:
+            dict.: store status, as returned by /api/v1/store
+        '''
+        return {"status": False, "Error": "no sink."}
+
+###########################################
+# end of Sink class
+###########################################
+
+##############################
+# In process sink
+##############################
+class Graph_sink(Sink):
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, graph, flight_dict):
+        '''
+        Args:
+            graph (py_drone_graph): graph to store to
+            flight_dict (dict.):    ini file flight dict.
+
+        Returns:
+            None
+        '''
+        self.graph = graph
+        self.flight_dict = flight_dict
+
+    ##############################
+    # Store data
+    ##############################
+    def store(self, data):
+        '''
+        Args:
+            data (dict.):   data for store_data_point
+
+        Returns:
+            dict.: store status, errors are returned rather than raised so the
+                   acquisition loop carries on
+        '''
+        # configured?
+        if 'flight' not in self.flight_dict.keys():
+            return {"status": False, "Error": "not configured for logging."}
+
+        # call store function
+        try:
+            ret = self.graph.store_data_point(data, self.flight_dict)
+        except Exception as ex:
+            logger.exception("STORE failed.")
+            return {"status": False, "Error": str(ex)}
+        logger.info("STORE return: %s.", ret)
+
+        # return status
+        return ret
+
+###########################################
+# end of Graph_sink class
+###########################################
+
+##############################
+# HTTP sink
+##############################
+class Http_sink(Sink):
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, api_callback):
+        '''
+        Args:
+            api_callback (url):     API callback url, e.g.
+                                    http://localhost:5000/api/v1/store
+
+        Returns:
+            None
+        '''
+        self.api_callback = api_callback
+
+    ##############################
+    # Store data
+    ##############################
+    def store(self, data):
+        '''
+        Args:
+            data (dict.):   data for store_data_point
+
+        Returns:
+            dict.: store status
+        '''
+        # create parameters
+        datas = {"data": json.dumps(data)}
+
+        # post to the flask server, requests loaded on first use
+        import requests
+        r = requests.post(self.api_callback, params=datas)
+        logger.info("POST return: %s.", r.text)
+
+        # parse return
+        return json.loads(r.text)
+
+###########################################
+# end of Http_sink class
+###########################################
+
+##############################
+# create sink from config
+##############################
+def get_sink(dataacquisition_dict, graph, flight_dict, api_callback):
+    '''
+    Args:
+        dataacquisition_dict (dict):    data acquisition settings, 'sink' is
+                                        'local' (default) or 'http'
+        graph (py_drone_graph):         graph for local sink
+        flight_dict (dict.):            ini file flight dict.
+        api_callback (url):             default url for http sink,
+                                        overridden by 'sink_url'
+
+    Returns:
+        Sink: the configured sink
+    '''
+    sink_type = dataacquisition_dict.get('sink', 'local')
+
+    # remote?
+    if sink_type == 'http':
+        return Http_sink(dataacquisition_dict.get('sink_url', api_callback))
+
+    # else in process
+    return Graph_sink(graph, flight_dict)
@@ -15,19 +15,19 @@ the rdf graph.
 '''
 
 # Imports ######################################################################
+import itertools
 import json
 import os
 import base64
 import uuid
 import logging
+import time
 
 # RDFLIB
 import rdflib
 from rdflib.serializer import Serializer
 from rdflib import plugin, Graph, Literal, URIRef, BNode
 from rdflib.store import Store
-from rdflib.plugins.sparql.processor import processUpdate
-from SPARQLWrapper import SPARQLWrapper, JSON
 from rdflib.graph import Graph, ConjunctiveGraph
 
 # my imports
@@ -35,6 +35,13 @@ from graph.py_drone_graph_core import py_drone_graph_core, LANDRS, LDLBASE
 from graph.py_drone_graph_core import SOSA, QUDT_UNIT, QUDT, GEO, RDFG, \
         ontology_landrs, ontology_myID
 from graph.py_drone_graph_store import py_drone_graph_store
+from graph.py_drone_graph_plan import py_drone_graph_plan
+from graph.py_drone_graph_stream import stream_query, json_lines, n_triples
+from graph.py_drone_graph_execution import guarded_graph
+from graph.py_drone_graph_dataset import query_dataset, dataset_graph
+from graph.py_drone_graph_describe import is_describe, prepare_describe, describe_nodes, concise_description
+from graph.py_drone_graph_profile import query_profile
+from graph.py_drone_graph_export import export_graph, export_format, n_quads
 from config.config_graph_shacl import config_graph_shacl
 
 # namespaces from rdflib
@@ -53,7 +60,7 @@ logger = logging.getLogger(__name__)
 ################################################################################
 
 
-class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_shacl):
+class py_drone_graph(py_drone_graph_core, py_drone_graph_store, py_drone_graph_plan, config_graph_shacl):
     '''
     sample instantiation,
     d_graph = ldg.py_drone_graph(ontology_myID, load_graph_file)
@@ -86,18 +93,29 @@ class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_sha
     # find or create a graph for ObservationCollection
     ##################################################
 
-    def observation_collection_graph(self, obs_col, collection_type, dataset):
+    def observation_collection_graph(self, obs_col, collection_type, dataset, staging=None):
         '''
+        Graphs found or created are indexed by dataset (or collection) so
+        later stores do not search the store.
+
         Args:
             uuid (str): uuid of observation collection to associate with graph
+            staging (graph_staging): optional, stage the writes creating a
+                                     graph, dropped with the sample
         Returns:
-            graph: graph object
+            tuple: graph object, True if graph created
         '''
         # graph created as dataset?
         if dataset:
+            # indexed?
+            g_context = self.graph_index.get(dataset, None)
+            if g_context is not None:
+                return g_context, False
+
             # try to get context
             g_context = self.g.get_context(dataset)
             if g_context:
+                self.graph_index.update({dataset: g_context})
                 return g_context, False
 
             else:
@@ -105,15 +123,21 @@ class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_sha
                 gn = Graph(self.store, identifier=dataset)
 
                 # add the obs_col to graph
-                gn.add((obs_col, RDF.type, collection_type))
+                self.staged(gn, staging).add((obs_col, RDF.type, collection_type))
                 # should get labeled during config
 
                 logger.info('graph created: %s.' % str(dataset))
 
                 # return graph
+                self.index_graph(dataset, gn, staging)
                 return gn, True
 
         # else fall back to original method, for testing
+        # indexed?
+        g_context = self.graph_index.get(obs_col, None)
+        if g_context is not None:
+            return g_context, False
+
         # strip uri part
         obs_col_uuid = None
         pos = obs_col.rfind('/')
@@ -122,14 +146,16 @@ class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_sha
 
         if not obs_col_uuid:
             logger.info('graph creation failed.')
-            return None
+            return None, False
 
         # exist?
         for s, p, o in self.g1.triples((None, RDF.type, RDFG.Graph)):
             # check if graph matched collection
             if (s, RDFS.label, Literal(obs_col_uuid)) in self.g1:
                 # found a match
-                return self.g.get_context(s)
+                g_context = self.g.get_context(s)
+                self.graph_index.update({obs_col: g_context})
+                return g_context, False
 
         # else get uuid
         graph_uuid = self.generate_uuid()
@@ -137,7 +163,7 @@ class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_sha
         # create new node in graph
         the_graph_name = graph_uuid
         the_graph_node = self.BASE.term(the_graph_name)
-        graph = self.g.get_context(self.BASE.term(self.graph_name))
+        graph = self.staged(self.g.get_context(self.BASE.term(self.graph_name)), staging)
         graph.add((the_graph_node, RDF.type, RDFG.Graph))
         graph.add((the_graph_node, RDFS.label, Literal(obs_col_uuid)))
 
@@ -145,28 +171,75 @@ class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_sha
         gn = Graph(self.store, identifier=the_graph_node)
 
         # add the obs_col to graph
-        gn.add((self.BASE.term(obs_col_uuid), RDF.type, collection_type))
+        self.staged(gn, staging).add((self.BASE.term(obs_col_uuid), RDF.type, collection_type))
 
         logger.info('graph created: %s.' % the_graph_name)
 
         # return graph
+        self.index_graph(obs_col, gn, staging)
         return gn, True
 
-    ###################################
-    # save graph, returns a turtle file
-    ###################################
-    def save_graph(self, save_graph_file):
+    ####################################
+    # graph to write to, maybe staged
+    ####################################
+    def staged(self, graph, staging=None):
         '''
         Args:
-            save_graph_file (str): turtle filename to save
+            graph (Graph):              store backed graph
+            staging (graph_staging):    optional, staging to write to
+
+        Returns:
+            Graph or staged_graph: graph to write to
         '''
-        # save graph?
-        if save_graph_file:
-            # create folder if required
-            os.makedirs(os.path.dirname(save_graph_file), exist_ok=True)
-            # return the serialized graph
-            self.g.serialize(destination=save_graph_file,
-                             format='turtle', base=self.my_host_name)
+        if staging is None:
+            return graph
+        return staging.stage(graph)
+
+    ####################################
+    # index a created graph
+    ####################################
+    def index_graph(self, key, graph, staging=None):
+        '''
+        Args:
+            key (Node):                 dataset or observation collection
+            graph (Graph):              graph created
+            staging (graph_staging):    optional, creating writes are staged
+        '''
+        if staging is None:
+            self.graph_index.update({key: graph})
+        else:
+            staging.index(self.graph_index, key, graph)
+
+    ####################################
+    # export the store, or one graph
+    ####################################
+    def export_store(self, accept=None, filename=None, id=None, compress=False):
+        '''
+        Args:
+            accept (str):       requested content type (Accept header)
+            filename (str):     file name to download as, sets the format by
+                                its extension
+            id (str):           optional, uuid of the graph to export, else
+                                the whole store
+            compress (bool):    gzip the export
+
+        Returns:
+           tuple: generator of chunks, bytes if compressed, and content type,
+                  None if there is no such graph
+        '''
+        # the store as flushed, in step with the change log
+        if id is None:
+            content_type = export_format(accept, filename, n_quads)
+            return export_graph(self.g, content_type, compress=compress), content_type
+
+        # graph exists?
+        identifier = self.BASE.term(id)
+        if not len(self.g.get_context(identifier)):
+            return None
+
+        # a single graph is N-Triples unless N-Quads asked for
+        content_type = export_format(accept, filename, n_triples)
+        return export_graph(self.g, content_type, identifier, compress), content_type
 
     # interaction with ld.landrs.org to copy sub-graphs to drone ###############
 
@@ -243,16 +316,10 @@ class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_sha
             return False
 
         # query to find top level type
-        q_type = ('SELECT * WHERE { '
-                  '	<' + self.BASE.term(node) + '> a ?type .'
-                  '	filter not exists {'
-                  '    	?subtype ^a <' + self.BASE.term(node) + '> ;'
-                  '        		<' + RDFS.subClassOf + '> ?type . '
-                  '    	filter ( ?subtype != ?type )'
-                  '	}'
-                  '}')
-
-        # set wrapper to talk to landrs
+        q_type = self.named_queries.remote('node_type', {'node': self.BASE.term(node)})
+
+        # set wrapper to talk to landrs, loaded on first use
+        from SPARQLWrapper import SPARQLWrapper, JSON
         spql = SPARQLWrapper(ontology_landrs)
 
         # lets try and get it from ld.landrs.org
@@ -280,10 +347,7 @@ class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_sha
             return False
 
         # find my node data
-        q = ('SELECT ?type ?attribute '
-             'WHERE { '
-             '   <' + self.BASE.term(node) + '>  ?type ?attribute .'
-             '} ')
+        q = self.named_queries.remote('node', {'node': self.BASE.term(node)})
 
         # put data into graph
         spql.setQuery(q)
@@ -334,11 +398,17 @@ class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_sha
     ##########################
     # run a sparql query
     ##########################
-    def run_sql(self, query, type, return_type):
+    def run_sql(self, query, type, return_type, view=None, explain=False, dataset=None):
         '''
         Args:
-            query (str): sparql query
-            type (str):  insert/query type
+            query (str):        sparql query
+            type (str):         insert/query type
+            view (str):         optional, dataset in the observation store to
+                                query the RDF view of
+            explain (bool):     optional, return the query profile rather than
+                                the result
+            dataset (dict.):    optional, 'default' and 'named' graph IRIs to
+                                query, default-graph-uri and named-graph-uri
 
         Returns:
            dict.: query result
@@ -348,39 +418,449 @@ class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_sha
         '''
         # set return
         ret_type = 'application/sparql-results+json'
+
         # query
         if type == "insert":
+            # views are read only
+            if view:
+                raise Exception("cannot update a view")
+
+            # updates follow the hot tier writes
+            self.flush_store()
+
             # we call this to update, either returns for success
             # or throws an exception (try block in calling code)
+            from rdflib.plugins.sparql.processor import processUpdate
             processUpdate(self.g, query)
+
+            # may have changed nodes we track, or graphs we indexed
+            self.cardinality.reset()
+            self.collection_index.clear()
+            self.graph_index.clear()
             ret = json.dumps({"status": "success"})
         else:
-            # run query for SELECT, ASK or now CONSTRUCT
-            if 'DESCRIBE' in query:
-                # get object
-                actual_query = query.split('<', 1)[1].split('>')[0]
-                print("describe", actual_query)
-                node_graph = self.get_graph_with_node(URIRef(actual_query))
-                ret_type = 'text/turtle'
-                # return info
-                return node_graph.serialize(format="turtle", base=self.my_host_name), ret_type
-
-            # run query
-            result = self.g.query(query)
-
-            # check if CONSTRUCT as this returns a graph
-            if result.type == 'CONSTRUCT':
-                # test type
-                if 'text/turtle' in return_type:
-                    ret_type = 'text/turtle'
-                    # convert graph to turtle
-                    ret = result.serialize(format="turtle", base=self.my_host_name)
+            # on a worker, within the query limits
+            guard = self.query_executor.guard(query)
+
+            # profile, not cached
+            if explain:
+                return self.query_executor.run(guard, self.explain_query, query, view, guard, dataset)
+
+            # views are not in the store, not cached
+            if self.result_cache is None or view:
+                return self.query_executor.run(guard, self.run_query, query, return_type, view, guard, dataset)
+
+            # cached, and nothing written since?
+            key = self.result_cache.key(query, return_type, dataset)
+            ret = self.result_cache.get(key)
+            if ret is None:
+                generation = self.result_cache.generation
+                ret = self.query_executor.run(guard, self.run_query, query, return_type, None, guard, dataset)
+                self.result_cache.put(key, ret, generation)
+
+            # return cached
+            return ret
+
+        # print("json",ret)
+        # return
+        return ret, ret_type
+
+    ##########################
+    # run a query, streamed
+    ##########################
+    def stream_sql(self, query, return_type, view=None, dataset=None):
+        '''
+        Args:
+            query (str):        sparql query
+            return_type (str):  requested content type
+            view (str):         optional, dataset in the observation store to
+                                query the RDF view of
+            dataset (dict.):    optional, 'default' and 'named' graph IRIs to
+                                query, default-graph-uri and named-graph-uri
+
+        Returns:
+           tuple: result, a str or a generator of str chunks, and its
+                  content type
+
+        Raises:
+            Exceptions on error
+        '''
+        # not streamed
+        if is_describe(query):
+            return self.run_sql(query, 'query', return_type, view, dataset=dataset)
+
+        # cached, and nothing written since?
+        key = None
+        if self.result_cache is not None and not view:
+            key = self.result_cache.key(query, return_type, dataset)
+            ret = self.result_cache.get(key)
+            if ret is not None:
+                return ret
+            generation = self.result_cache.generation
+
+        # parse once
+        prepared, default, named = self.prepare_query(query, dataset)
+
+        # graph to query, within the query limits
+        guard = self.query_executor.guard(query)
+        graph = self.query_graph(view, guard, default, named)
+
+        # type or format not streamed?
+        streamed = stream_query(graph, prepared, return_type, guard=guard)
+        if streamed is None:
+            ret = self.query_executor.run(guard, self.query_result, graph, prepared, return_type, guard)
+            if key is not None:
+                self.result_cache.put(key, ret, generation)
+            return ret
+
+        # evaluated on a worker as the client reads
+        chunks, ret_type = streamed
+        chunks = self.query_executor.stream(guard, chunks)
+
+        # errors before the response starts
+        try:
+            first = next(chunks)
+        except StopIteration:
+            first = ''
+        chunks = itertools.chain([first], chunks)
+
+        # keep small results
+        if key is not None:
+            chunks = self.cache_chunks(key, chunks, ret_type, generation)
+
+        # return stream
+        return chunks, ret_type
+
+    ##########################
+    # submit a query job
+    ##########################
+    def submit_job(self, query, view=None, dataset=None):
+        '''
+        Args:
+            query (str):        sparql query
+            view (str):         optional, dataset in the observation store
+            dataset (dict.):    optional, 'default' and 'named' graph IRIs
+
+        Returns:
+           str: job id, see query_jobs for its status and result
+        '''
+        # parse errors now, not in the job
+        from rdflib.plugins.sparql import prepareQuery
+        if is_describe(query):
+            prepare_describe(query)
+        else:
+            prepareQuery(query)
+
+        # return id
+        return self.query_jobs.submit(query, self.job_query, query, view, dataset)
+
+    ##########################
+    # evaluate a query job
+    ##########################
+    def job_query(self, query, view=None, dataset=None, guard=None):
+        '''
+        Args:
+            query (str):            sparql query
+            view (str):             optional, dataset in the observation store
+            dataset (dict.):        optional, 'default' and 'named' graph IRIs
+            guard (query_guard):    optional, limits of the job
+
+        Returns:
+           tuple: iterable of str chunks and their content type, JSON lines
+                  for SELECT and N-Triples for CONSTRUCT
+        '''
+        if is_describe(query):
+            ret, ret_type = self.run_query(query, 'text/turtle', view, guard, dataset)
+            return [ret], ret_type
+
+        prepared, default, named = self.prepare_query(query, dataset)
+        graph = self.query_graph(view, guard, default, named)
+
+        # ASK is not streamed
+        streamed = stream_query(graph, prepared, json_lines + ', ' + n_triples, guard=guard)
+        if streamed is None:
+            ret, ret_type = self.query_result(graph, prepared, 'application/sparql-results+json', guard)
+            return [ret], ret_type
+
+        # return stream
+        return streamed
+
+    ##################################
+    # cache a stream if small enough
+    ##################################
+    def cache_chunks(self, key, chunks, ret_type, generation):
+        '''
+        Args:
+            key (tuple):        result cache key
+            chunks (generator): str chunks
+            ret_type (str):     content type
+            generation (int):   generation when the query started
+
+        Returns:
+           generator: the chunks
+        '''
+        kept = []
+        size = 0
+        for chunk in chunks:
+            if kept is not None:
+                size += len(chunk)
+                if size <= self.result_cache.max_bytes:
+                    kept.append(chunk)
                 else:
-                    # convert graph to JSON
-                    ret = self.graph_to_json(result.graph)
+                    kept = None
+            yield chunk
+
+        # all of it?
+        if kept is not None:
+            self.result_cache.put(key, (''.join(kept), ret_type), generation)
+
+    ##########################
+    # ETag for query results
+    ##########################
+    def query_etag(self, return_type):
+        '''
+        Args:
+            return_type (str):  requested content type
+
+        Returns:
+           str: ETag of results from the current store, None if not cached
+        '''
+        if self.result_cache is None:
+            return None
+
+        # return tag
+        return self.result_cache.etag(return_type)
+
+    ##########################
+    # evaluate a sparql query
+    ##########################
+    def run_query(self, query, return_type, view=None, guard=None, dataset=None):
+        '''
+        Args:
+            query (str):            sparql query
+            return_type (str):      requested content type
+            view (str):             optional, dataset in the observation store
+            guard (query_guard):    optional, limits of the query
+            dataset (dict.):        optional, 'default' and 'named' graph IRIs
+
+        Returns:
+           tuple: query result and its content type
+
+        Raises:
+            Exceptions on error
+        '''
+        # set return
+        ret_type = 'application/sparql-results+json'
+
+        # run query for SELECT, ASK or now CONSTRUCT
+        if is_describe(query):
+            # IRIs, and nodes bound by the WHERE
+            prepared, terms = prepare_describe(query)
+            default, named = query_dataset(prepared, dataset, self.default_dataset)
+            graph = self.query_graph(view, guard, default, named)
+
+            node_graph = concise_description(graph, describe_nodes(graph, prepared, terms))
+            ret_type = 'text/turtle'
+            # return info
+            return node_graph.serialize(format="turtle", base=self.my_host_name), ret_type
+
+        # run query
+        prepared, default, named = self.prepare_query(query, dataset)
+        return self.query_result(self.query_graph(view, guard, default, named), prepared, return_type, guard)
+
+    ##########################
+    # profile a sparql query
+    ##########################
+    def explain_query(self, query, view=None, guard=None, dataset=None):
+        '''
+        Args:
+            query (str):            sparql query
+            view (str):             optional, dataset in the observation store
+            guard (query_guard):    optional, limits of the query
+            dataset (dict.):        optional, 'default' and 'named' graph IRIs
+
+        Returns:
+           tuple: JSON profile and its content type. The algebra, with the
+                  calls, solutions and inclusive time of each operator, the
+                  triple pattern lookups sent to the store, the triples read
+                  and the SQL statements issued (null for other stores).
+
+        Raises:
+            Exceptions on error
+        '''
+        if is_describe(query):
+            raise Exception("explain does not support DESCRIBE")
+
+        # count lookups with a guard
+        if guard is None:
+            guard = self.query_executor.guard(query)
+
+        # parse
+        start = time.time()
+        prepared, default, named = self.prepare_query(query, dataset)
+        parsed = time.time()
+
+        graph = self.query_graph(view, guard, default, named)
+
+        # evaluate all of it
+        with query_profile(self.store) as profile:
+            result = graph.query(prepared)
+            results = len(result)
+        guard.check_result(result)
+
+        ret = {'query': query,
+               'algebra': profile.algebra(prepared.algebra),
+               'parse': round(parsed - start, 6),
+               'evaluate': round(time.time() - parsed, 6),
+               'results': results,
+               'dataset': {'default': default, 'named': named},
+               'lookups': guard.lookups,
+               'scanned': guard.scans,
+               'sql_statements': profile.sql_statements}
+
+        # return profile
+        return json.dumps(ret), 'application/json'
+
+    ##########################
+    # parse, and find dataset
+    ##########################
+    def prepare_query(self, query, dataset=None):
+        '''
+        Args:
+            query (str):        sparql query
+            dataset (dict.):    optional, 'default' and 'named' graph IRIs
+                                from the request
+
+        Returns:
+           tuple: prepared query, without FROM/FROM NAMED, and the default
+                  and named graph IRIs to query, None for all
+        '''
+        from rdflib.plugins.sparql import prepareQuery
+        prepared = prepareQuery(query)
+
+        # request, else the query, else the configured default
+        default, named = query_dataset(prepared, dataset, self.default_dataset)
+
+        # return query and dataset
+        return prepared, default, named
+
+    ##########################
+    # graph a query reads
+    ##########################
+    def query_graph(self, view=None, guard=None, default=None, named=None):
+        '''
+        Args:
+            view (str):             optional, dataset in the observation store
+            guard (query_guard):    optional, limits of the query
+            default (list):         optional, default graph IRIs, all if None
+            named (list):           optional, named graph IRIs, all if None
+
+        Returns:
+           Graph: the store, or the view, read under the guard
+        '''
+        # with the hot tier writes
+        graph = self.read_graph()
+        if view:
+            graph = self.observation_view(URIRef(view))
+            if graph is None:
+                raise Exception("no observations for " + view)
+        elif default is not None or named is not None:
+            # only the graphs of the dataset
+            graph = dataset_graph(graph, default, named)
+
+        if guard is None:
+            return graph
+
+        # return guarded
+        return guarded_graph(graph, guard)
+
+    ##########################
+    # evaluate and serialize
+    ##########################
+    def query_result(self, graph, query, return_type, guard=None, initBindings=None):
+        '''
+        Args:
+            graph (Graph):          graph to query
+            query (str or Query):   sparql query, or prepared query
+            return_type (str):      requested content type
+            guard (query_guard):    optional, limits of the query
+            initBindings (dict.):   optional, variable name to node
+
+        Returns:
+           tuple: serialized result and its content type
+        '''
+        result = graph.query(query, initBindings=initBindings or {})
+        if guard is not None:
+            guard.check_result(result)
+
+        # return serialized
+        return self.serialize_result(result, return_type)
+
+    ##########################
+    # run a named query
+    ##########################
+    def run_named_query(self, name, params, return_type):
+        '''
+        Args:
+            name (str):         registered query name
+            params (dict.):     parameter values
+            return_type (str):  requested content type
+
+        Returns:
+           tuple: query result and its content type
+
+        Raises:
+            KeyError for an unknown query, Exceptions on error
+        '''
+        # parameters as nodes, checks name
+        bindings = self.named_queries.bindings(name, params)
+
+        # on a worker, within the query limits
+        guard = self.query_executor.guard(name + ' ' + ' '.join('%s=%s' % (k, v.n3()) for k, v in bindings.items()))
+        args = (self.query_graph(None, guard), self.named_queries.prepare(name), return_type, guard, bindings)
+
+        if self.result_cache is None:
+            return self.query_executor.run(guard, self.query_result, *args)
+
+        # cached, and nothing written since?
+        key = self.result_cache.key(self.named_queries.cache_key(name, bindings), return_type)
+        ret = self.result_cache.get(key)
+        if ret is None:
+            generation = self.result_cache.generation
+            ret = self.query_executor.run(guard, self.query_result, *args)
+            self.result_cache.put(key, ret, generation)
+
+        # return result
+        return ret
+
+    ##########################
+    # serialize query result
+    ##########################
+    def serialize_result(self, result, return_type):
+        '''
+        Args:
+            result (rdflib Result): query result
+            return_type (str):      requested content type
+
+        Returns:
+           tuple: serialized result and its content type
+        '''
+        # set return
+        ret_type = 'application/sparql-results+json'
+
+        # check if CONSTRUCT as this returns a graph
+        if result.type == 'CONSTRUCT':
+            # test type
+            if 'text/turtle' in return_type:
+                ret_type = 'text/turtle'
+                # convert graph to turtle
+                ret = result.serialize(format="turtle", base=self.my_host_name)
             else:
-                # convert to JSON
-                ret = result.serialize(format="json")
+                # convert graph to JSON
+                ret = self.graph_to_json(result.graph)
+        else:
+            # convert to JSON
+            ret = result.serialize(format="json")
 
         # print("json",ret)
         # return
@@ -437,13 +917,14 @@ class py_drone_graph(py_drone_graph_core, py_drone_graph_store, config_graph_sha
            dict.: graph ids
         '''
         graphs = []
+        read_graph = self.read_graph()
 
         # find the graphs in g1
-        for s, p, o in self.g.triples((None, RDF.type, RDFG.Graph)):
+        for s, p, o in read_graph.triples((None, RDF.type, RDFG.Graph)):
             # check there is a label
-            label = self.g.value(s, RDFS.label, None)
+            label = read_graph.value(s, RDFS.label, None)
             if not label:
-                label = self.g.value(s, DCTERMS.title, None)
+                label = read_graph.value(s, DCTERMS.title, None)
             if label:
                 # store
                 graphs.append( {"graph": str(s), "label": str(label)} )
@@ -0,0 +1,111 @@
+'''
+Property cardinality tracking for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+The store path enforces sh:maxCount by counting the objects a node already
+has for a property, a store query per property. For nodes the store path
+created itself this session the objects are known, every write to them goes
+through it. The tracker records those writes and answers the count without
+the store, falling back to the store for any other node.
+'''
+
+# Imports ######################################################################
+import logging
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+################################################################################
+# Class to track property objects of created nodes
+################################################################################
+
+
+class cardinality_tracker(object):
+    '''
+    sample instantiation,
+    tracker = cardinality_tracker()
+
+    Counts are kept per graph, node and property. reset() forgets all nodes,
+    call it whenever writes may have bypassed the tracker (SPARQL update,
+    discarded samples) or at the end of a store session.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self):
+        # nodes created this session
+        self.nodes = set()
+
+        # objects keyed by (graph identifier, node, property)
+        self.objects = {}
+
+    ##########################
+    # node created, no triples
+    ##########################
+    def created(self, node):
+        '''
+        Args:
+            node (Node):    newly minted node
+        '''
+        self.nodes.add(node)
+
+    ##################################
+    # number of objects for property
+    ##################################
+    def count(self, graph, node, path):
+        '''
+        Args:
+            graph (Graph):  graph holding the node
+            node (Node):    subject
+            path (URIRef):  property
+
+        Returns:
+           int: number of objects, from the store if node not tracked
+        '''
+        if node in self.nodes:
+            return len(self.objects.get((graph.identifier, node, path), ()))
+
+        # not ours, ask the store
+        return len(list(graph.objects(node, path)))
+
+    ##########################
+    # record an add
+    ##########################
+    def add(self, graph, node, path, object):
+        '''
+        Args:
+            graph (Graph):  graph written to
+            node (Node):    subject
+            path (URIRef):  property
+            object (Node):  object added
+        '''
+        if node in self.nodes:
+            self.objects.setdefault((graph.identifier, node, path), set()).add(object)
+
+    ##########################
+    # record a set
+    ##########################
+    def set(self, graph, node, path, object):
+        '''
+        Args:
+            graph (Graph):  graph written to
+            node (Node):    subject
+            path (URIRef):  property
+            object (Node):  object replacing any others
+        '''
+        if node in self.nodes:
+            self.objects.update({(graph.identifier, node, path): {object}})
+
+    ##########################
+    # forget all nodes
+    ##########################
+    def reset(self):
+        self.nodes = set()
+        self.objects = {}
+
+###########################################
+# end of cardinality_tracker class
+###########################################
@@ -0,0 +1,129 @@
+'''
+Shape catalog for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+The labelled shape graphs (Flight_store, Flight_input, Flight_constraint,
+Sensor_parse etc.) are compiled into shape dictionaries by get_shape. This
+is expensive and was repeated for every sensor of every stored sample. The
+catalog keeps the compiled dictionaries in memory and drops an entry when a
+triple is added to, or removed from, the named graph that owns it.
+'''
+
+# Imports ######################################################################
+import logging
+
+# RDFLIB
+from rdflib.store import TripleAddedEvent, TripleRemovedEvent
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+################################################################################
+# Class to hold compiled shape graphs
+################################################################################
+
+
+class shape_catalog(object):
+    '''
+    sample instantiation,
+    catalog = shape_catalog(store)
+    where,
+    1. store, the rdflib store holding the shape graphs. The catalog
+       subscribes to the store's add/remove events for invalidation.
+
+    Entries are dictionaries keyed by the identifier of the shape graph,
+    'shapes' holds the dictionary of shape dictionaries.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, store):
+        '''
+        Args:
+            store (rdflib Store):   store to watch for changes
+        '''
+        # compiled entries, keyed by graph identifier
+        self.entries = {}
+
+        # watch for graph changes
+        store.dispatcher.subscribe(TripleAddedEvent, self.graph_changed)
+        store.dispatcher.subscribe(TripleRemovedEvent, self.graph_changed)
+
+    ##########################
+    # get an entry
+    ##########################
+    def get(self, identifier):
+        '''
+        Args:
+            identifier (URIRef):    shape graph identifier
+
+        Returns:
+           dict.: catalog entry or None if not compiled
+        '''
+        return self.entries.get(identifier, None)
+
+    ##########################
+    # add an entry
+    ##########################
+    def put(self, identifier, shapes):
+        '''
+        Args:
+            identifier (URIRef):    shape graph identifier
+            shapes (dict.):         compiled shape dictionaries
+
+        Returns:
+           dict.: the new catalog entry
+        '''
+        entry = {'shapes': shapes}
+        self.entries.update({identifier: entry})
+
+        logger.info('shape graph compiled: %s.' % str(identifier))
+
+        # return entry
+        return entry
+
+    ##########################
+    # drop entries
+    ##########################
+    def invalidate(self, identifier=None):
+        '''
+        Args:
+            identifier (URIRef):    shape graph identifier, None for all
+        '''
+        if identifier is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(identifier, None)
+
+    ###########################################
+    # store event handler, drop changed graphs
+    ###########################################
+    def graph_changed(self, event):
+        '''
+        Args:
+            event (rdflib Event):   TripleAddedEvent or TripleRemovedEvent
+        '''
+        # nothing compiled, nothing to do (store hot path)
+        if not self.entries:
+            return
+
+        # get graph identifier
+        context = getattr(event, 'context', None)
+        identifier = getattr(context, 'identifier', context)
+
+        # removal across all graphs?
+        if identifier is None:
+            self.invalidate()
+            return
+
+        # owning graph changed?
+        if identifier in self.entries:
+            logger.info('shape graph changed: %s.' % str(identifier))
+            self.invalidate(identifier)
+
+###########################################
+# end of shape_catalog class
+###########################################
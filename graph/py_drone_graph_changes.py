@@ -0,0 +1,344 @@
+'''
+Change log for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+Every triple added to or removed from the store is recorded, with an
+increasing sequence number, in a table of a separate SQLITE database, from
+the store's add/remove events, so writes from store_data_point, add_graph,
+SPARQL updates, input forms and file reloads are all recorded. A removal
+pattern is recorded as the quads it matches, looked up as the event is
+dispatched, before the store removes them. Events are dispatched before
+the store writes, so the changes of a write are held until it returns, and
+those of a store_transaction (see py_drone_graph_staging) until it commits,
+a write that fails or is rolled back is not logged. A copy of the store (an
+export, see py_drone_graph_export) is kept in step by applying the changes
+after the sequence number it was taken at.
+
+Changes are written a batch at a time, and before they are read. The log
+keeps the latest max_changes, a reader asking for older changes must copy
+the store again. A full reload of the files starts the log again.
+'''
+
+# Imports ######################################################################
+import contextlib
+import logging
+import os
+import sqlite3
+import threading
+
+# RDFLIB
+from rdflib.store import TripleAddedEvent, TripleRemovedEvent
+
+# my imports
+from graph.py_drone_graph_stream import nq_row
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# changes written at once
+change_batch = 1000
+
+# changes read at once
+change_page = 1000
+
+# change actions
+change_actions = {'A': 'add', 'D': 'remove'}
+
+##############################
+# log changes once committed
+##############################
+@contextlib.contextmanager
+def change_transaction(store):
+    '''
+    with change_transaction(store):
+        ...
+
+    Changes to the store in the block are logged by its change logs when it
+    exits, dropped if it raises.
+
+    Args:
+        store (rdflib Store):   store written to
+    '''
+    with contextlib.ExitStack() as stack:
+        for log in getattr(store, 'change_logs', []):
+            stack.enter_context(log.transaction())
+        yield
+
+################################################################################
+# Class to log store changes
+################################################################################
+
+
+class change_log(object):
+    '''
+    sample instantiation,
+    changes = change_log(store, location, max_changes=1000000)
+    where,
+    1. store, the rdflib store to record, the log subscribes to its
+       add/remove events
+    2. location, SQLITE file for the log
+    3. max_changes, changes kept, 0 for all
+
+    start is the sequence number the log is complete after, a reader that
+    has applied the changes up to start or later can follow the log.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, store, location, max_changes=1000000):
+        '''
+        Args:
+            store (rdflib Store):   store to record
+            location (str):         SQLITE file
+            max_changes (int):      changes kept, 0 for all
+        '''
+        # check any folders exist
+        folder = os.path.dirname(location)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.store = store
+        self.max_changes = max_changes
+
+        # record events?
+        self.recording = True
+
+        # shared by the acquisition and flask threads
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(location, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS changes (sequence INTEGER PRIMARY KEY, '
+                        'action TEXT, quad TEXT)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS change_start (start INTEGER)')
+        self.db.commit()
+
+        # where the log starts and ends
+        row = self.db.execute('SELECT start FROM change_start').fetchone()
+        self.start = row[0] if row else 0
+        last = self.db.execute('SELECT MAX(sequence) FROM changes').fetchone()[0]
+        self.sequence = max(self.start, last or 0)
+
+        # recorded, not yet written
+        self.pending = []
+
+        # changes of writes in progress, by thread
+        self.local = threading.local()
+
+        # watch for store changes, logged once written
+        store.dispatcher.subscribe(TripleAddedEvent, self.triple_added)
+        store.dispatcher.subscribe(TripleRemovedEvent, self.triple_removed)
+        for name in ['add', 'addN', 'remove']:
+            setattr(store, name, self.logged(getattr(store, name)))
+        store.change_logs = getattr(store, 'change_logs', []) + [self]
+
+    ##########################
+    # record changes
+    ##########################
+    def record(self, action, quads):
+        '''
+        Args:
+            action (str):   'A' add or 'D' remove
+            quads (iterable):   (triple, context identifier)
+        '''
+        with self.lock:
+            for triple, context in quads:
+                self.sequence += 1
+                self.pending.append((self.sequence, action, nq_row(triple, context).rstrip('\n')))
+
+            # write a batch
+            if len(self.pending) >= change_batch:
+                self.commit()
+
+    ##############################
+    # changes held until committed
+    ##############################
+    @contextlib.contextmanager
+    def transaction(self):
+        '''
+        Changes recorded in the block are held, and logged when the outermost
+        block exits. A block that raises drops its changes.
+        '''
+        local = self.local
+        depth = getattr(local, 'depth', 0)
+        if depth == 0:
+            local.changes = []
+        start = len(local.changes)
+
+        local.depth = depth + 1
+        try:
+            yield
+        except BaseException:
+            del local.changes[start:]
+            raise
+        finally:
+            local.depth = depth
+
+        # outermost, log them
+        if depth == 0:
+            changes, local.changes = local.changes, []
+            for action, quads in changes:
+                self.record(action, quads)
+
+    def logged(self, write):
+        '''
+        Args:
+            write (function):   store add, addN or remove
+
+        Returns:
+           function: write, its changes held until it returns
+        '''
+        def logged_write(*args, **kwargs):
+            with self.transaction():
+                return write(*args, **kwargs)
+
+        # return wrapped
+        return logged_write
+
+    def hold(self, action, quads):
+        '''
+        Args:
+            action (str):       'A' add or 'D' remove
+            quads (iterable):   (triple, context identifier)
+        '''
+        if getattr(self.local, 'depth', 0) > 0:
+            self.local.changes.append((action, quads))
+        else:
+            self.record(action, quads)
+
+    ###########################################
+    # store event handlers
+    ###########################################
+    def triple_added(self, event):
+        '''
+        Args:
+            event (rdflib Event):   TripleAddedEvent
+        '''
+        if not self.recording:
+            return
+
+        # dispatched before the write, a triple stored already is not changed
+        context = getattr(event, 'context', None)
+        if any(True for t in self.store.triples(event.triple, context)):
+            return
+        self.hold('A', [(event.triple, getattr(context, 'identifier', context))])
+
+    def triple_removed(self, event):
+        '''
+        Args:
+            event (rdflib Event):   TripleRemovedEvent, dispatched before the
+                                    store removes the triples
+        '''
+        if not self.recording:
+            return
+
+        # the quads the pattern removes
+        context = getattr(event, 'context', None)
+        quads = []
+        for triple, contexts in self.store.triples(event.triple, context):
+            if context is not None:
+                quads.append((triple, context.identifier))
+            else:
+                quads.extend((triple, c.identifier) for c in contexts)
+
+        self.hold('D', quads)
+
+    ##########################
+    # write recorded changes
+    ##########################
+    def commit(self):
+        with self.lock:
+            if not self.pending:
+                return
+
+            self.db.executemany('INSERT INTO changes VALUES (?, ?, ?)', self.pending)
+            self.pending = []
+
+            # drop the oldest
+            if self.max_changes > 0 and self.sequence - self.start > self.max_changes:
+                self.set_start(self.sequence - self.max_changes)
+
+            self.db.commit()
+
+    ##############################
+    # log complete after sequence
+    ##############################
+    def set_start(self, start):
+        '''
+        Args:
+            start (int):    changes up to here are dropped
+        '''
+        self.db.execute('DELETE FROM changes WHERE sequence <= ?', (start,))
+        self.db.execute('DELETE FROM change_start')
+        self.db.execute('INSERT INTO change_start VALUES (?)', (start,))
+        self.start = start
+
+    ##############################
+    # start again
+    ##############################
+    def reset(self):
+        '''
+        Drops all changes, readers must copy the store again. Sequence numbers
+        carry on.
+        '''
+        with self.lock:
+            self.pending = []
+            self.set_start(self.sequence)
+            self.db.commit()
+
+        logger.info('change log reset at: %d.' % self.sequence)
+
+    ##############################
+    # last sequence number
+    ##############################
+    def last(self):
+        '''
+        Returns:
+           int: sequence number of the latest change
+        '''
+        with self.lock:
+            self.commit()
+            return self.sequence
+
+    ##############################
+    # changes after a sequence
+    ##############################
+    def changes(self, since, last=None):
+        '''
+        Args:
+            since (int):    sequence number the reader has applied
+            last (int):     optional, last sequence number to read
+
+        Returns:
+           generator: sequence number, 'add' or 'remove' and N-Quads
+                      statement, in order
+
+        Raises:
+            Exception if the changes after since are no longer kept
+        '''
+        if since < self.start:
+            raise Exception("changes since %d are not kept, the log starts at %d" % (since, self.start))
+
+        if last is None:
+            last = self.last()
+
+        return self.read(since, last)
+
+    def read(self, since, last):
+        # a page at a time
+        while since < last:
+            with self.lock:
+                rows = self.db.execute('SELECT sequence, action, quad FROM changes WHERE sequence > ? '
+                                       'AND sequence <= ? ORDER BY sequence LIMIT ?',
+                                       (since, last, change_page)).fetchall()
+            if not rows:
+                return
+
+            for sequence, action, quad in rows:
+                yield sequence, change_actions[action], quad
+            since = rows[-1][0]
+
+###########################################
+# end of change_log class
+###########################################
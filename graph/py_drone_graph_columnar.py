@@ -0,0 +1,508 @@
+'''
+Columnar observation store for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+Each stored sensor reading expands to around ten triples in the triple
+table. With the observation store enabled readings are instead kept as rows
+of typed columns (time, sensor, value, lat, lon, alt, unit) in one table per
+dataset, in a separate SQLITE database. The RDF for the observations is
+generated from the rows as it is looked up, observation_view_store maps a
+lookup to the rows it can match and expands only those (see
+observation_view in py_drone_graph_store), so a view never holds the
+expanded dataset.
+'''
+
+# Imports ######################################################################
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from functools import lru_cache
+
+# RDFLIB
+from rdflib.graph import Graph
+from rdflib.store import Store
+
+# my imports
+from graph.py_drone_graph_execution import read_store
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# WKT point, POINT(lon lat [alt])
+wkt_point = re.compile(r'^\s*POINT\s*Z?\s*\(\s*(\S+)\s+(\S+)(?:\s+(\S+))?\s*\)\s*$', re.IGNORECASE)
+
+# observation columns
+observation_columns = ['sample', 'slot', 'time', 'sensor', 'value', 'unit', 'lat', 'lon', 'alt', 'geo']
+
+# rows read at once
+observation_page = 1000
+
+# expanded rows kept by a view
+view_rows = 4096
+
+# node minted for a row, <table>-<sample>-<slot>-<label hash>
+row_node = re.compile(r'(obs_[0-9a-f]{16})-(\d+)-(\d+)-[0-9a-f]{16}$')
+
+################################################################################
+# Class to hold observations in columns
+################################################################################
+
+
+class observation_store(object):
+    '''
+    sample instantiation,
+    obs_store = observation_store(location)
+    where,
+    1. location, SQLITE file for the observation tables
+
+    The datasets table maps each dataset to its observation table and holds
+    the observation collection and the flight dict. used to store it, so the
+    RDF view can be generated with the same mappings.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, location):
+        '''
+        Args:
+            location (str): SQLITE file
+        '''
+        # check any folders exist
+        folder = os.path.dirname(location)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        # shared by the acquisition and flask threads
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(location, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS datasets (dataset TEXT PRIMARY KEY, '
+                        'tbl TEXT, collection TEXT, flight_dict TEXT)')
+
+        # rows are read in sample order
+        for (tbl,) in self.db.execute('SELECT tbl FROM datasets').fetchall():
+            self.db.execute('CREATE INDEX IF NOT EXISTS ' + tbl + '_sample ON ' + tbl + ' (sample, slot)')
+        self.db.commit()
+
+        # next sample number, by dataset
+        self.samples = {}
+
+    ##############################
+    # get table for dataset
+    ##############################
+    def table(self, dataset, collection=None, flight_dict=None):
+        '''
+        Args:
+            dataset (URIRef):       dataset
+            collection (URIRef):    observation collection, to create
+            flight_dict (dict.):    ini file flight dict., to create
+
+        Returns:
+           str: table name, None if not found
+        '''
+        row = self.db.execute('SELECT tbl FROM datasets WHERE dataset = ?', (str(dataset),)).fetchone()
+        if row:
+            return row[0]
+
+        # create?
+        if collection is None:
+            return None
+
+        tbl = 'obs_' + hashlib.sha1(str(dataset).encode('utf-8')).hexdigest()[:16]
+        self.db.execute('CREATE TABLE IF NOT EXISTS ' + tbl + ' (sample INTEGER, slot INTEGER, '
+                        'time TEXT, sensor TEXT, value REAL, unit TEXT, lat REAL, lon REAL, alt REAL, geo TEXT)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS ' + tbl + '_time ON ' + tbl + ' (time)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS ' + tbl + '_sample ON ' + tbl + ' (sample, slot)')
+        self.db.execute('INSERT INTO datasets VALUES (?, ?, ?, ?)',
+                        (str(dataset), tbl, str(collection), json.dumps(flight_dict)))
+
+        logger.info('observation table created: %s %s.' % (tbl, str(dataset)))
+
+        # return name
+        return tbl
+
+    ##############################
+    # store a sample
+    ##############################
+    def store(self, dataset, collection, flight_dict, values):
+        '''
+        Args:
+            dataset (URIRef):       dataset
+            collection (URIRef):    observation collection
+            flight_dict (dict.):    ini file flight dict.
+            values (dict.):         store_data_point values
+
+        Returns:
+           int: number of observations stored
+        '''
+        # location
+        lat = lon = alt = None
+        geo = values['geo_fix']
+        point = wkt_point.match(str(geo))
+        if point:
+            lon, lat, alt = [None if c is None else float(c) for c in point.groups()]
+            geo = None
+
+        with self.lock:
+            tbl = self.table(dataset, collection, flight_dict)
+
+            # sample number
+            sample = self.samples.get(str(dataset), None)
+            if sample is None:
+                sample = self.db.execute('SELECT MAX(sample) FROM ' + tbl).fetchone()[0]
+                sample = -1 if sample is None else sample
+            sample += 1
+            self.samples.update({str(dataset): sample})
+
+            # a row per sensor
+            rows = []
+            for slot, k in enumerate(values['sensors']):
+                rows.append((sample, slot, values['time_stamp'], str(values['sensors'][k]),
+                             values[k], values.get(k + '_units', None), lat, lon, alt, geo))
+
+            self.db.executemany('INSERT INTO ' + tbl + ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self.db.commit()
+
+        # return count
+        return len(rows)
+
+    ##############################
+    # dataset information
+    ##############################
+    def dataset(self, dataset):
+        '''
+        Args:
+            dataset (URIRef):   dataset
+
+        Returns:
+           dict.: 'table', 'collection', 'flight_dict' and 'count', None if
+                  not found
+        '''
+        with self.lock:
+            row = self.db.execute('SELECT tbl, collection, flight_dict FROM datasets WHERE dataset = ?',
+                                  (str(dataset),)).fetchone()
+            if not row:
+                return None
+
+            count = self.db.execute('SELECT COUNT(*) FROM ' + row[0]).fetchone()[0]
+
+        # return info
+        return {'table': row[0], 'collection': row[1], 'flight_dict': json.loads(row[2]), 'count': count}
+
+    ##############################
+    # get observations
+    ##############################
+    def observations(self, dataset, sensor=None, start=None, end=None, after=None, last=None, limit=None):
+        '''
+        Args:
+            dataset (URIRef):   dataset
+            sensor (str):       optional, sensor IRI
+            start (str):        optional, first time stamp
+            end (str):          optional, last time stamp
+            after (tuple):      optional, (sample, slot) to read after
+            last (tuple):       optional, (sample, slot) of the last row to read
+            limit (int):        optional, most rows to return
+
+        Returns:
+           list: observation rows, columns as observation_columns
+        '''
+        clauses = [('sensor = ?', [sensor]), ('time >= ?', [start]), ('time <= ?', [end])]
+        if after is not None:
+            clauses.append(('(sample > ? OR (sample = ? AND slot > ?))', [after[0], after[0], after[1]]))
+        if last is not None:
+            clauses.append(('(sample < ? OR (sample = ? AND slot <= ?))', [last[0], last[0], last[1]]))
+
+        query = ''
+        args = []
+        for clause, values in clauses:
+            if values[0] is not None:
+                query += (' AND ' if args else ' WHERE ') + clause
+                args.extend(values)
+
+        query += ' ORDER BY sample, slot'
+        if limit is not None:
+            query += ' LIMIT ?'
+            args.append(limit)
+
+        with self.lock:
+            tbl = self.table(dataset)
+            if tbl is None:
+                return []
+
+            return self.db.execute('SELECT ' + ', '.join(observation_columns) + ' FROM ' + tbl + query,
+                                   args).fetchall()
+
+    ##############################
+    # read observations by page
+    ##############################
+    def scan(self, dataset, sensor=None, start=None, end=None, after=None, last=None):
+        '''
+        Args:
+            as observations
+
+        Returns:
+           generator: observation rows, read observation_page at a time so
+                      the store is not held while they are used
+        '''
+        while True:
+            rows = self.observations(dataset, sensor, start, end, after, last, observation_page)
+            for row in rows:
+                yield row
+
+            # last page?
+            if len(rows) < observation_page:
+                return
+            after = rows[-1][:2]
+
+    ##############################
+    # get one observation
+    ##############################
+    def row(self, dataset, sample, slot):
+        '''
+        Args:
+            dataset (URIRef):   dataset
+            sample (int):       sample number
+            slot (int):         sensor number in sample
+
+        Returns:
+           tuple: observation row, None if not found
+        '''
+        with self.lock:
+            tbl = self.table(dataset)
+            if tbl is None:
+                return None
+
+            return self.db.execute('SELECT ' + ', '.join(observation_columns) + ' FROM ' + tbl +
+                                   ' WHERE sample = ? AND slot = ?', (sample, slot)).fetchone()
+
+    ##############################
+    # format location as WKT
+    ##############################
+    @staticmethod
+    def geo_fix(row):
+        '''
+        Args:
+            row (tuple):    observation row
+
+        Returns:
+           str: WKT location
+        '''
+        observation = dict(zip(observation_columns, row))
+        if observation['geo'] is not None:
+            return observation['geo']
+
+        coords = [observation['lon'], observation['lat'], observation['alt']]
+        return 'POINT(' + ' '.join(repr(c) for c in coords if c is not None) + ')'
+
+###########################################
+# end of observation_store class
+###########################################
+
+################################################################################
+# Class to read a dataset's observations as RDF
+################################################################################
+
+
+class observation_view_store(read_store):
+    '''
+    sample instantiation,
+    store = observation_view_store(d_graph.store, obs_store, dataset, expand)
+    where,
+    1. store, the rdflib store holding the dataset graph
+    2. obs_store, observation_store holding the rows
+    3. dataset, the dataset, the one graph of the view
+    4. expand, expand(row, graph, first_store, node_id) writes the triples of
+       a row to graph, node_id(label) is the id of a node minted for it
+
+    Read only. The nodes minted for a row have ids naming the row, so a
+    lookup with a row node as subject or object expands that row only, other
+    lookups expand the rows a page at a time. Triples on nodes shared by the
+    rows (the observation collection's start and end times and sensors) are
+    kept in a small graph, built by refresh() from the rows added since it
+    last ran. The view reads the rows up to the last refresh().
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, store, obs_store, dataset, expand):
+        '''
+        Args:
+            store (rdflib Store):           store holding the dataset graph
+            obs_store (observation_store):  rows
+            dataset (URIRef):               dataset
+            expand (function):              row to triples
+        '''
+        super().__init__(store)
+        self.obs_store = obs_store
+        self.dataset = dataset
+        self.expand = expand
+        self.context = Graph(self, identifier=dataset)
+        self.store_context = Graph(store, identifier=dataset)
+        self.tbl = obs_store.dataset(dataset)['table']
+
+        # triples on shared nodes, row predicates and last row read
+        self.lock = threading.Lock()
+        self.shared = Graph()
+        self.row_predicates = set()
+        self.member_predicates = set()
+        self.first = None
+        self.last = None
+        self.row_size = 0
+
+        # recently expanded rows
+        self.row_triples = lru_cache(maxsize=view_rows)(self.expand_row)
+
+    ##########################
+    # nodes minted for rows
+    ##########################
+    def node_id(self, sample, slot, label):
+        '''
+        Args:
+            sample (int):   sample number
+            slot (int):     sensor number in sample
+            label (str):    node label in the store shapes
+
+        Returns:
+           str: node id, the same for every view of the row
+        '''
+        seed = '%s/%d/%d/%s' % (str(self.dataset), sample, slot, label)
+        return '%s-%d-%d-%s' % (self.tbl, sample, slot, uuid.uuid5(uuid.NAMESPACE_URL, seed).hex[:16])
+
+    def row_of(self, node):
+        '''
+        Args:
+            node (Node):    node to check
+
+        Returns:
+           tuple: (sample, slot) if a node minted for a row of the view
+        '''
+        match = row_node.search(str(node)) if node is not None else None
+        if match is None or match.group(1) != self.tbl:
+            return None
+        return int(match.group(2)), int(match.group(3))
+
+    ##########################
+    # expand a row
+    ##########################
+    def run_expand(self, row, graph):
+        '''
+        Args:
+            row (tuple):    observation row
+            graph (Graph):  graph to write to
+
+        Returns:
+           function: is a triple the row's, has a node minted for it
+        '''
+        sample, slot = row[:2]
+        self.expand(row, graph, sample == self.first, lambda label: self.node_id(sample, slot, label))
+
+        # return test
+        return lambda triple: self.row_of(triple[0]) == (sample, slot) or self.row_of(triple[2]) == (sample, slot)
+
+    def expand_row(self, row):
+        '''
+        Args:
+            row (tuple):    observation row
+
+        Returns:
+           tuple: triples with a node minted for the row
+        '''
+        graph = Graph()
+        rows = self.run_expand(row, graph)
+        return tuple(t for t in graph if rows(t))
+
+    ##########################
+    # read new rows
+    ##########################
+    def refresh(self):
+        '''
+        Adds the triples on shared nodes of the rows stored since the last
+        refresh.
+        '''
+        with self.lock:
+            for row in self.obs_store.scan(self.dataset, after=self.last):
+                if self.first is None:
+                    self.first = row[0]
+
+                # shared triples stay, the row's are dropped
+                rows = self.run_expand(row, self.shared)
+                row_triples = [t for t in self.shared if rows(t)]
+                for s, p, o in row_triples:
+                    self.row_predicates.add(p)
+                    if self.row_of(s) is None:
+                        self.member_predicates.add(p)
+                    self.shared.remove((s, p, o))
+
+                self.row_size = len(row_triples)
+                self.last = row[:2]
+
+    ##########################
+    # lookups
+    ##########################
+    def triples(self, triple_pattern, context=None):
+        identifier = getattr(context, 'identifier', context)
+        if identifier is not None and identifier != self.dataset:
+            return
+
+        s, p, o = triple_pattern
+        def matches(triple):
+            return all(q is None or q == t for q, t in zip(triple_pattern, triple))
+
+        # a row's nodes, that row
+        row = self.row_of(s) or self.row_of(o)
+        if row is not None:
+            if self.last is None or row > tuple(self.last):
+                return
+            row = self.obs_store.row(self.dataset, *row)
+            if row is None:
+                return
+            for triple in self.row_triples(row):
+                if matches(triple):
+                    yield triple, iter([self.context])
+            return
+
+        # shared and stored
+        with self.lock:
+            shared = list(self.shared.triples(triple_pattern))
+            last = self.last
+            scan = p is None or p in (self.row_predicates if s is None else self.member_predicates)
+            if s is not None and p is None:
+                scan = bool(self.member_predicates)
+        for triple in shared:
+            yield triple, iter([self.context])
+        shared = set(shared)
+        for triple, contexts in self.store.triples(triple_pattern, self.store_context):
+            if triple not in shared:
+                yield triple, iter([self.context])
+
+        # all rows
+        if not scan or last is None:
+            return
+        for row in self.obs_store.scan(self.dataset, last=last):
+            for triple in self.row_triples(row):
+                if matches(triple):
+                    yield triple, iter([self.context])
+
+    def triples_choices(self, triple, context=None):
+        return Store.triples_choices(self, triple, context)
+
+    def __len__(self, context=None):
+        # approximate, rows are not expanded to count them
+        rows = self.obs_store.dataset(self.dataset)['count']
+        return len(self.shared) + self.store.__len__(self.store_context) + rows * self.row_size
+
+    def contexts(self, triple=None):
+        if triple is None or any(True for t in self.triples(triple)):
+            yield self.context
+
+###########################################
+# end of observation_view_store class
+###########################################
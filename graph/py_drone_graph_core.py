@@ -22,16 +22,31 @@ import uuid
 import logging
 import fnmatch
 import glob
+import threading
+import time
 
 # RDFLIB
 import rdflib
 from rdflib.serializer import Serializer
 from rdflib import plugin, Graph, Literal, URIRef, BNode
-from rdflib.store import Store
-from rdflib.plugins.sparql.processor import processUpdate
-from SPARQLWrapper import SPARQLWrapper, JSON
+from rdflib.store import Store, TripleAddedEvent, TripleRemovedEvent
 from rdflib.graph import Graph, ConjunctiveGraph
 
+# my imports
+from graph.py_drone_graph_catalog import shape_catalog
+from graph.py_drone_graph_staging import graph_staging, staged_view, store_transaction
+from graph.py_drone_graph_cardinality import cardinality_tracker
+from graph.py_drone_graph_columnar import observation_store
+from graph.py_drone_graph_journal import journal_store
+from graph.py_drone_graph_results import result_cache
+from graph.py_drone_graph_queries import query_registry
+from graph.py_drone_graph_execution import query_executor
+from graph.py_drone_graph_profile import slow_query_log
+from graph.py_drone_graph_jobs import query_jobs
+from graph.py_drone_graph_changes import change_log
+from graph.py_drone_graph_describe import concise_description
+from graph.py_drone_graph_loader import graph_cache, file_manifest, file_hash, parse_files, snapshot_triples
+
 # namespaces
 from rdflib.namespace import CSVW, DC, DCAT, DCTERMS, DOAP, FOAF, ODRL2, ORG, OWL, \
     PROF, PROV, RDF, RDFS, SDO, SH, SKOS, SSN, TIME, \
@@ -67,12 +82,29 @@ ontology_db_file = "ttl/base.ttl"
 # extra shape files
 extra_shape_file = "ttl/flight_shapes.ttl"
 
+# files holding each store type, less the db_location
+store_files = {'sqlite': ['.sqlite'], 'journal': ['.nq', '.journal', '.journal.old']}
+
 # I have a unique ID that some nice person setup for me (probably Chris)
 ontology_myID = "MjlmNmVmZTAtNGU1OS00N2I4LWI3MzYtODZkMDQ0MTRiNzcxCg=="
 
 # setup logging ################################################################
 logger = logging.getLogger(__name__)
 
+##############################
+# does the store exist?
+##############################
+def store_exists(graph_location, store_type='sqlite'):
+    '''
+    Args:
+        graph_location (str):   db_location from the ini file
+        store_type (str):       store from the ini file, sqlite or journal
+
+    Returns:
+       bool: True if any of the store files exist
+    '''
+    return any(os.path.isfile(graph_location + ext) for ext in store_files.get(store_type, ['.sqlite']))
+
 ################################################################################
 # Class to house rdf graph core functions for drone
 ################################################################################
@@ -131,6 +163,9 @@ class py_drone_graph_core:
         Args:
             graph_dict (dict.):     configuration data
         '''
+        # time the phases, for the startup report
+        start_time = time.time()
+
         # get config for graph name, physical db location and it's format
         # added extraction of load_graph_file
         self.graph_name = graph_dict.get('name', ontology_db)
@@ -156,24 +191,145 @@ class py_drone_graph_core:
         # added file reload startegy
         graph_file_reload = graph_dict.get('file_reload', 'False')
 
+        # kept for reloads
+        self.load_graph_file = load_graph_file
+        self.graph_file_format = graph_file_format
+        self.shacl_filename = shacl_filename
+        self.flight_shacl_filename = flight_shacl_filename
+        self.shacl_constraint_filename = shacl_constraint_filename
+
+        # hot tier for the store path, flushed by size, age or end_store
+        hot_tier = graph_dict.get('hot_tier', 'False')
+        if hot_tier == 'True':
+            self.hot_tier = graph_staging()
+        else:
+            self.hot_tier = None
+        self.hot_tier_size = int(graph_dict.get('hot_tier_size', '5000'))
+        self.hot_tier_period = float(graph_dict.get('hot_tier_period', '30'))
+        self.hot_tier_time = time.time()
+        self.hot_tier_lock = threading.RLock()
+
+        # property counts for nodes created by the store path
+        self.cardinality = cardinality_tracker()
+
+        # keep observations in columns rather than triples?
+        obs_store = graph_dict.get('observation_store', 'False')
+        if obs_store == 'False':
+            self.observation_store = None
+        else:
+            obs_location = graph_dict.get('observation_db_location', graph_location + '_observations')
+            self.observation_store = observation_store(obs_location + '.sqlite')
+
+        # RDF view stores of the columnar datasets last queried, by dataset
+        self.observation_views = {}
+        self.observation_view_lock = threading.Lock()
+
+        # known observation collections (to their type) and their graphs,
+        # entries dropped when the store changes them
+        self.collection_index = {}
+        self.graph_index = {}
+
+        # store type, sqlite or journal
+        store_type = graph_dict.get('store', 'sqlite')
+
+        # parsed file snapshots, keyed by file contents
+        load_cache = graph_dict.get('load_cache', 'True')
+        if load_cache == 'False':
+            self.graph_cache = None
+        else:
+            cache_location = graph_dict.get('load_cache_location', graph_location + '_cache')
+            self.graph_cache = graph_cache(cache_location)
+
+        # processes parsing files, default one per core
+        load_workers = int(graph_dict.get('load_workers', '0'))
+        self.load_workers = load_workers if load_workers > 0 else None
+
+        # files loaded, their hashes and graphs
+        self.file_manifest = file_manifest(graph_location + '_manifest.json')
+
         # does the db exist?
         reload_db = True
-        if graph_file_reload == 'False' and os.path.isfile(graph_location + '.sqlite'):
+        if graph_file_reload != 'True' and store_exists(graph_location, store_type):
             reload_db = False
 
         # check any folders exist
         os.makedirs(os.path.dirname(graph_location), exist_ok=True)
 
-        # store location
-        uri = Literal("sqlite:///%(here)s/%(loc)s.sqlite" %
-                      {"here": os.getcwd(), "loc": graph_location})
-
         # create store
         store_ident = URIRef('store_' + self.graph_name)
-        self.store = plugin.get("SQLAlchemy", Store)(identifier=store_ident)
+        if store_type == 'journal':
+            # in memory, changes journaled to file
+            compact = int(graph_dict.get('journal_compact', '100000'))
+            sync_period = float(graph_dict.get('journal_sync', '0'))
+            self.store = journal_store(identifier=store_ident, compact=compact, sync_period=sync_period)
+
+            # replays snapshot and journal
+            self.store.open(graph_location, create=True)
+        else:
+            # store location
+            uri = Literal("sqlite:///%(here)s/%(loc)s.sqlite" %
+                          {"here": os.getcwd(), "loc": graph_location})
+
+            self.store = plugin.get("SQLAlchemy", Store)(identifier=store_ident)
+
+            # was self.g.open
+            self.store.open(uri, create=True)
 
-        # was self.g.open
-        self.store.open(uri, create=True)
+        # compiled shape graphs, dropped when their graph changes
+        self.shape_catalog = shape_catalog(self.store)
+
+        # query results, until the store changes
+        query_cache = graph_dict.get('query_cache', 'True')
+        if query_cache == 'False':
+            self.result_cache = None
+        else:
+            self.result_cache = result_cache(self.store, int(graph_dict.get('query_cache_size', '128')),
+                                             int(graph_dict.get('query_cache_bytes', '1000000')))
+
+        # graphs queried when a query names none, else all
+        self.default_dataset = graph_dict.get('default_dataset', '').split()
+
+        # named queries, prepared on first use
+        self.named_queries = query_registry()
+
+        # log slow queries?
+        slow_log = None
+        slow_query_time = float(graph_dict.get('slow_query_time', '0'))
+        if slow_query_time > 0:
+            slow_log = slow_query_log(graph_dict.get('slow_query_log', graph_location + '_slow_queries.log'),
+                                      slow_query_time)
+
+        # queries run on a worker pool, within limits
+        self.query_executor = query_executor(int(graph_dict.get('query_workers', '2')),
+                                             float(graph_dict.get('query_timeout', '30')),
+                                             int(graph_dict.get('query_max_rows', '100000')),
+                                             int(graph_dict.get('query_max_scan', '10000000')),
+                                             slow_log,
+                                             int(graph_dict.get('stream_workers', '4')),
+                                             float(graph_dict.get('stream_timeout', '600')))
+
+        # long queries run as jobs, results kept on disk
+        self.query_jobs = query_jobs(graph_dict.get('job_location', graph_location + '_jobs'),
+                                     int(graph_dict.get('job_max_bytes', '100000000')),
+                                     int(graph_dict.get('job_workers', '1')),
+                                     float(graph_dict.get('job_timeout', '3600')))
+
+        # changes to the store, for copies to follow
+        log_changes = graph_dict.get('change_log', 'True')
+        if log_changes == 'False':
+            self.change_log = None
+        else:
+            self.change_log = change_log(self.store,
+                                         graph_dict.get('change_log_location', graph_location + '_changes.sqlite'),
+                                         int(graph_dict.get('change_log_max', '1000000')))
+
+        # file triples other writes assert too, kept by a reload
+        self.file_loader = None
+        self.store.dispatcher.subscribe(TripleAddedEvent, self.file_triple_added)
+
+        # indexed collections and graphs, dropped when they change
+        self.store.dispatcher.subscribe(TripleAddedEvent, self.index_changed)
+        self.store.dispatcher.subscribe(TripleRemovedEvent, self.index_changed)
 
         # and ConjunctiveGraph
         self.g = ConjunctiveGraph(self.store)
@@ -211,80 +367,369 @@ class py_drone_graph_core:
         self.g.namespace_manager.bind('geo', GEO)
         self.g.namespace_manager.bind('rdfg', RDFG)
 
+        # seconds by phase
+        self.startup_times = {'graph open': time.time() - start_time}
+        start_time = time.time()
+
         # Load graph?
         if load_graph_file and not self.files_loaded and reload_db:
-            # folder or file?
-            if os.path.isdir(load_graph_file):
-
-                # get the list of files
-                files_in_graph_folder = os.walk(load_graph_file)
-                print("Folder provided for import.")
-                # loop
-                for (dirpath, dirnames, filenames) in files_in_graph_folder:
-                    for file in filenames:
-                        file_path = os.path.join(dirpath, file)
-                        # each file if turtle
-                        if os.path.splitext(file_path)[-1].lower() == "." + graph_file_format:
-                            if os.path.isfile(file_path):
-                                print("file", file_path)
-                                self.files_loaded = True
-                                # load the individual file
-                                try:
-                                    # test for shacl files, seperate graph
-                                    if fnmatch.fnmatch(os.path.basename(file_path), shacl_filename):
-                                        self.g2.load(
-                                            file_path, format=graph_file_format, publicID=self.my_host_name)
-                                    else:
-                                        self.g1.load(
-                                            file_path, format=graph_file_format, publicID=self.my_host_name)
-                                except Exception as ex:
-                                    print("Could not load graph file: " + str(ex))
+            # start a new manifest
+            self.file_manifest.clear()
+
+            files = self.source_files()
+            for file_path, graph in files:
+                print("file", file_path, graph.identifier)
+                self.files_loaded = True
+
+            # parse, then add, not logged as changes
+            snapshots = self.file_snapshots([(file_path, graph, None) for file_path, graph in files])
+            if self.change_log is not None:
+                self.change_log.recording = False
+            self.file_loader = threading.get_ident()
+            try:
+                print("Triples loaded", self.add_snapshots(snapshots))
+            finally:
+                self.file_loader = None
+                if self.change_log is not None:
+                    self.change_log.recording = True
+                    self.change_log.reset()
+
+            self.file_manifest.save()
+            self.prune_cache()
+
+            # turn off pyshacl if no seperate shape graph
+            if os.path.isfile(load_graph_file):
+                self.pyshacl = False
+
+        # or just the changes?
+        elif load_graph_file and graph_file_reload == 'Changed':
+            try:
+                print("Files changed", self.reload_files())
+            except Exception as ex:
+                print("Could not reload graph files: " + str(ex))
+
+        self.startup_times.update({'file load': time.time() - start_time})
+
+        # flush the hot tier when due, without waiting for the next sample
+        if self.hot_tier is not None:
+            threading.Thread(target=self.hot_tier_flusher, daemon=True).start()
+
+    ##############################
+    # files to load, and graphs
+    ##############################
+    def source_files(self):
+        '''
+        Returns:
+           list: (file path, graph) for the files from the [GRAPH] file and
+                 flight_shacl_filename settings
+        '''
+        files = []
+
+        # folder or file?
+        if os.path.isdir(self.load_graph_file):
+            # walk folder
+            for (dirpath, dirnames, filenames) in os.walk(self.load_graph_file):
+                for file in filenames:
+                    file_path = os.path.join(dirpath, file)
+                    # each file if turtle
+                    if os.path.splitext(file_path)[-1].lower() == "." + self.graph_file_format:
+                        if os.path.isfile(file_path):
+                            # test for shacl files, seperate graph
+                            if fnmatch.fnmatch(os.path.basename(file_path), self.shacl_filename):
+                                files.append((file_path, self.g2))
+                            else:
+                                files.append((file_path, self.g1))
+
+        elif os.path.isfile(self.load_graph_file):
+            files.append((self.load_graph_file, self.g1))
+
+        # additional config shape files, folder?
+        if os.path.isdir(self.flight_shacl_filename):
+            file_list = glob.glob(self.flight_shacl_filename + self.shacl_constraint_filename)
+            for fn in sorted(file_list):
+                # extract target graph name
+                pos = fn.find(self.shacl_constraint_filename[1:]) - 1
+                pos2 = fn.rfind('/') + 1
+
+                # set name
+                g_name = fn[pos2:pos]
+
+                # shape graph
+                files.append((fn, Graph(self.store, identifier=self.BASE.term(g_name))))
+
+        # stand alone?
+        elif os.path.isfile(self.flight_shacl_filename):
+            files.append((self.flight_shacl_filename, self.g_config))
+
+        # return list
+        return files
+
+    ##############################
+    # get snapshots of files
+    ##############################
+    def file_snapshots(self, files):
+        '''
+        Snapshots come from the load cache, files not cached are parsed in
+        parallel, load_workers processes.
+
+        Args:
+            files (list):   (file path, graph, content hash or None)
+
+        Returns:
+           list: (file path, graph, content hash, snapshot) of the files
+                 parsed, failures are reported and dropped
+        '''
+        snapshots = []
+        for file_path, graph, content_hash in files:
+            if content_hash is None:
+                content_hash = file_hash(file_path)
+
+            # unchanged file?
+            snapshot = None
+            if self.graph_cache is not None:
+                snapshot = self.graph_cache.get(content_hash, self.graph_file_format, self.my_host_name)
+            snapshots.append([file_path, graph, content_hash, snapshot])
+
+        # parse the rest
+        parse = [f for f in snapshots if f[3] is None]
+        results = parse_files([f[0] for f in parse], self.graph_file_format, self.my_host_name, self.load_workers)
+        for f, snapshot in zip(parse, results):
+            if isinstance(snapshot, Exception):
+                print("Could not load graph file: " + f[0] + ", " + str(snapshot))
+                continue
+
+            f[3] = snapshot
+            if self.graph_cache is not None:
+                self.graph_cache.put(f[2], self.graph_file_format, self.my_host_name, snapshot)
+
+        # return parsed
+        return [tuple(f) for f in snapshots if f[3] is not None]
+
+    ##############################
+    # add snapshots to graphs
+    ##############################
+    def add_snapshots(self, snapshots):
+        '''
+        Args:
+            snapshots (list):   (file path, graph, content hash, snapshot)
+
+        Returns:
+           int: number of triples added
+        '''
+        count = 0
+        for file_path, graph, content_hash, snapshot in snapshots:
+            # prefixes from the file, as Graph.load
+            for prefix, namespace in snapshot['namespaces']:
+                graph.bind(prefix, namespace)
+
+            # record
+            self.file_manifest.update(file_path, graph.identifier, content_hash)
+            count += len(snapshot['triples']) // 3
+
+        # one bulk add, all graphs
+        self.store.addN((s, p, o, graph) for file_path, graph, content_hash, snapshot in snapshots
+                        for s, p, o in snapshot_triples(snapshot))
+
+        # return count
+        return count
+
+    ##############################
+    # reload changed files
+    ##############################
+    def reload_files(self):
+        '''
+        Re-imports the files added, changed or removed since they were
+        loaded. Triples of a changed or removed file are removed from its
+        graph unless another loaded file of the graph holds them or another
+        write asserted them too, the rest of the store is untouched. The
+        removes and adds commit in one store transaction.
 
+        Returns:
+           dict.: 'added', 'changed' and 'removed' file lists
+
+        Raises:
+            Exception if there is no load cache to get old file contents from
+        '''
+        if self.graph_cache is None:
+            raise Exception("reload requires load_cache")
+
+        manifest = self.file_manifest
+        changes = {'added': [], 'changed': [], 'removed': []}
+
+        # find changes
+        loads = []
+        current = {}
+        for file_path, graph in self.source_files():
+            current.update({file_path: graph})
+            if manifest.unchanged(file_path, graph.identifier):
+                continue
+
+            # touched, but same contents?
+            content_hash = file_hash(file_path)
+            entry = manifest.files.get(file_path, None)
+            if entry is not None and entry['hash'] == content_hash and entry['graph'] == str(graph.identifier):
+                manifest.update(file_path, graph.identifier, content_hash)
+                continue
+
+            changes['changed' if entry is not None else 'added'].append(file_path)
+            loads.append((file_path, graph, content_hash))
+
+        changes['removed'] = [f for f in manifest.files if f not in current]
+
+        # nothing to do?
+        if not loads and not changes['removed']:
+            manifest.save()
+            return changes
+
+        # old contents, by graph, and the triples to keep, from the files that
+        # stay and the new contents
+        replaced = set(changes['changed'] + changes['removed'])
+        old = {}
+        keep = {}
+        removes = {}
+        for file_path, entry in list(manifest.files.items()):
+            snapshot = self.graph_cache.get(entry['hash'], self.graph_file_format, self.my_host_name)
+            if snapshot is None:
+                if file_path in replaced:
+                    logger.error('no cached contents for %s, old triples not removed.' % file_path)
+                continue
+
+            triples = set(snapshot_triples(snapshot))
+            old.setdefault(entry['graph'], set()).update(triples)
+            if file_path in replaced:
+                removes.setdefault(entry['graph'], set()).update(triples)
             else:
-                print("File provided for import.")
-                if os.path.isfile(load_graph_file):
-                    self.files_loaded = True
-                    # load the file
-                    try:
-                        self.g1.load(load_graph_file, format=graph_file_format, publicID=self.my_host_name)
-                    except Exception as ex:
-                        print("Could not load graph file: " + str(ex))
-
-                    # turn off pyshacl if no seperate shape graph
-                    self.pyshacl = False
-
-            # additional config shape files, folder?
-            if os.path.isdir(flight_shacl_filename):
-                file_list = glob.glob(flight_shacl_filename + shacl_constraint_filename)
-                for fn in file_list:
-                    # extract target graph name
-                    pos = fn.find(shacl_constraint_filename[1:]) - 1
-                    pos2 = fn.rfind('/') + 1
-
-                    # set name
-                    g_name = fn[pos2:pos]
-                    print("file", fn, g_name)
-
-                    # create graph
-                    # vars for config shape graph context
-                    identn = self.BASE.term(g_name)
-
-                    # create and load shape graph
-                    self.g_tmp = Graph(self.store, identifier=identn)
-
-                    # try to create
-                    try:
-                        self.g_tmp.load(fn, format=graph_file_format, publicID=self.my_host_name)
-                    except Exception as ex:
-                        print("Could not load shape file: " + str(ex))
-
-            # stand alone?
-            elif os.path.isfile(flight_shacl_filename):
-                print("file", flight_shacl_filename)
-                try:
-                    self.g_config.load(flight_shacl_filename, format=graph_file_format, publicID=self.my_host_name)
-                except Exception as ex:
-                    print("Could not load shape file: " + str(ex))
+                keep.setdefault(entry['graph'], set()).update(triples)
+
+        snapshots = self.file_snapshots(loads)
+        for file_path, graph, content_hash, snapshot in snapshots:
+            triples = set(snapshot_triples(snapshot))
+            keep.setdefault(str(graph.identifier), set()).update(triples)
+
+            # new file triples already written by something else
+            for triple in triples - old.get(str(graph.identifier), set()):
+                if triple in graph:
+                    manifest.assert_triple(graph.identifier, triple)
+
+        # swap contents in one transaction
+        self.file_loader = threading.get_ident()
+        try:
+            with store_transaction(self.store):
+                for identifier, triples in removes.items():
+                    graph = Graph(self.store, identifier=URIRef(identifier))
+                    triples = triples - keep.get(identifier, set()) - manifest.asserted_triples(identifier)
+                    for triple in triples:
+                        self.store.remove(triple, context=graph)
+
+                for file_path in replaced:
+                    manifest.remove(file_path)
+                self.add_snapshots(snapshots)
+        except Exception:
+            # as it was
+            self.file_manifest = file_manifest(manifest.location)
+            raise
+        finally:
+            self.file_loader = None
+
+        manifest.save()
+
+        # old contents no longer needed
+        self.prune_cache()
+
+        # shapes and indexed nodes may have changed
+        self.shape_catalog.invalidate()
+        self.cardinality.reset()
+        self.collection_index.clear()
+        self.graph_index.clear()
+
+        logger.info('files reloaded: %s.' % str(changes))
+
+        # return changes
+        return changes
+
+    ########################################
+    # file triple written by something else
+    ########################################
+    def file_triple_added(self, event):
+        '''
+        Records a triple another write adds to a file graph when a file has
+        it already, so a reload of the file keeps it.
+
+        Args:
+            event (rdflib Event):   TripleAddedEvent, dispatched before the
+                                    store adds the triple
+        '''
+        if self.file_loader == threading.get_ident():
+            return
+
+        context = getattr(event, 'context', None)
+        identifier = getattr(context, 'identifier', context)
+        if identifier is None or str(identifier) not in self.file_manifest.graphs():
+            return
+
+        # already there, from a file?
+        if any(True for t in self.store.triples(event.triple, Graph(self.store, identifier=identifier))):
+            if self.file_manifest.assert_triple(identifier, event.triple):
+                self.file_manifest.save()
+
+    ###########################################
+    # store event handler, drop changed index
+    ###########################################
+    def index_changed(self, event):
+        '''
+        Drops the collections whose type changes, and the graphs cleared,
+        from collection_index and graph_index.
+
+        Args:
+            event (rdflib Event):   TripleAddedEvent or TripleRemovedEvent
+        '''
+        # nothing indexed, nothing to do (store hot path)
+        if not self.collection_index and not self.graph_index:
+            return
+
+        s, p, o = event.triple
+        removed = isinstance(event, TripleRemovedEvent)
+
+        # collection types
+        if p is None or p == RDF.type:
+            if s is None:
+                self.collection_index.clear()
+            elif s in self.collection_index:
+                collection_type = self.collection_index.get(s, None)
+                if (removed and (o is None or o == collection_type)) or (not removed and o != collection_type):
+                    self.collection_index.pop(s, None)
+
+        # graphs, emptied by removing all of their subjects
+        if not removed or s is not None:
+            return
+
+        context = getattr(event, 'context', None)
+        identifier = getattr(context, 'identifier', context)
+        if identifier is None:
+            self.graph_index.clear()
+            return
+        for key, graph in list(self.graph_index.items()):
+            if graph.identifier == identifier:
+                self.graph_index.pop(key, None)
+
+    ###################################
+    # drop snapshots of unloaded files
+    ###################################
+    def prune_cache(self):
+        '''
+        Returns:
+           int: number of snapshots removed
+        '''
+        if self.graph_cache is None:
+            return 0
+
+        count = self.graph_cache.prune([entry['hash'] for entry in self.file_manifest.files.values()],
+                                       self.graph_file_format, self.my_host_name)
+        if count:
+            logger.info('graph cache pruned: %d snapshots.' % count)
+
+        # return count
+        return count
 
     #############
     # create uuid
@@ -292,11 +737,77 @@ class py_drone_graph_core:
     def generate_uuid(self):
         return base64.urlsafe_b64encode(uuid.uuid4().bytes)[:-2].decode('utf-8')
 
+    ####################################
+    # flush hot tier to persistent store
+    ####################################
+    def flush_store(self):
+        '''
+        Returns:
+           int: number of triples flushed
+        '''
+        count = 0
+        if self.hot_tier is not None:
+            with self.hot_tier_lock:
+                self.hot_tier_time = time.time()
+                count = self.hot_tier.commit()
+
+        # and their changes
+        if self.change_log is not None:
+            self.change_log.commit()
+
+        # return count
+        return count
+
+    ##############################
+    # flush the hot tier when due
+    ##############################
+    def hot_tier_flusher(self):
+        '''
+        Runs in the background, checks the hot tier a few times a period.
+        '''
+        while True:
+            time.sleep(max(self.hot_tier_period / 4, 0.1))
+            try:
+                with self.hot_tier_lock:
+                    if self.hot_tier.graphs and self.hot_tier_due():
+                        self.flush_store()
+            except Exception as ex:
+                logger.error('hot tier flush failed: %s.' % str(ex))
+
+    ##############################
+    # graph reads should use
+    ##############################
+    def read_graph(self):
+        '''
+        Returns:
+           ConjunctiveGraph: the store, with any hot tier writes not yet
+                             flushed
+        '''
+        if self.hot_tier is None:
+            return self.g
+
+        # return view
+        return staged_view(self.g, self.hot_tier, self.hot_tier_lock)
+
+    ##############################
+    # is the hot tier due a flush?
+    ##############################
+    def hot_tier_due(self):
+        '''
+        Returns:
+           bool: True if hot tier is over size or age limit
+        '''
+        if len(self.hot_tier) >= self.hot_tier_size:
+            return True
+
+        return time.time() - self.hot_tier_time >= self.hot_tier_period
+
     ######################
     # dump graph as turtle
     ######################
     def dump_graph(self, id):
-        graph = self.g.get_context(self.BASE.term(id))
+        # include hot tier
+        graph = self.read_graph().get_context(self.BASE.term(id))
         if graph:
             return graph.serialize(format="turtle", base=self.my_host_name)
         else:
@@ -310,7 +821,7 @@ class py_drone_graph_core:
             '@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n' + \
             '@prefix rdflib: <http://rdflib.net/projects#> .\n\n'
         # loop over graphs and append
-        for c in self.g.contexts():
+        for c in self.read_graph().contexts():
             ret = ret + str(c) + '\n'
 
         # return it
@@ -322,58 +833,45 @@ class py_drone_graph_core:
     # on ld.landrs.org OR the drone.
     # Also test existance.
     ###########################################
-    def find_node_from_uuid(self, uuid, id_type=None):
+    def find_node_from_uuid(self, uuid, id_type=None, graph=None):
         '''
         Args:
             uuid (str):    uuid to find
+            graph (Graph): optional, graph to look in, else the store
 
         Returns:
            URIRef: node associated with uuid
         '''
+        if graph is None:
+            graph = self.g
+
         # check drone definition exists and if it is local or on ld.landrs.org
         id_node = LDLBASE.term(uuid)
-        if not (id_node, RDF.type, id_type) in self.g:
+        if not (id_node, RDF.type, id_type) in graph:
             # from myself?
             id_node = self.BASE.term(uuid)
-            if not (id_node, RDF.type, id_type) in self.g:
+            if not (id_node, RDF.type, id_type) in graph:
                 # return info
                 return None
 
         # if here, exists and node resolved
         return id_node
 
-    ##########################################
-    # recursive drill down through blank nodes
-    ##########################################
-    def blank_node_recursion(self, blnk, grph):
-        # check blank
-        if isinstance(blnk, BNode):
-            # get nodes
-            for sn, pn, on in self.g.triples((blnk, None, None)):
-                grph.add((sn, pn, on))
-                # recurse
-                self.blank_node_recursion(on, grph)
-
     #########################################
     # get graph with node and its blank nodes
     #########################################
-    def get_graph_with_node(self, id_node):
+    def get_graph_with_node(self, id_node, graph=None):
         '''
         Args:
             id_node (str): node id to put into graph
+            graph (Graph): optional, graph to describe from, else the store
 
         Returns:
-           graph: graph of id_node
+           graph: graph of id_node, its concise bounded description
         '''
-        node_graph = Graph()
-        # get id's triples
-        for s, p, o in self.g.triples((id_node, None, None)):
-            node_graph.add((s, p, o))
-            # if associated blank not, get its tripples
-            self.blank_node_recursion(o, node_graph)
-
-        # return the new graph
-        return node_graph
+        if graph is None:
+            graph = self.g
+        return concise_description(graph, [id_node])
 
     ##########################
     # get triples for an id
@@ -386,31 +884,34 @@ class py_drone_graph_core:
         Returns:
            dict.: query result
         '''
+        # include hot tier
+        read_graph = self.read_graph()
+
         # dictionary
         id_data = {}
 
         # is the id a local graph?
         # if so return the graph as turtle
-        g = self.g.get_context(self.BASE.term(id))
+        g = read_graph.get_context(self.BASE.term(id))
         if g:
             # return info
             return g.serialize(format="turtle", base=self.my_host_name)  # id_data
 
         # check drone definition exists and if it is local or on ld.landrs.org
         # we will support ld.landrs.org ids due to potential connectivity problems
-        id_node = self.find_node_from_uuid(id)
+        id_node = self.find_node_from_uuid(id, graph=read_graph)
         if not id_node:
             # return info
             return {"status": "id: " + id + " not found."}
 
         if not json:
-            node_graph = self.get_graph_with_node(id_node)
+            node_graph = self.get_graph_with_node(id_node, read_graph)
 
             # return info
             return node_graph.serialize(format="turtle", base=self.my_host_name)  # id_data
         else:
             # get id's triples
-            for s, p, o in self.g.triples((id_node, None, None)):
+            for s, p, o in read_graph.triples((id_node, None, None)):
                 print("{} is a {}".format(p, o))
                 id_data.update({p: o})
 
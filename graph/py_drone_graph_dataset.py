@@ -0,0 +1,199 @@
+'''
+SPARQL datasets for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+By default a query's default graph is the union of every graph in the store:
+the ontology, the shapes and every flight's data. A dataset names the graphs
+a query sees instead, from the default-graph-uri and named-graph-uri
+parameters of the SPARQL protocol, else the query's FROM and FROM NAMED,
+else the configured default_dataset. The query reads the store through a
+dataset_store, which looks up the default graph pattern in each of the
+default graphs and answers GRAPH patterns from the named graphs only, so
+the graphs outside the dataset are not read.
+'''
+
+# Imports ######################################################################
+import logging
+
+# RDFLIB
+from rdflib import URIRef
+from rdflib.graph import Graph, ConjunctiveGraph
+
+# my imports
+from graph.py_drone_graph_execution import read_store
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+##############################
+# dataset of a query
+##############################
+def query_dataset(prepared, protocol=None, default_dataset=None):
+    '''
+    Removes the FROM and FROM NAMED of the query, rdflib would load them
+    from the web.
+
+    Args:
+        prepared (rdflib Query):    prepared query
+        protocol (dict.):           optional, 'default' and 'named' lists of
+                                    graph IRIs from the request
+        default_dataset (list):     optional, default graph IRIs for queries
+                                    naming none
+
+    Returns:
+       tuple: default graph IRIs and named graph IRIs, None for all graphs
+    '''
+    main = prepared.algebra
+    clauses = main.datasetClause or []
+    main['datasetClause'] = None
+
+    # protocol, then query
+    protocol = protocol or {}
+    if protocol.get('default', None) or protocol.get('named', None):
+        default = protocol.get('default', None) or []
+        named = protocol.get('named', None) or []
+    elif clauses:
+        default = [clause['default'] for clause in clauses if 'default' in clause]
+        named = [clause['named'] for clause in clauses if 'named' in clause]
+    elif default_dataset:
+        # named graphs still all there
+        return [URIRef(g) for g in default_dataset], None
+    else:
+        return None, None
+
+    # return IRIs
+    return [URIRef(g) for g in default], [URIRef(g) for g in named]
+
+##############################
+# dataset over a store
+##############################
+def dataset_graph(graph, default=None, named=None):
+    '''
+    Args:
+        graph (ConjunctiveGraph):   graph over the store
+        default (list):             default graph IRIs, None for all
+        named (list):               named graph IRIs, None for all
+
+    Returns:
+       ConjunctiveGraph: the dataset
+    '''
+    identifier = graph.default_context.identifier
+    store = dataset_store(graph.store, identifier, default, named)
+
+    # return dataset
+    return ConjunctiveGraph(store, identifier=identifier)
+
+################################################################################
+# Class to read a dataset of a store
+################################################################################
+
+
+class dataset_store(read_store):
+    '''
+    sample instantiation,
+    store = dataset_store(d_graph.store, d_graph.g.default_context.identifier,
+                          [flight_graph], [])
+    where,
+    1. default_identifier, identifier of the dataset's default graph, looked
+       up as the union of the default graphs as is context None
+    2. default, graphs merged as the default graph, None for all
+    3. named, graphs GRAPH patterns see, None for all
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, store, default_identifier, default=None, named=None):
+        '''
+        Args:
+            store (rdflib Store):       store to read
+            default_identifier (Node):  identifier of the default graph
+            default (list):             default graph IRIs, None for all
+            named (list):               named graph IRIs, None for all
+        '''
+        super().__init__(store)
+        self.default_identifier = default_identifier
+        self.default = default
+        self.named = None if named is None else set(named)
+
+    ##########################
+    # graphs for a context
+    ##########################
+    def graphs(self, context):
+        '''
+        Args:
+            context (Graph):    context looked up, None for the default graph
+
+        Returns:
+           list: graph IRIs, None for the whole store
+        '''
+        identifier = None if context is None else context.identifier
+        if identifier is None or identifier == self.default_identifier:
+            return self.default
+
+        # a named graph, if in the dataset
+        if self.named is None or identifier in self.named:
+            return [identifier]
+        return []
+
+    ##########################
+    # lookup
+    ##########################
+    def triples(self, triple_pattern, context=None):
+        return self.merge(self.store.triples, triple_pattern, context)
+
+    def triples_choices(self, triple, context=None):
+        return self.merge(self.store.triples_choices, triple, context)
+
+    ##########################
+    # lookup in each graph
+    ##########################
+    def merge(self, lookup, triple_pattern, context):
+        '''
+        Args:
+            lookup (callable):      store triples or triples_choices
+            triple_pattern (tuple): pattern looked up
+            context (Graph):        context looked up, None for the default
+
+        Returns:
+           generator: triples and their contexts, as lookup
+        '''
+        graphs = self.graphs(context)
+        if graphs is None:
+            for triple in lookup(triple_pattern, None):
+                yield triple
+            return
+
+        # a merge is a set
+        seen = set() if len(graphs) > 1 else None
+
+        for g in graphs:
+            for triple, contexts in lookup(triple_pattern, Graph(self.store, identifier=g)):
+                if seen is not None:
+                    if triple in seen:
+                        continue
+                    seen.add(triple)
+                yield triple, contexts
+
+    def __len__(self, context=None):
+        graphs = self.graphs(context)
+        if graphs is None:
+            return self.store.__len__(None)
+        return sum(self.store.__len__(Graph(self.store, identifier=g)) for g in graphs)
+
+    def contexts(self, triple=None):
+        if self.named is None:
+            for context in super().contexts(triple):
+                yield context
+            return
+
+        # the named graphs, holding the triple
+        for g in self.named:
+            if triple is None or any(True for t in self.store.triples(triple, Graph(self.store, identifier=g))):
+                yield Graph(self, identifier=g)
+
+###########################################
+# end of dataset_store class
+###########################################
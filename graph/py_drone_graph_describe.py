@@ -0,0 +1,152 @@
+'''
+SPARQL DESCRIBE for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+A node is described by its concise bounded description: the triples with
+the node as subject and, for each blank node object, the triples with that
+blank node as subject, and so on. concise_description builds it breadth
+first, a level of blank nodes at a time, looking up all the subjects of a
+level with one triples_choices call (one SQL statement per few hundred
+subjects with rdflib-sqlalchemy) rather than a lookup per node. Blank nodes
+already described are not expanded again, so cycles end.
+
+DESCRIBE queries name IRIs, variables bound by a WHERE clause, or * for all
+of its variables. rdflib does not evaluate DESCRIBE, prepare_describe takes
+the described terms from the parsed query and the algebra of its WHERE.
+'''
+
+# Imports ######################################################################
+import logging
+import re
+
+# RDFLIB
+from rdflib import BNode, Literal, Variable
+from rdflib.graph import Graph
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# DESCRIBE after any prologue and comments
+describe_keyword = re.compile(r'^(?:\s+|#[^\n]*|BASE\s*<[^>]*>|PREFIX\s+[^\s:]*:\s*<[^>]*>)*DESCRIBE\b', re.IGNORECASE)
+
+##############################
+# is it a DESCRIBE?
+##############################
+def is_describe(query):
+    '''
+    Args:
+        query (str):    sparql query
+
+    Returns:
+       bool: True for a DESCRIBE query
+    '''
+    return describe_keyword.match(query) is not None
+
+##############################
+# concise bounded description
+##############################
+def concise_description(graph, nodes, description=None):
+    '''
+    Args:
+        graph (Graph):          graph to read, ConjunctiveGraph for all
+        nodes (list):           nodes to describe
+        description (Graph):    optional, graph to add the triples to
+
+    Returns:
+       Graph: the descriptions of the nodes
+    '''
+    if description is None:
+        description = Graph()
+
+    # blank nodes seen, and subjects of the next lookup
+    seen = set(nodes)
+    level = list(seen)
+
+    while level:
+        expand = []
+        for s, p, o in graph.triples_choices((level, None, None)):
+            description.add((s, p, o))
+
+            # blank node, once
+            if isinstance(o, BNode) and o not in seen:
+                seen.add(o)
+                expand.append(o)
+
+        level = expand
+
+    # return graph
+    return description
+
+##############################
+# parse a DESCRIBE query
+##############################
+def prepare_describe(query):
+    '''
+    Args:
+        query (str):    sparql DESCRIBE query
+
+    Returns:
+       tuple: rdflib Query for the WHERE clause (an empty pattern if none)
+              and the described IRIs and variables, None for *
+
+    Raises:
+        Exception if not a DESCRIBE query
+    '''
+    # loaded on first use
+    from rdflib.plugins.sparql.parser import parseQuery
+    from rdflib.plugins.sparql.algebra import translateQuery
+    from rdflib.plugins.sparql.parserutils import CompValue
+
+    tree = parseQuery(query)
+    main = tree[1]
+    if main.name != 'DescribeQuery':
+        raise Exception("not a DESCRIBE query")
+
+    # DESCRIBE <iri> is DESCRIBE <iri> WHERE {}
+    if 'where' not in main or main['where'] is None:
+        main['where'] = CompValue('GroupGraphPatternSub', part=[])
+
+    # also expands prefixed names in the tree
+    prepared = translateQuery(tree)
+
+    # return query and terms
+    return prepared, list(tree[1]['var']) if 'var' in tree[1] else None
+
+##############################
+# nodes a DESCRIBE names
+##############################
+def describe_nodes(graph, prepared, terms, initBindings=None):
+    '''
+    Args:
+        graph (Graph):          graph to query, ConjunctiveGraph for all
+        prepared (rdflib Query):WHERE of the query, from prepare_describe
+        terms (list):           IRIs and variables, None for *
+        initBindings (dict.):   optional, variable name to node
+
+    Returns:
+       list: nodes to describe, in order, without repeats
+    '''
+    from rdflib.plugins.sparql.sparql import QueryContext
+    from rdflib.plugins.sparql.evaluate import evalPart
+
+    if terms is None:
+        terms = prepared.algebra.PV
+
+    nodes = [t for t in terms if not isinstance(t, Variable)]
+    variables = [t for t in terms if isinstance(t, Variable)]
+
+    # bound by the WHERE
+    if variables:
+        ctx = QueryContext(graph, initBindings=dict((Variable(k), v) for k, v in (initBindings or {}).items()))
+        ctx.prologue = prepared.prologue
+
+        for solution in evalPart(ctx, prepared.algebra.p):
+            for variable in variables:
+                value = solution.get(variable)
+                if value is not None and not isinstance(value, Literal):
+                    nodes.append(value)
+
+    # return nodes
+    return list(dict.fromkeys(nodes))
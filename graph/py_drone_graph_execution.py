@@ -0,0 +1,573 @@
+'''
+SPARQL execution pool for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+Queries run on a bounded pool of worker threads rather than on the Flask
+request thread, so at most query_workers queries evaluate at once and the
+rest wait their turn. Each query gets a query_guard holding its deadline,
+and its row and triple scan limits. The query sees the store through a
+guarded_store that counts the triples read and checks the guard on each one,
+so a query that runs past its deadline, or reads too much, stops at the next
+store lookup with a query_limit exception. A query is also cancelled when
+its client goes away while results are streamed.
+
+A streamed query is evaluated on a query worker until its first chunk is
+ready, then handed to one of stream_workers threads for the rest of the
+download, so slow clients do not hold the query workers. From then on it has
+stream_timeout seconds instead of query_timeout, and the time spent waiting
+for the client to read is not counted.
+'''
+
+# Imports ######################################################################
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+# RDFLIB
+from rdflib.graph import Graph, ConjunctiveGraph
+from rdflib.store import Store
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# streamed chunks buffered ahead of the client
+stream_depth = 4
+
+# end of a stream
+stream_end = object()
+
+################################################################################
+# Exception for a query stopped by its limits
+################################################################################
+
+
+class query_limit(Exception):
+    '''
+    Raised when a query times out, is cancelled, or exceeds its row or scan
+    limit. The message says which.
+    '''
+    pass
+
+################################################################################
+# Class to hold the limits of one query
+################################################################################
+
+
+class query_guard(object):
+    '''
+    sample instantiation,
+    guard = query_guard(30, 100000, 10000000)
+    where,
+    1. timeout, seconds before the query is cancelled
+    2. max_rows, most results returned
+    3. max_scan, most triples read from the store
+    0 for no limit.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, timeout=0, max_rows=0, max_scan=0, query=None):
+        '''
+        Args:
+            timeout (float):    seconds, 0 for none
+            max_rows (int):     results, 0 for no limit
+            max_scan (int):     triples read, 0 for no limit
+            query (str):        optional, query text for the slow query log
+        '''
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.max_scan = max_scan
+        self.query = query
+        self.started = time.time()
+        self.deadline = self.started + timeout if timeout else None
+
+        # counts
+        self.lookups = 0
+        self.scans = 0
+        self.rows = 0
+
+        # reason, once cancelled
+        self.cancelled = None
+
+    ##########################
+    # cancel the query
+    ##########################
+    def cancel(self, reason):
+        '''
+        Args:
+            reason (str):   error returned for the query
+        '''
+        if self.cancelled is None:
+            self.cancelled = reason
+
+    ##########################
+    # seconds left
+    ##########################
+    def remaining(self):
+        '''
+        Returns:
+           float: seconds before the deadline, None if no timeout
+        '''
+        if self.deadline is None:
+            return None
+        return max(0, self.deadline - time.time())
+
+    ##########################
+    # new deadline, streaming
+    ##########################
+    def restart(self, timeout):
+        '''
+        Args:
+            timeout (float):    seconds from now, 0 for none
+        '''
+        self.timeout = timeout
+        self.deadline = time.time() + timeout if timeout else None
+
+    ##########################
+    # time not counted
+    ##########################
+    def extend(self, seconds):
+        '''
+        Args:
+            seconds (float):    time spent waiting on the client
+        '''
+        if self.deadline is not None:
+            self.deadline += seconds
+
+    ##########################
+    # still allowed to run?
+    ##########################
+    def check(self):
+        '''
+        Raises:
+            query_limit if cancelled or past the deadline
+        '''
+        if self.cancelled is None and self.deadline is not None and time.time() > self.deadline:
+            self.cancel('query timed out after %s seconds' % self.timeout)
+
+        if self.cancelled is not None:
+            raise query_limit(self.cancelled)
+
+    ##########################
+    # counts so far
+    ##########################
+    def stats(self):
+        '''
+        Returns:
+           dict.: results, store lookups, triples read and any error
+        '''
+        return {'results': self.rows, 'lookups': self.lookups, 'scanned': self.scans, 'error': self.cancelled}
+
+    ##########################
+    # count a triple read
+    ##########################
+    def scanned(self):
+        '''
+        Raises:
+            query_limit if cancelled or over the scan limit
+        '''
+        self.scans += 1
+
+        if self.max_scan and self.scans > self.max_scan:
+            self.cancel('query read more than %d triples' % self.max_scan)
+
+        # clock checked every 1024 triples
+        if self.cancelled is not None or not self.scans & 1023:
+            self.check()
+
+    ##########################
+    # count results
+    ##########################
+    def count_rows(self, rows):
+        '''
+        Args:
+            rows (iterable):    query solutions
+
+        Returns:
+           generator: the solutions, raises query_limit past max_rows
+        '''
+        for row in rows:
+            self.rows += 1
+            if self.max_rows and self.rows > self.max_rows:
+                self.cancel('query returned more than %d results' % self.max_rows)
+                self.check()
+            yield row
+
+    ##########################
+    # check a whole result
+    ##########################
+    def check_result(self, result):
+        '''
+        Args:
+            result (rdflib Result): evaluated query
+
+        Returns:
+           rdflib Result: the result
+
+        Raises:
+            query_limit if over the row limit
+        '''
+        if self.max_rows:
+            if result.type == 'CONSTRUCT':
+                self.rows = len(result.graph)
+            elif result.type == 'SELECT':
+                self.rows = len(result.bindings)
+
+            if self.rows > self.max_rows:
+                self.cancel('query returned more than %d results' % self.max_rows)
+                self.check()
+
+        # return result
+        return result
+
+###########################################
+# end of query_guard class
+###########################################
+
+################################################################################
+# Class to read another store
+################################################################################
+
+
+class read_store(Store):
+    '''
+    sample instantiation,
+    store = read_store(d_graph.store)
+
+    Read only, passes lookups to the store it wraps. The base of stores that
+    change what a query sees of a store.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, store):
+        '''
+        Args:
+            store (rdflib Store):   store to read
+        '''
+        super().__init__(identifier=getattr(store, 'identifier', None))
+        self.store = store
+
+        # same capabilities
+        self.context_aware = store.context_aware
+        self.formula_aware = store.formula_aware
+        self.graph_aware = store.graph_aware
+
+    ##########################
+    # lookups
+    ##########################
+    def triples(self, triple_pattern, context=None):
+        return self.store.triples(triple_pattern, context)
+
+    def triples_choices(self, triple, context=None):
+        return self.store.triples_choices(triple, context)
+
+    def __len__(self, context=None):
+        return self.store.__len__(context)
+
+    def contexts(self, triple=None):
+        # graphs read through this store
+        for context in self.store.contexts(triple):
+            identifier = context.identifier if isinstance(context, Graph) else context
+            yield Graph(self, identifier=identifier)
+
+    # namespaces from the store
+    def bind(self, prefix, namespace):
+        self.store.bind(prefix, namespace)
+
+    def namespace(self, prefix):
+        return self.store.namespace(prefix)
+
+    def prefix(self, namespace):
+        return self.store.prefix(namespace)
+
+    def namespaces(self):
+        return self.store.namespaces()
+
+    # read only
+    def add(self, triple, context, quoted=False):
+        raise Exception("query graphs are read only")
+
+    def addN(self, quads):
+        raise Exception("query graphs are read only")
+
+    def remove(self, triple, context=None):
+        raise Exception("query graphs are read only")
+
+###########################################
+# end of read_store class
+###########################################
+
+################################################################################
+# Class to read a store under a guard
+################################################################################
+
+
+class guarded_store(read_store):
+    '''
+    sample instantiation,
+    store = guarded_store(d_graph.store, guard)
+
+    Read only, passes lookups to the store it wraps, counting the triples
+    returned against the guard.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, store, guard):
+        '''
+        Args:
+            store (rdflib Store):   store to read
+            guard (query_guard):    limits of the query
+        '''
+        super().__init__(store)
+        self.guard = guard
+
+    ##########################
+    # guarded lookup
+    ##########################
+    def triples(self, triple_pattern, context=None):
+        self.guard.check()
+        self.guard.lookups += 1
+
+        for triple in self.store.triples(triple_pattern, context):
+            self.guard.scanned()
+            yield triple
+
+    def triples_choices(self, triple, context=None):
+        self.guard.check()
+        self.guard.lookups += 1
+
+        for choice in self.store.triples_choices(triple, context):
+            self.guard.scanned()
+            yield choice
+
+    def __len__(self, context=None):
+        self.guard.check()
+        return super().__len__(context)
+
+    def contexts(self, triple=None):
+        self.guard.check()
+        return super().contexts(triple)
+
+###########################################
+# end of guarded_store class
+###########################################
+
+##############################
+# graph read under a guard
+##############################
+def guarded_graph(graph, guard):
+    '''
+    Args:
+        graph (Graph):          graph to query, ConjunctiveGraph for all
+        guard (query_guard):    limits of the query
+
+    Returns:
+       Graph: the same graph, read through a guarded_store
+    '''
+    store = guarded_store(graph.store, guard)
+
+    if isinstance(graph, ConjunctiveGraph):
+        return ConjunctiveGraph(store, identifier=graph.default_context.identifier)
+
+    # return graph
+    return Graph(store, identifier=graph.identifier, namespace_manager=graph.namespace_manager)
+
+################################################################################
+# Class to run queries on worker threads
+################################################################################
+
+
+class query_executor(object):
+    '''
+    sample instantiation,
+    executor = query_executor(2, 30, 100000, 10000000)
+    where,
+    1. workers, queries evaluated at once
+    2. timeout, seconds a query may take, including waiting for a worker
+    3. max_rows, most results returned
+    4. max_scan, most triples read from the store
+    0 for no limit.
+    5. slow_log, optional slow_query_log for queries that finish slowly
+    6. stream_workers, threads streaming results after their first chunk
+    7. stream_timeout, seconds a stream may take after its first chunk, not
+       counting the time waiting for the client, 0 for no limit
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, workers=2, timeout=30, max_rows=0, max_scan=0, slow_log=None,
+                 stream_workers=4, stream_timeout=600):
+        '''
+        Args:
+            workers (int):              worker threads
+            timeout (float):            seconds, 0 for none
+            max_rows (int):             results, 0 for no limit
+            max_scan (int):             triples read, 0 for no limit
+            slow_log (slow_query_log):  optional, log of slow queries
+            stream_workers (int):       stream threads
+            stream_timeout (float):     seconds after the first chunk, 0 for
+                                        none
+        '''
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.max_scan = max_scan
+        self.slow_log = slow_log
+        self.stream_timeout = stream_timeout
+
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='sparql')
+        self.streams = ThreadPoolExecutor(max_workers=max(1, stream_workers), thread_name_prefix='sparql-stream')
+
+    ##########################
+    # limits for a new query
+    ##########################
+    def guard(self, query=None):
+        '''
+        Args:
+            query (str):    optional, query text for the slow query log
+
+        Returns:
+           query_guard: with the configured limits
+        '''
+        return query_guard(self.timeout, self.max_rows, self.max_scan, query)
+
+    ##########################
+    # query done
+    ##########################
+    def finished(self, guard):
+        '''
+        Args:
+            guard (query_guard):    limits and counts of the query
+        '''
+        if self.slow_log is not None and guard.query is not None:
+            self.slow_log.record(guard.query, time.time() - guard.started, guard.stats())
+
+    ##########################
+    # run on a worker
+    ##########################
+    def run(self, guard, function, *args):
+        '''
+        Args:
+            guard (query_guard):    limits of the query
+            function (callable):    evaluates the query
+            args:                   arguments for function
+
+        Returns:
+           the return value of function
+
+        Raises:
+            query_limit if stopped by its limits, or the exception raised
+        '''
+        future = self.pool.submit(function, *args)
+        try:
+            return future.result(timeout=guard.remaining())
+        except TimeoutError:
+            # stops at the next store lookup, or never starts
+            future.cancel()
+            guard.cancel('query timed out after %s seconds' % guard.timeout)
+            logger.warning('query cancelled: %s.' % guard.cancelled)
+            raise query_limit(guard.cancelled)
+        finally:
+            self.finished(guard)
+
+    ##########################
+    # stream from a worker
+    ##########################
+    def stream(self, guard, chunks):
+        '''
+        Args:
+            guard (query_guard):    limits of the query
+            chunks (iterable):      lazily evaluated result chunks
+
+        Returns:
+           generator: the chunks, the first produced on a query worker and
+                      the rest on a stream thread. Closing it cancels the
+                      query.
+        '''
+        buffer = queue.Queue(stream_depth)
+        closed = threading.Event()
+        chunks = iter(chunks)
+        futures = []
+
+        # worker side
+        def produce(first):
+            try:
+                for chunk in chunks:
+                    self.put(buffer, chunk, closed, guard)
+
+                    # rest on a stream thread
+                    if first:
+                        guard.restart(self.stream_timeout)
+                        futures.append(self.streams.submit(produce, False))
+                        return
+                self.put(buffer, stream_end, closed, guard)
+            except Exception as ex:
+                # raised on the client side
+                self.put(buffer, ex, closed, guard)
+
+        futures.append(self.pool.submit(produce, True))
+
+        # client side
+        def consume():
+            try:
+                while True:
+                    try:
+                        item = buffer.get(timeout=guard.remaining())
+                    except queue.Empty:
+                        guard.check()
+                        continue
+
+                    if item is stream_end:
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                # done, failed, or the client went away
+                self.finished(guard)
+                closed.set()
+                for future in list(futures):
+                    future.cancel()
+                guard.cancel('query closed')
+
+        # return stream
+        return consume()
+
+    ##########################
+    # pass a chunk to the client
+    ##########################
+    def put(self, buffer, item, closed, guard):
+        '''
+        Args:
+            buffer (Queue):         chunks for the client
+            item:                   chunk, end or exception
+            closed (Event):         set when the client stops reading
+            guard (query_guard):    limits of the query, the wait for the
+                                    client is not counted
+
+        Raises:
+            query_limit if the client stopped reading
+        '''
+        start = time.time()
+        while not closed.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                guard.extend(time.time() - start)
+                return
+            except queue.Full:
+                pass
+
+        raise query_limit('query closed')
+
+###########################################
+# end of query_executor class
+###########################################
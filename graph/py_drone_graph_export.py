@@ -0,0 +1,176 @@
+'''
+Streaming export for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+The store, or one of its graphs, is written as N-Quads or N-Triples a line
+per statement as the statements are read, optionally gzip compressed, so an
+export needs no file and its memory use does not grow with the store.
+rdflib-sqlalchemy reads the whole result of a lookup into memory before
+returning the first triple, so for a SQL store the statement tables are
+read directly a page at a time in id order, each page on its own connection
+so writes are not held up while the client reads.
+
+N-Triples of the whole store is the union of its graphs, a triple in more
+than one graph is written once for each. N-Triples are also Turtle.
+'''
+
+# Imports ######################################################################
+import logging
+import zlib
+
+# RDFLIB
+from rdflib.plugins.serializers.nt import _nt_row
+
+# my imports
+from graph.py_drone_graph_stream import n_triples, chunks, nq_row
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# content types
+n_quads = 'application/n-quads'
+gzip_type = 'application/gzip'
+
+# statements read per SQL page
+page_rows = 10000
+
+##############################
+# choose export format
+##############################
+def export_format(accept=None, filename=None, default=n_quads):
+    '''
+    Args:
+        accept (str):       requested content type (Accept header)
+        filename (str):     file name to download as, by its extension
+        default (str):      format if none is requested
+
+    Returns:
+       str: n_quads or n_triples
+    '''
+    if filename is not None:
+        if filename.endswith(('.nq', '.nq.gz')):
+            return n_quads
+        if filename.endswith(('.nt', '.nt.gz', '.ttl', '.ttl.gz')):
+            return n_triples
+        return default
+
+    accept = accept or ''
+    if n_quads in accept:
+        return n_quads
+    if n_triples in accept or 'text/plain' in accept or 'text/turtle' in accept:
+        return n_triples
+
+    # return default
+    return default
+
+##############################
+# statements of a SQL store
+##############################
+def sql_quads(store, context=None):
+    '''
+    Args:
+        store (SQLAlchemy Store):   rdflib-sqlalchemy store
+        context (Graph):            graph to read, None for all
+
+    Returns:
+       generator: triples and their graph identifiers
+    '''
+    from sqlalchemy import and_
+    from sqlalchemy.sql.expression import literal_column
+    from rdflib_sqlalchemy.constants import TRIPLE_SELECT_NO_ORDER
+    from rdflib_sqlalchemy.sql import union_select
+    from rdflib_sqlalchemy.termutils import extract_triple
+
+    # the partition tables, as the store looks them up
+    for table, clause, table_type in store._triples_helper((None, None, None), context):
+        last = 0
+        while True:
+            after = table.c.id > last
+            where = after if clause is None else and_(clause, after)
+            page = union_select([(table, where, table_type)], select_type=TRIPLE_SELECT_NO_ORDER)
+            page = page.order_by(literal_column('id')).limit(page_rows)
+
+            with store.engine.connect() as connection:
+                rows = connection.execute(page).fetchall()
+
+            for row in rows:
+                last, s, p, o, (graph_class, id_class, graph_id) = extract_triple(row, store, context)
+                yield (s, p, o), id_class(graph_id)
+
+            # last page?
+            if len(rows) < page_rows:
+                break
+
+##############################
+# statements of a store
+##############################
+def store_quads(graph, identifier=None):
+    '''
+    Args:
+        graph (ConjunctiveGraph):   graph over the store
+        identifier (Node):          graph to read, None for all
+
+    Returns:
+       generator: triples and their graph identifiers
+    '''
+    store = graph.store
+    context = None if identifier is None else graph.get_context(identifier)
+
+    if hasattr(store, 'engine') and hasattr(store, '_triples_helper'):
+        for quad in sql_quads(store, context):
+            yield quad
+        return
+
+    # other stores, a graph at a time
+    contexts = graph.contexts() if context is None else [context]
+    for c in contexts:
+        for triple in c.triples((None, None, None)):
+            yield triple, c.identifier
+
+##############################
+# gzip chunks
+##############################
+def gzip_chunks(parts):
+    '''
+    Args:
+        parts (iterable):   str chunks
+
+    Returns:
+       generator: gzip compressed bytes
+    '''
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for part in parts:
+        data = compressor.compress(part.encode('utf-8'))
+        if data:
+            yield data
+
+    # return remainder
+    yield compressor.flush()
+
+##############################
+# export the store or a graph
+##############################
+def export_graph(graph, content_type=n_quads, identifier=None, compress=False):
+    '''
+    Args:
+        graph (ConjunctiveGraph):   graph over the store
+        content_type (str):         n_quads or n_triples
+        identifier (Node):          graph to export, None for all
+        compress (bool):            gzip the export
+
+    Returns:
+       generator: str chunks, bytes if compressed
+    '''
+    quads = store_quads(graph, identifier)
+
+    if content_type == n_quads:
+        rows = (nq_row(triple, context) for triple, context in quads)
+    else:
+        rows = (_nt_row(triple) for triple, context in quads)
+
+    # return chunks
+    if compress:
+        return gzip_chunks(chunks(rows))
+    return chunks(rows)
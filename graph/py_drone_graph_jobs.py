@@ -0,0 +1,523 @@
+'''
+Asynchronous SPARQL jobs for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+Queries too long for a request are submitted as jobs. A job runs on its own
+small pool of threads, apart from the interactive query pool, and writes its
+result to a file in the job folder as it is produced: SELECT results as JSON
+lines (the head, then a binding per line), CONSTRUCT results as N-Triples
+and others as returned. The byte offset of every page_index'th row is kept
+so a page of a large result is read without scanning it from the start.
+Finished results are kept up to max_bytes in total, the least recently read
+are removed first. The job list is saved in the folder and reloaded on
+restart, a job that was running is then marked failed.
+'''
+
+# Imports ######################################################################
+import csv
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# my imports
+from graph.py_drone_graph_execution import query_guard, query_limit
+from graph.py_drone_graph_stream import json_lines, n_triples, sparql_json, sparql_csv
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# rows between indexed offsets
+page_index = 1000
+
+# finished jobs kept, whatever their size
+max_jobs = 100
+
+# read in blocks of
+read_block = 1 << 16
+
+##############################
+# SPARQL JSON term as CSV
+##############################
+def csv_value(term):
+    '''
+    Args:
+        term (dict.):   SPARQL JSON term, or None
+
+    Returns:
+       str: SPARQL CSV value
+    '''
+    if term is None:
+        return ''
+    if term['type'] == 'bnode':
+        return '_:' + term['value']
+
+    # return value
+    return term['value']
+
+##############################
+# lines of a chunk
+##############################
+def split_lines(chunk):
+    '''
+    Args:
+        chunk (str):    whole rows, each ending in a newline
+
+    Returns:
+       list: rows, with their newlines. Only '\n' ends a row, as readline.
+    '''
+    lines = [line + '\n' for line in chunk.split('\n')]
+
+    # after the last newline
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+
+    # return rows
+    return lines
+
+################################################################################
+# Class to run and keep query jobs
+################################################################################
+
+
+class query_jobs(object):
+    '''
+    sample instantiation,
+    jobs = query_jobs('db/landrs_test_jobs', 100000000, 1, 3600)
+    job_id = jobs.submit(query, d_graph.job_query, query)
+    where,
+    1. location, folder for the results and the job list
+    2. max_bytes, total size of results kept, 0 for no limit
+    3. workers, jobs run at once
+    4. timeout, seconds a job may run, 0 for no limit
+
+    The function submitted is called with its arguments and a query_guard,
+    and returns an iterable of str chunks and their content type.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, location, max_bytes=100000000, workers=1, timeout=3600):
+        '''
+        Args:
+            location (str):     job folder
+            max_bytes (int):    results kept, total bytes
+            workers (int):      jobs run at once
+            timeout (float):    seconds, 0 for no limit
+        '''
+        self.location = location
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+
+        self.jobs = {}
+        self.guards = {}
+        self.futures = {}
+        self.lock = threading.RLock()
+
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='sparql_job')
+
+        os.makedirs(self.location, exist_ok=True)
+        self.load()
+
+    ##########################
+    # job list from disk
+    ##########################
+    def load(self):
+        '''
+        Jobs running when the server stopped are marked failed.
+        '''
+        try:
+            with open(self.list_file(), 'r', encoding='utf-8') as f:
+                jobs = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        for job in jobs:
+            if job['status'] in ['queued', 'running']:
+                job.update({'status': 'failed', 'error': 'interrupted'})
+            if job['status'] == 'done' and not os.path.isfile(self.result_file(job['id'])):
+                continue
+            self.jobs.update({job['id']: job})
+
+        logger.info('query jobs loaded: %d.' % len(self.jobs))
+
+    ##########################
+    # job list to disk
+    ##########################
+    def save(self):
+        with self.lock:
+            tmp = self.list_file() + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(list(self.jobs.values()), f)
+            os.replace(tmp, self.list_file())
+
+    def list_file(self):
+        return os.path.join(self.location, 'jobs.json')
+
+    def result_file(self, job_id):
+        return os.path.join(self.location, job_id + '.result')
+
+    ##########################
+    # submit a query
+    ##########################
+    def submit(self, query, function, *args):
+        '''
+        Args:
+            query (str):            sparql query, for the job status
+            function (callable):    evaluates the query
+            args:                   arguments for function
+
+        Returns:
+           str: job id
+        '''
+        job_id = uuid.uuid4().hex
+        job = {'id': job_id, 'query': query, 'status': 'queued', 'submitted': time.time(),
+               'started': None, 'finished': None, 'error': None, 'content_type': None,
+               'results': None, 'bytes': 0, 'accessed': time.time(), 'index': []}
+
+        with self.lock:
+            self.jobs.update({job_id: job})
+            self.guards.update({job_id: query_guard(self.timeout, query=query)})
+            self.futures.update({job_id: self.pool.submit(self.run, job_id, function, args)})
+            self.save()
+
+        # return id
+        return job_id
+
+    ##########################
+    # run on a worker
+    ##########################
+    def run(self, job_id, function, args):
+        '''
+        Args:
+            job_id (str):           job
+            function (callable):    evaluates the query
+            args (tuple):           arguments for function
+        '''
+        with self.lock:
+            job = self.jobs.get(job_id, None)
+            guard = self.guards.get(job_id, None)
+            if job is None or job['status'] != 'queued':
+                return
+            job.update({'status': 'running', 'started': time.time()})
+
+            # deadline from the start, not the submission
+            if guard.timeout:
+                guard.deadline = time.time() + guard.timeout
+
+        path = self.result_file(job_id)
+        try:
+            chunks, content_type = function(*args, guard)
+            job.update({'content_type': content_type})
+
+            self.write(job, chunks, path + '.tmp', guard)
+            os.replace(path + '.tmp', path)
+
+            job.update({'status': 'done'})
+
+        except Exception as ex:
+            # cancelled, over its limits or failed
+            status = 'cancelled' if guard.cancelled == 'job cancelled' else 'failed'
+            job.update({'status': status, 'error': str(ex), 'index': []})
+            if os.path.isfile(path + '.tmp'):
+                os.remove(path + '.tmp')
+
+            logger.warning('query job %s %s: %s.' % (job_id, status, str(ex)))
+
+        finally:
+            job.update({'finished': time.time(), 'accessed': time.time()})
+            with self.lock:
+                self.guards.pop(job_id, None)
+                self.futures.pop(job_id, None)
+                self.evict(job_id)
+                self.save()
+
+    ##########################
+    # write the result
+    ##########################
+    def write(self, job, chunks, path, guard):
+        '''
+        Args:
+            job (dict.):            job status
+            chunks (iterable):      str chunks
+            path (str):             result file
+            guard (query_guard):    limits of the job
+
+        Raises:
+            query_limit if larger than max_bytes
+        '''
+        # rows are lines, JSON lines have a head line first
+        lines = job['content_type'] in [json_lines, n_triples]
+        head = job['content_type'] == json_lines
+
+        size = 0
+        rows = 0
+        with open(path, 'wb') as f:
+            for chunk in chunks:
+                guard.check()
+
+                for line in split_lines(chunk) if lines else [chunk]:
+                    data = line.encode('utf-8')
+
+                    if head:
+                        head = False
+                    elif lines:
+                        if not rows % page_index:
+                            job['index'].append(size)
+                        rows += 1
+
+                    size += len(data)
+                    if self.max_bytes and size > self.max_bytes:
+                        raise query_limit('job result larger than %d bytes' % self.max_bytes)
+                    f.write(data)
+
+        job.update({'bytes': size, 'results': rows if lines else None})
+
+    ##########################
+    # drop old results
+    ##########################
+    def evict(self, keep=None):
+        '''
+        Args:
+            keep (str): optional, job not to remove
+        '''
+        with self.lock:
+            finished = sorted((job for job in self.jobs.values()
+                               if job['status'] not in ['queued', 'running'] and job['id'] != keep),
+                              key=lambda job: job['accessed'])
+
+            total = sum(job['bytes'] for job in self.jobs.values() if job['status'] == 'done')
+            count = len(finished)
+            for job in finished:
+                if (not self.max_bytes or total <= self.max_bytes) and count <= max_jobs:
+                    break
+                self.remove(job['id'])
+                total -= job['bytes'] if job['status'] == 'done' else 0
+                count -= 1
+
+    ##########################
+    # remove a job
+    ##########################
+    def remove(self, job_id):
+        '''
+        Args:
+            job_id (str):   job, its result file is deleted
+        '''
+        with self.lock:
+            self.jobs.pop(job_id, None)
+            path = self.result_file(job_id)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    ##########################
+    # cancel or delete a job
+    ##########################
+    def cancel(self, job_id):
+        '''
+        Args:
+            job_id (str):   job
+
+        Returns:
+           bool: False if there is no such job
+        '''
+        with self.lock:
+            job = self.jobs.get(job_id, None)
+            if job is None:
+                return False
+
+            if job['status'] in ['queued', 'running']:
+                # stops at its next store lookup
+                self.guards[job_id].cancel('job cancelled')
+                if self.futures[job_id].cancel():
+                    # never started
+                    job.update({'status': 'cancelled', 'error': 'job cancelled', 'finished': time.time()})
+                    self.guards.pop(job_id)
+                    self.futures.pop(job_id)
+            else:
+                self.remove(job_id)
+
+            self.save()
+
+        # done
+        return True
+
+    ##########################
+    # job status
+    ##########################
+    def status(self, job_id=None):
+        '''
+        Args:
+            job_id (str):   optional, job
+
+        Returns:
+           dict.: status of the job, all jobs by id if no job_id. None if
+                  there is no such job
+        '''
+        with self.lock:
+            if job_id is None:
+                return {job['id']: self.public(job) for job in self.jobs.values()}
+
+            job = self.jobs.get(job_id, None)
+            return None if job is None else self.public(job)
+
+    def public(self, job):
+        return {key: value for key, value in job.items() if key != 'index'}
+
+    ##########################
+    # finished job, or error
+    ##########################
+    def finished(self, job_id):
+        '''
+        Args:
+            job_id (str):   job
+
+        Returns:
+           dict.: the job
+
+        Raises:
+            KeyError if no such job, Exception if it is not done
+        '''
+        job = self.jobs[job_id]
+        if job['status'] != 'done':
+            raise Exception("job is %s" % job['status'])
+
+        job.update({'accessed': time.time()})
+
+        # return job
+        return job
+
+    ##########################
+    # page of a result
+    ##########################
+    def page(self, job_id, offset=0, limit=page_index):
+        '''
+        Args:
+            job_id (str):   job
+            offset (int):   first row
+            limit (int):    rows
+
+        Returns:
+           tuple: str page and its content type. SELECT as SPARQL JSON,
+                  CONSTRUCT as N-Triples, others whole.
+
+        Raises:
+            ValueError for a negative offset or limit, KeyError if no such
+            job, Exception if it is not done
+        '''
+        if offset < 0 or limit < 0:
+            raise ValueError("offset and limit must not be negative")
+
+        job = self.finished(job_id)
+        content_type = job['content_type']
+
+        with open(self.result_file(job_id), 'rb') as f:
+            # not rows
+            if content_type not in [json_lines, n_triples]:
+                return f.read().decode('utf-8'), content_type
+
+            head = f.readline() if content_type == json_lines else None
+
+            lines = []
+            if offset < job['results']:
+                # nearest indexed row
+                block = offset // page_index
+                f.seek(job['index'][block])
+                for i in range(offset - block * page_index):
+                    f.readline()
+
+                while len(lines) < limit:
+                    line = f.readline()
+                    if not line:
+                        break
+                    lines.append(line.decode('utf-8'))
+
+        if head is None:
+            return ''.join(lines), content_type
+
+        # as SPARQL JSON
+        ret = json.loads(head.decode('utf-8'))
+        ret.update({'results': {'bindings': [json.loads(line) for line in lines]}})
+
+        # return page
+        return json.dumps(ret), sparql_json
+
+    ##########################
+    # whole result
+    ##########################
+    def download(self, job_id, return_type=None):
+        '''
+        Args:
+            job_id (str):       job
+            return_type (str):  requested content type, SELECT results are
+                                SPARQL JSON, or CSV for text/csv
+
+        Returns:
+           tuple: generator of str chunks and their content type
+
+        Raises:
+            KeyError if no such job, Exception if it is not done
+        '''
+        job = self.finished(job_id)
+        path = self.result_file(job_id)
+
+        if job['content_type'] != json_lines:
+            return self.read(path), job['content_type']
+
+        if sparql_csv in (return_type or ''):
+            return self.csv_rows(path), sparql_csv
+
+        # return SPARQL JSON
+        return self.json_rows(path), sparql_json
+
+    ##########################
+    # result file as chunks
+    ##########################
+    def read(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for block in iter(lambda: f.read(read_block), ''):
+                yield block
+
+    ##########################
+    # JSON lines as SPARQL JSON
+    ##########################
+    def json_rows(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            head = f.readline()
+            yield head.rstrip('\n')[:-1] + ', "results": {"bindings": ['
+
+            separator = ''
+            for line in f:
+                yield separator + line.rstrip('\n')
+                separator = ', '
+            yield ']}}'
+
+    ##########################
+    # JSON lines as CSV
+    ##########################
+    def csv_rows(self, path):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\r\n')
+
+        with open(path, 'r', encoding='utf-8') as f:
+            names = json.loads(f.readline())['head']['vars']
+            writer.writerow(names)
+            for line in f:
+                row = json.loads(line)
+                writer.writerow([csv_value(row.get(name, None)) for name in names])
+                if buffer.tell() > read_block:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        yield buffer.getvalue()
+
+###########################################
+# end of query_jobs class
+###########################################
@@ -0,0 +1,395 @@
+'''
+Journaled in memory store for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+An alternative to the rdflib-sqlalchemy store, selected with
+[GRAPH] store = journal. All graphs are held in an rdflib IOMemory store.
+Changes are appended to a journal file as N-Quads, one line per change,
+prefixed 'A ' for an add and 'D ' for a remove (<urn:x-journal:any> standing
+in for a wildcard). A change is fsynced before the call returns, or with
+sync_period set, by a background thread every sync_period seconds (a group
+commit, a crash loses at most the last sync_period seconds).
+
+When the journal gets long it is set aside as <location>.journal.old and a
+new journal started, and a background thread compacts the old snapshot and
+the set aside journal into a new N-Quads snapshot, reading the files rather
+than the store so writes carry on. Opening the store replays the snapshot,
+any set aside journal, then the journal. Replaying a set aside journal onto
+the snapshot it was compacted into leaves it unchanged, so a crash part way
+through compaction loses nothing.
+
+Writes and lookups hold the store lock, lookups read their whole result
+under it so queries on other threads never iterate the store as it
+changes.
+'''
+
+# Imports ######################################################################
+import logging
+import os
+import re
+import threading
+import time
+
+# RDFLIB
+from rdflib import Graph, Literal, URIRef, BNode
+from rdflib.plugins.memory import IOMemory
+from rdflib.store import Store
+from rdflib.plugins.parsers.ntriples import unquote, uriquote
+
+# my imports
+from graph.py_drone_graph_stream import nq_row
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# wildcard in removals
+journal_any = URIRef('urn:x-journal:any')
+
+# N-Quads terms
+nquads_term = re.compile(r'\s*(?:<([^>]*)>|_:(\S+)|"((?:[^"\\]|\\.)*)"(?:@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\^\^<([^>]*)>)?)')
+
+##############################
+# parse an N-Quads line
+##############################
+def parse_nquad(line):
+    '''
+    Args:
+        line (str): N-Quads statement
+
+    Returns:
+       list: [subject, predicate, object, context] nodes
+    '''
+    terms = []
+    pos = 0
+    while len(terms) < 4:
+        m = nquads_term.match(line, pos)
+        if not m:
+            raise Exception("bad journal line: " + line)
+        pos = m.end()
+
+        iri, bnode, lexical, lang, datatype = m.groups()
+        if iri is not None:
+            terms.append(URIRef(uriquote(iri)))
+        elif bnode is not None:
+            terms.append(BNode(bnode))
+        else:
+            terms.append(Literal(unquote(lexical), lang=lang,
+                                 datatype=None if datatype is None else URIRef(uriquote(datatype))))
+
+    # return nodes
+    return terms
+
+################################################################################
+# Class for the journaled store
+################################################################################
+
+
+class journal_store(IOMemory):
+    '''
+    sample instantiation,
+    store = journal_store(identifier=store_ident, compact=100000, sync_period=0)
+    store.open('db/landrs_test', create=True)
+    where,
+    1. compact, number of journal lines that triggers a compaction
+    2. sync_period, seconds between journal fsyncs, 0 to fsync each change
+
+    Files are <location>.nq (snapshot), <location>.journal and, while
+    compacting, <location>.journal.old.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, configuration=None, identifier=None, compact=100000, sync_period=0):
+        super().__init__(configuration, identifier)
+        self.compact_lines = compact
+        self.sync_period = sync_period
+        self.location = None
+        self.journal = None
+        self.journal_lines = 0
+        self.replaying = False
+        self.lock = threading.RLock()
+
+        # journal written since the last fsync?
+        self.unsynced = False
+
+        # background compaction thread, if running
+        self.compaction = None
+
+    ##############################
+    # open, replay files
+    ##############################
+    def open(self, configuration, create=False):
+        '''
+        Args:
+            configuration (str):    file location, without extension
+            create (bool):          create files if missing
+        '''
+        self.location = configuration
+
+        # check any folders exist
+        folder = os.path.dirname(self.location)
+        if folder and create:
+            os.makedirs(folder, exist_ok=True)
+
+        # replay
+        self.replaying = True
+        try:
+            lines = self.replay(self.location + '.nq', False)
+            lines += self.replay(self.location + '.journal.old', True)
+            self.journal_lines = self.replay(self.location + '.journal', True)
+        finally:
+            self.replaying = False
+
+        logger.info('journal store opened: %s, %d snapshot and %d journal lines.' %
+                    (self.location, lines, self.journal_lines))
+
+        # open journal for append
+        self.journal = open(self.location + '.journal', 'a', encoding='utf-8')
+
+        # group commit?
+        if self.sync_period > 0:
+            threading.Thread(target=self.syncer, daemon=True).start()
+
+        # and tidy up if required, or finish an interrupted compaction
+        with self.lock:
+            self.start_compaction()
+
+    ##############################
+    # replay a file
+    ##############################
+    def replay(self, filename, journal, store=None):
+        '''
+        Args:
+            filename (str):         snapshot or journal file
+            journal (bool):         lines have add/remove prefix
+            store (rdflib Store):   optional, store to replay into, else this
+
+        Returns:
+           int: number of lines replayed
+        '''
+        if store is None:
+            store = self
+
+        if not os.path.isfile(filename):
+            return 0
+
+        count = 0
+        with open(filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                action = 'A'
+                if journal:
+                    action, line = line[0], line[2:]
+
+                try:
+                    s, p, o, c = [None if t == journal_any else t for t in parse_nquad(line)]
+                except Exception as ex:
+                    # a torn last line, from a crash
+                    logger.error('journal line skipped: %s.' % str(ex))
+                    continue
+
+                context = None if c is None else Graph(store, identifier=c)
+                if action == 'A':
+                    store.add((s, p, o), context)
+                else:
+                    store.remove((s, p, o), context)
+                count += 1
+
+        # return count
+        return count
+
+    ##############################
+    # write journal lines
+    ##############################
+    def write(self, action, quads):
+        '''
+        Call with the store lock held.
+
+        Args:
+            action (str):   'A' add or 'D' remove
+            quads (list):   (s, p, o, context identifier)
+        '''
+        if self.replaying or self.journal is None:
+            return
+
+        for s, p, o, c in quads:
+            s, p, o, c = [journal_any if t is None else t for t in (s, p, o, c)]
+            self.journal.write(action + ' ' + nq_row((s, p, o), c))
+            self.journal_lines += 1
+        self.journal.flush()
+
+        # durable now, or at the next group commit
+        if self.sync_period > 0:
+            self.unsynced = True
+        else:
+            os.fsync(self.journal.fileno())
+
+        # time to compact?
+        if self.journal_lines >= self.compact_lines:
+            self.start_compaction()
+
+    # journaled changes ########################################################
+    def add(self, triple, context, quoted=False):
+        with self.lock:
+            super().add(triple, context, quoted)
+            self.write('A', [(*triple, getattr(context, 'identifier', context))])
+
+    def addN(self, quads):
+        quads = list(quads)
+        with self.lock:
+            for s, p, o, c in quads:
+                super().add((s, p, o), c)
+            self.write('A', [(s, p, o, getattr(c, 'identifier', c)) for s, p, o, c in quads])
+
+    def remove(self, triplepat, context=None):
+        with self.lock:
+            # IOMemory does not dispatch removals
+            Store.remove(self, triplepat, context)
+            super().remove(triplepat, context)
+            self.write('D', [(*triplepat, getattr(context, 'identifier', context))])
+
+    def bind(self, prefix, namespace):
+        with self.lock:
+            super().bind(prefix, namespace)
+
+    def add_graph(self, graph):
+        with self.lock:
+            super().add_graph(graph)
+
+    def remove_graph(self, graph):
+        with self.lock:
+            super().remove_graph(graph)
+
+    # lookups, whole result read under the lock ################################
+    def triples(self, triple_pattern, context=None):
+        with self.lock:
+            found = [(triple, list(contexts)) for triple, contexts in super().triples(triple_pattern, context)]
+
+        for triple, contexts in found:
+            yield triple, iter(contexts)
+
+    def contexts(self, triple=None):
+        with self.lock:
+            return iter(list(super().contexts(triple)))
+
+    def __len__(self, context=None):
+        with self.lock:
+            return super().__len__(context)
+
+    def namespace(self, prefix):
+        with self.lock:
+            return super().namespace(prefix)
+
+    def prefix(self, namespace):
+        with self.lock:
+            return super().prefix(namespace)
+
+    def namespaces(self):
+        with self.lock:
+            return iter(list(super().namespaces()))
+
+    ##############################
+    # group commit
+    ##############################
+    def syncer(self):
+        '''
+        Runs in the background, fsyncs the journal every sync_period seconds
+        if written.
+        '''
+        while self.journal is not None:
+            time.sleep(self.sync_period)
+            try:
+                self.sync()
+            except Exception as ex:
+                logger.error('journal sync failed: %s.' % str(ex))
+
+    def sync(self):
+        with self.lock:
+            if self.unsynced and self.journal is not None:
+                os.fsync(self.journal.fileno())
+            self.unsynced = False
+
+    ##############################
+    # set journal aside, compact
+    ##############################
+    def start_compaction(self):
+        '''
+        Call with the store lock held. Starts a compaction of any set aside
+        journal, else sets the journal aside if it is long enough.
+        '''
+        if self.compaction is not None:
+            return
+
+        journal_file = self.location + '.journal'
+        if not os.path.isfile(journal_file + '.old'):
+            if self.journal_lines < self.compact_lines:
+                return
+
+            # set aside, durable, and start again
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.journal.close()
+            os.replace(journal_file, journal_file + '.old')
+            self.journal = open(journal_file, 'w', encoding='utf-8')
+            self.journal_lines = 0
+            self.unsynced = False
+
+        self.compaction = threading.Thread(target=self.compact, daemon=True)
+        self.compaction.start()
+
+    ##############################
+    # write snapshot, in background
+    ##############################
+    def compact(self):
+        '''
+        Replays the snapshot and set aside journal into a separate store and
+        writes that as the new snapshot, then drops the set aside journal.
+        '''
+        try:
+            merged = IOMemory()
+            self.replay(self.location + '.nq', False, merged)
+            self.replay(self.location + '.journal.old', True, merged)
+
+            tmp_file = self.location + '.nq.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                for context in merged.contexts():
+                    for triple, _ in merged.triples((None, None, None), context):
+                        f.write(nq_row(triple, context.identifier))
+                f.flush()
+                os.fsync(f.fileno())
+
+            # swap in, then the set aside journal is not needed
+            os.replace(tmp_file, self.location + '.nq')
+            os.remove(self.location + '.journal.old')
+
+            logger.info('journal store compacted: %s.' % self.location)
+        except Exception as ex:
+            logger.error('journal store compaction failed: %s.' % str(ex))
+        finally:
+            with self.lock:
+                self.compaction = None
+
+    ##############################
+    # close
+    ##############################
+    def close(self, commit_pending_transaction=False):
+        # let a compaction finish
+        compaction = self.compaction
+        if compaction is not None:
+            compaction.join()
+
+        with self.lock:
+            if self.journal is not None:
+                self.journal.flush()
+                os.fsync(self.journal.fileno())
+                self.journal.close()
+                self.journal = None
+
+###########################################
+# end of journal_store class
+###########################################
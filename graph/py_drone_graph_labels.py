@@ -0,0 +1,120 @@
+'''
+Label families for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+Shape and config labels allow multiple instances as label-n, e.g. sensor,
+sensor-1, sensor-2. Finding the members of a family used to be a scan over
+all keys of a dictionary. A label_dict keeps an index from each family label
+to its member keys so the lookup does not depend on the number of keys.
+'''
+
+# Imports ######################################################################
+import logging
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+##############################
+# family labels of a key
+##############################
+def family_labels(key):
+    '''
+    Args:
+        key (str):  dictionary key, e.g. sensor-1
+
+    Returns:
+       list: labels whose family includes key, e.g. ['sensor', 'sensor-1']
+    '''
+    labels = [key[:i] for i, c in enumerate(key) if c == '-']
+    labels.append(key)
+
+    # return labels
+    return labels
+
+################################################################################
+# Dictionary with label family index
+################################################################################
+
+
+class label_dict(dict):
+    '''
+    sample instantiation,
+    nodes = label_dict({'sensor': s1, 'sensor-1': s2, 'the_dataset': d})
+    nodes.family('sensor') -> ['sensor', 'sensor-1']
+
+    A dict., family(label) returns the keys that are label or label-n in
+    insertion order, as the wildcard scans did.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+        # member keys (ordered dict. used as a set) by family label
+        self.families = {}
+        self.update(*args, **kwargs)
+
+    ##############################
+    # family members of label
+    ##############################
+    def family(self, label):
+        '''
+        Args:
+            label (str):    family label
+
+        Returns:
+           list: keys label or label-n
+        '''
+        return list(self.families.get(label, ()))
+
+    # keep index up to date ####################################################
+    def __setitem__(self, key, value):
+        if key not in self:
+            for label in family_labels(key):
+                self.families.setdefault(label, {}).update({key: None})
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        for label in family_labels(key):
+            members = self.families[label]
+            members.pop(key)
+            if not members:
+                self.families.pop(label)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        key = next(reversed(self.keys()))
+        return key, self.pop(key)
+
+    def clear(self):
+        super().clear()
+        self.families = {}
+
+    def copy(self):
+        return label_dict(self)
+
+###########################################
+# end of label_dict class
+###########################################
@@ -0,0 +1,437 @@
+'''
+Graph file loading for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+Parsing the ontology and shape files is the slowest part of setting up a new
+database. parse_file parses a file into a dictionary encoded snapshot (the
+list of distinct terms plus the triples as term indices) and graph_cache
+keeps those snapshots on disk keyed by the file content hash, public id and
+format, so an unchanged file is loaded without running the parser.
+parse_files parses a list of files in a pool of spawned processes, which
+import the main module again (see py_drone_toast).
+file_manifest records the hash, modification time and target graph of each
+loaded file, which lets a reload find the files that were added, changed or
+removed, and the file triples other writes have asserted too, which a reload
+keeps.
+'''
+
+# Imports ######################################################################
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# RDFLIB
+from rdflib import Graph
+from rdflib.util import from_n3
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+##############################
+# hash of file contents
+##############################
+def file_hash(file_path):
+    '''
+    Args:
+        file_path (str):    file to hash
+
+    Returns:
+       str: sha256 hex digest
+    '''
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+    # return hash
+    return digest.hexdigest()
+
+##############################
+# parse file to snapshot
+##############################
+def parse_file(file_path, file_format, publicID):
+    '''
+    Args:
+        file_path (str):    file to parse
+        file_format (str):  rdflib format, e.g. ttl
+        publicID (str):     base for relative IRIs
+
+    Returns:
+       dict.: snapshot, 'terms', 'triples' (flat list of term indices) and
+              'namespaces' (prefix, namespace) bound by the file
+    '''
+    graph = Graph()
+    default_namespaces = set(graph.namespaces())
+    graph.load(file_path, format=file_format, publicID=publicID)
+
+    # dictionary encode
+    terms = []
+    term_ids = {}
+    triples = []
+    for triple in graph:
+        for term in triple:
+            term_id = term_ids.get(term, None)
+            if term_id is None:
+                term_id = len(terms)
+                term_ids.update({term: term_id})
+                terms.append(term)
+            triples.append(term_id)
+
+    # return snapshot
+    return {'terms': terms, 'triples': triples,
+            'namespaces': [ns for ns in graph.namespaces() if ns not in default_namespaces]}
+
+##############################
+# parse files in parallel
+##############################
+def parse_files(file_paths, file_format, publicID, workers=None):
+    '''
+    Args:
+        file_paths (list):  files to parse
+        file_format (str):  rdflib format, e.g. ttl
+        publicID (str):     base for relative IRIs
+        workers (int):      number of processes, None for one per core
+
+    Returns:
+       list: snapshot as parse_file, or the exception raised, for each file
+    '''
+    results = []
+
+    # not worth a pool?
+    if workers == 1 or len(file_paths) < 2:
+        for file_path in file_paths:
+            try:
+                results.append(parse_file(file_path, file_format, publicID))
+            except Exception as ex:
+                results.append(ex)
+        return results
+
+    # spawned, forking a process with threads running can deadlock the child
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(parse_file, file_path, file_format, publicID) for file_path in file_paths]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as ex:
+                results.append(ex)
+
+    # return snapshots
+    return results
+
+##############################
+# decode snapshot triples
+##############################
+def snapshot_triples(snapshot):
+    '''
+    Args:
+        snapshot (dict.):   snapshot from parse_file
+
+    Returns:
+       generator: (s, p, o) triples
+    '''
+    terms = snapshot['terms']
+    triples = snapshot['triples']
+    for i in range(0, len(triples), 3):
+        yield terms[triples[i]], terms[triples[i + 1]], terms[triples[i + 2]]
+
+################################################################################
+# Class to hold parsed file snapshots
+################################################################################
+
+
+class graph_cache(object):
+    '''
+    sample instantiation,
+    cache = graph_cache(location)
+    where,
+    1. location, folder for the snapshot files
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, location):
+        '''
+        Args:
+            location (str): cache folder
+        '''
+        self.location = location
+        os.makedirs(self.location, exist_ok=True)
+
+    ##############################
+    # cache file for a source file
+    ##############################
+    def cache_file(self, content_hash, file_format, publicID):
+        '''
+        Args:
+            content_hash (str): source file hash
+            file_format (str):  rdflib format
+            publicID (str):     base for relative IRIs
+
+        Returns:
+           str: snapshot filename
+        '''
+        key = hashlib.sha256(('%s\n%s\n%s' % (content_hash, file_format, publicID)).encode('utf-8')).hexdigest()
+        return os.path.join(self.location, key + '.pickle')
+
+    ##############################
+    # get snapshot, parse if new
+    ##############################
+    def load(self, file_path, file_format, publicID, content_hash=None):
+        '''
+        Args:
+            file_path (str):    file to load
+            file_format (str):  rdflib format
+            publicID (str):     base for relative IRIs
+            content_hash (str): optional, hash of the file if known
+
+        Returns:
+           dict.: snapshot as parse_file
+        '''
+        if content_hash is None:
+            content_hash = file_hash(file_path)
+
+        # cached?
+        snapshot = self.get(content_hash, file_format, publicID)
+        if snapshot is not None:
+            return snapshot
+
+        # parse and save
+        snapshot = parse_file(file_path, file_format, publicID)
+        self.put(content_hash, file_format, publicID, snapshot)
+
+        # return snapshot
+        return snapshot
+
+    ##############################
+    # get snapshot by hash
+    ##############################
+    def get(self, content_hash, file_format, publicID):
+        '''
+        Args:
+            content_hash (str): source file hash
+            file_format (str):  rdflib format
+            publicID (str):     base for relative IRIs
+
+        Returns:
+           dict.: snapshot as parse_file, None if not cached
+        '''
+        cache_file = self.cache_file(content_hash, file_format, publicID)
+        if not os.path.isfile(cache_file):
+            return None
+
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception as ex:
+            logger.error('could not read graph cache %s: %s.' % (cache_file, str(ex)))
+            return None
+
+    ##############################
+    # save snapshot
+    ##############################
+    def put(self, content_hash, file_format, publicID, snapshot):
+        '''
+        Args:
+            content_hash (str): source file hash
+            file_format (str):  rdflib format
+            publicID (str):     base for relative IRIs
+            snapshot (dict.):   snapshot as parse_file
+        '''
+        cache_file = self.cache_file(content_hash, file_format, publicID)
+        tmp_file = cache_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+
+    ##############################
+    # drop unused snapshots
+    ##############################
+    def prune(self, content_hashes, file_format, publicID):
+        '''
+        Args:
+            content_hashes (iterable):  hashes of the files to keep
+            file_format (str):          rdflib format
+            publicID (str):             base for relative IRIs
+
+        Returns:
+           int: number of snapshots removed
+        '''
+        keep = set(os.path.basename(self.cache_file(h, file_format, publicID)) for h in content_hashes)
+
+        count = 0
+        for name in os.listdir(self.location):
+            if name.endswith('.pickle') and name not in keep:
+                os.remove(os.path.join(self.location, name))
+                count += 1
+
+        # return count
+        return count
+
+###########################################
+# end of graph_cache class
+###########################################
+
+################################################################################
+# Class to record loaded files
+################################################################################
+
+
+class file_manifest(object):
+    '''
+    sample instantiation,
+    manifest = file_manifest(location)
+    where,
+    1. location, JSON file for the manifest
+
+    Entries are keyed by file path and hold 'hash', 'mtime', 'size' and
+    'graph' (identifier of the graph the file was loaded into). asserted
+    holds, by graph, the triples of the files that other writes (the store
+    path, forms, SPARQL updates) have also asserted.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, location):
+        '''
+        Args:
+            location (str): manifest file
+        '''
+        self.location = location
+        self.files = {}
+        self.asserted = {}
+
+        # written by the reload and by the store's writers
+        self.lock = threading.RLock()
+
+        # read existing
+        if os.path.isfile(self.location):
+            try:
+                with open(self.location, 'r') as f:
+                    manifest = json.load(f)
+                if isinstance(manifest.get('asserted', None), dict) and isinstance(manifest.get('files', None), dict):
+                    self.files = manifest['files']
+                    self.asserted = manifest['asserted']
+                else:
+                    # files only
+                    self.files = manifest
+            except Exception as ex:
+                logger.error('could not read manifest %s: %s.' % (self.location, str(ex)))
+
+    ##############################
+    # record a loaded file
+    ##############################
+    def update(self, file_path, graph, content_hash):
+        '''
+        Args:
+            file_path (str):    loaded file
+            graph (URIRef):     identifier of graph loaded into
+            content_hash (str): file hash
+        '''
+        stat = os.stat(file_path)
+        with self.lock:
+            self.files.update({file_path: {'hash': content_hash, 'mtime': stat.st_mtime,
+                                           'size': stat.st_size, 'graph': str(graph)}})
+
+    ##############################
+    # is file as recorded?
+    ##############################
+    def unchanged(self, file_path, graph):
+        '''
+        Args:
+            file_path (str):    file to check
+            graph (URIRef):     identifier of graph it loads into
+
+        Returns:
+           bool: True if recorded with the same modification time and size
+        '''
+        entry = self.files.get(file_path, None)
+        if entry is None or entry['graph'] != str(graph):
+            return False
+
+        stat = os.stat(file_path)
+        return entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size
+
+    ##############################
+    # forget a file
+    ##############################
+    def remove(self, file_path):
+        '''
+        Args:
+            file_path (str):    file removed
+        '''
+        with self.lock:
+            self.files.pop(file_path, None)
+
+    ##############################
+    # forget all files
+    ##############################
+    def clear(self):
+        with self.lock:
+            self.files = {}
+            self.asserted = {}
+
+    ##############################
+    # graphs files are loaded into
+    ##############################
+    def graphs(self):
+        '''
+        Returns:
+           set: graph identifiers, as str
+        '''
+        with self.lock:
+            return set(entry['graph'] for entry in self.files.values())
+
+    ##############################
+    # triple asserted by a write
+    ##############################
+    def assert_triple(self, graph, triple):
+        '''
+        Args:
+            graph (URIRef):     graph written to
+            triple (tuple):     file triple the write asserted too
+
+        Returns:
+           bool: True if not already recorded
+        '''
+        row = [term.n3() for term in triple]
+        with self.lock:
+            rows = self.asserted.setdefault(str(graph), [])
+            if row in rows:
+                return False
+            rows.append(row)
+            return True
+
+    def asserted_triples(self, graph):
+        '''
+        Args:
+            graph (URIRef):     graph
+
+        Returns:
+           set: triples of the graph's files that other writes asserted
+        '''
+        with self.lock:
+            rows = list(self.asserted.get(str(graph), []))
+        return set(tuple(from_n3(term) for term in row) for row in rows)
+
+    ##############################
+    # write manifest
+    ##############################
+    def save(self):
+        with self.lock:
+            tmp_file = self.location + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump({'files': self.files, 'asserted': self.asserted}, f, indent=1, sort_keys=True)
+            os.replace(tmp_file, self.location)
+
+###########################################
+# end of file_manifest class
+###########################################
@@ -0,0 +1,372 @@
+'''
+Compiled store plans for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+create_flight/populate_instance interpret the shape dictionaries for every
+stored sample. For a given shape set, sample keys and id the work they do is
+fixed, so it is compiled once into a plan,
+1) the nodes to mint (uri or blank) and the labels they are known by,
+2) the triples to emit, with subjects/objects that are constants, minted
+   nodes or slots filled from the sample dictionary of nodes.
+Running a plan mints the nodes, fills the slots and writes with one addN.
+maxCount checks on nodes that existed before the sample (e.g. the
+observation collection end time) use the cardinality tracker, which only
+reads the store for nodes not created this session.
+'''
+
+# Imports ######################################################################
+import logging
+import re
+
+# RDFLIB
+from rdflib import Literal, URIRef, BNode
+from rdflib.namespace import RDF, SH, XSD
+
+# my imports
+from graph.py_drone_graph_labels import label_dict
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+################################################################################
+# Class to house compiled store plans for drone
+################################################################################
+
+
+class py_drone_graph_plan():
+    '''
+    sample instantiation,
+    d_graph = ldg.py_drone_graph(ontology_myID, load_graph_file)
+
+    Plans are dictionaries,
+    'mints', list of (label, blank node?) for the nodes created per sample
+    'ops', list of (kind, subject, predicate, object, maxCount) where kind
+    is 'add', 'set' or 'bounded' (maxCount checked against the graph at run
+    time) and the terms are ('slot', key), ('mint', index), ('term', node)
+    or, for objects, ('literal', term, datatype).
+    Plans are cached in the shape catalog entry of the shape graph, so are
+    dropped with it when the shapes change.
+    '''
+
+    #################################################
+    # Create all class instances for a sample
+    #################################################
+    def create_flight_from_plan(self, dict_of_nodes, flight_shape, graph, id):
+        '''
+        Equivalent to create_flight, using the compiled plan.
+
+        Args:
+            dict_of_nodes (dict.):  dictionary of nodes related to/part of flight
+            flight_shape (str):     label of the shape graph, e.g. Flight_store
+            graph (rdflib graph):   graph to append to
+            id (int):               instance number, for labels label-id
+
+        Returns:
+           dict.: dict_of_nodes with created nodes, False if no shapes
+        '''
+        plan = self.get_flight_plan(flight_shape, list(dict_of_nodes.keys()), id)
+        if plan is None:
+            print("No flight shapes")
+            return False
+
+        # run it
+        return self.run_flight_plan(plan, dict_of_nodes, graph)
+
+    #################################################
+    # Get plan from the catalog, or compile it
+    #################################################
+    def get_flight_plan(self, flight_label, keys, id):
+        '''
+        Args:
+            flight_label (str): label of the shape graph, e.g. Flight_store
+            keys (list):        keys of the sample dictionary of nodes
+            id (int):           instance number
+
+        Returns:
+           dict.: plan, None if no shapes
+        '''
+        flight_shapes = self.get_flight_shapes(flight_label)
+
+        # did we get any?
+        if len(flight_shapes) == 0:
+            return None
+
+        # plans live with the compiled shapes
+        entry = self.shape_catalog.get(self.BASE.term(flight_label))
+        plans = {} if entry is None else entry.setdefault('plans', {})
+
+        plan_key = (id, tuple(keys))
+        plan = plans.get(plan_key, None)
+        if plan is None:
+            plan = self.compile_flight_plan(flight_shapes, keys, id)
+            plans.update({plan_key: plan})
+
+            logger.info('store plan compiled: %s %d, %d ops.' %
+                        (flight_label, id, len(plan['ops'])))
+
+        # return plan
+        return plan
+
+    #################################################
+    # Compile create_flight for a set of sample keys
+    #################################################
+    def compile_flight_plan(self, flight_shapes, keys, id):
+        '''
+        Args:
+            flight_shapes (dict.):  dictionary of shape dictionaries
+            keys (list):            keys of the sample dictionary of nodes
+            id (int):               instance number
+
+        Returns:
+           dict.: plan
+        '''
+        plan = {'mints': [], 'ops': [], 'counts': {}}
+
+        # symbolic dictionary of nodes
+        nodes = label_dict((key, ('slot', key)) for key in keys)
+
+        # as create_flight
+        for shape_target in flight_shapes.keys():
+            for n in nodes.family(shape_target):
+                self.plan_instance(n, flight_shapes, nodes, plan)
+
+            # also run original call
+            new_label = shape_target
+            if id > 0:
+                new_label = shape_target + '-' + str(id)
+            self.plan_instance(new_label, flight_shapes, nodes, plan)
+
+        # counts only needed while compiling
+        del plan['counts']
+
+        # return plan
+        return plan
+
+    #################################################
+    # Compile populate_instance
+    #################################################
+    def plan_instance(self, label, flight_shapes, nodes, plan):
+        '''
+        Args:
+            label (str):            instance label, label-n for numeric n
+            flight_shapes (dict.):  dictionary of shape dictionaries
+            nodes (dict.):          symbolic dictionary of nodes
+            plan (dict.):           plan to append to
+
+        Returns:
+           tuple: symbolic term for the node
+        '''
+        # label-n?
+        id = 0
+        name_id = label.rsplit('-', 1)
+        shape_target = name_id[0]
+        if len(name_id) > 1:
+            id = int(name_id[1])
+
+        # get shape for shape_target class
+        shape = flight_shapes[shape_target]
+        target_class = shape['target_class']
+
+        # exists? Else mint
+        if label in nodes.keys():
+            node = nodes[label]
+        else:
+            blankNode = 'nodeKind' in shape.keys() and shape['nodeKind'] == str(SH.BlankNode)
+            node = ('mint', len(plan['mints']))
+            plan['mints'].append((label, blankNode))
+
+            self.plan_op(plan, 'add', node, RDF.type, ('term', target_class))
+
+            # multiple inheritance?
+            for tg in shape.get('target_classes', []):
+                if tg != target_class:
+                    self.plan_op(plan, 'add', node, RDF.type, ('term', tg))
+
+            nodes.update({label: node})
+
+        # loop over properties defined in shape
+        for property in shape['properties']:
+            path = URIRef(property['path'])
+
+            # literals
+            if 'datatype' in property.keys():
+                # data available?
+                if property['name'] not in nodes.keys():
+                    # not a violation?
+                    if property['severity'] != str(SH.Violation):
+                        continue
+                    # else raise exception
+                    raise Exception("Property not found:" + property['name'])
+
+                # has value?
+                if 'hasValue' in property.keys():
+                    self.plan_op(plan, 'add', node, path, ('term', Literal(property['hasValue'])))
+                    continue
+
+                datatype = None
+                if property['datatype'] != str(XSD.string):
+                    datatype = URIRef(property['datatype'])
+                value = ('literal', nodes[property['name']], datatype)
+                max_c = property.get('maxCount', None)
+
+                # count for pre-existing nodes is in the graph
+                if node[0] != 'mint':
+                    self.plan_op(plan, 'bounded', node, path, value, max_c)
+                    continue
+
+                # else we know what we created
+                in_count = plan['counts'].get((node, path), 0)
+                if max_c is None:
+                    max_c = in_count + 1
+                if in_count == 1 and max_c == 1:
+                    self.plan_op(plan, 'set', node, path, value)
+                elif in_count < max_c:
+                    self.plan_op(plan, 'add', node, path, value)
+
+            # deal with sh:nodeKind sh:IRI
+            elif 'class' in property.keys():
+                # has value?
+                if 'hasValue' in property.keys():
+                    self.plan_op(plan, 'add', node, path, ('term', URIRef(property['hasValue'])))
+                    continue
+
+                # get dict label
+                prop_label = re.split('[#/]', str(property['class']))[-1]
+                if 'name' in property.keys():
+                    prop_label = property['name']
+
+                if property['nodeKind'] == str(SH.IRI) or property['nodeKind'] == str(SH.BlankNode):
+                    # wildcards, label or label-n
+                    prop_nodes = [nodes[key] for key in nodes.family(prop_label)]
+
+                    # create missing class instance
+                    if not prop_nodes:
+                        new_label = prop_label
+                        if id > 0:
+                            new_label = prop_label + '-' + str(id)
+                        prop_nodes = [self.plan_instance(new_label, flight_shapes, nodes, plan)]
+                        nodes.update({new_label: prop_nodes[0]})
+
+                    for pd in prop_nodes:
+                        self.plan_op(plan, 'add', node, path, pd)
+
+        # return node
+        return node
+
+    ##########################
+    # append op to a plan
+    ##########################
+    def plan_op(self, plan, kind, subject, predicate, object, max_c=None):
+        '''
+        Args:
+            plan (dict.):       plan to append to
+            kind (str):         'add', 'set' or 'bounded'
+            subject (tuple):    symbolic subject
+            predicate (URIRef): predicate
+            object (tuple):     symbolic object
+            max_c (int):        maxCount for 'bounded', None for no limit
+        '''
+        plan['ops'].append((kind, subject, predicate, object, max_c))
+
+        # count objects on created nodes
+        if kind == 'add':
+            plan['counts'][(subject, predicate)] = plan['counts'].get((subject, predicate), 0) + 1
+        elif kind == 'set':
+            plan['counts'][(subject, predicate)] = 1
+
+    #################################################
+    # Run a plan for a sample
+    #################################################
+    def run_flight_plan(self, plan, dict_of_nodes, graph, mint=None, cardinality=None):
+        '''
+        Args:
+            plan (dict.):           compiled plan
+            dict_of_nodes (dict.):  dictionary of nodes related to/part of flight
+            graph (rdflib graph):   graph to append to
+            mint (function):        optional, mint(label, blank node?) returns
+                                    the node for label, default new uuid
+            cardinality (cardinality_tracker): optional, tracker for maxCount
+                                    checks, default the store tracker
+
+        Returns:
+           dict.: dict_of_nodes with created nodes
+        '''
+        if cardinality is None:
+            cardinality = self.cardinality
+
+        # mint nodes
+        minted = []
+        for label, blankNode in plan['mints']:
+            if mint is not None:
+                node = mint(label, blankNode)
+            elif blankNode:
+                node = BNode()
+            else:
+                node = self.BASE.term(self.generate_uuid())
+            minted.append(node)
+            dict_of_nodes.update({label: node})
+
+        # symbolic term to node
+        def resolve(term):
+            if term[0] == 'slot':
+                return dict_of_nodes[term[1]]
+            if term[0] == 'mint':
+                return minted[term[1]]
+            if term[0] == 'literal':
+                if term[2] is None:
+                    return Literal(resolve(term[1]))
+                return Literal(resolve(term[1]), datatype=term[2])
+            return term[1]
+
+        # triples to add, by subject/predicate
+        pending = {}
+
+        for kind, subject, predicate, object, max_c in plan['ops']:
+            s = resolve(subject)
+            o = resolve(object)
+            objects = pending.setdefault((s, predicate), [])
+
+            # check maxcount against the graph, written objects are tracked
+            if kind == 'bounded':
+                if s in cardinality.nodes:
+                    in_count = cardinality.count(graph, s, predicate)
+                else:
+                    in_count = len([e for e in graph.objects(s, predicate) if e not in objects]) + \
+                        len(objects)
+                if max_c is None:
+                    max_c = in_count + 1
+                if in_count == 1 and max_c == 1:
+                    kind = 'set'
+                elif in_count < max_c:
+                    kind = 'add'
+                else:
+                    continue
+
+                # record it
+                if kind == 'set':
+                    cardinality.set(graph, s, predicate, o)
+                else:
+                    cardinality.add(graph, s, predicate, o)
+
+                # replacing a value in the graph?
+                if kind == 'set' and not objects:
+                    graph.set((s, predicate, o))
+                    continue
+
+            # add or replace
+            if kind == 'set':
+                objects[:] = [o]
+            elif o not in objects:
+                objects.append(o)
+
+        # write
+        graph.addN((s, p, o, graph) for (s, p), objects in pending.items() for o in objects)
+
+        # return updated dictionary
+        return dict_of_nodes
+
+###########################################
+# end of py_drone_graph_plan class
+###########################################
@@ -0,0 +1,283 @@
+'''
+SPARQL query profiling for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+A query_profile, entered on the thread evaluating a query, times each
+algebra operator through rdflib's CUSTOM_EVALS hook: the hook hands the
+operator back to rdflib's own evaluation and times the call and each
+solution it yields. Times are inclusive of the operators below. Statements
+sent to the database by rdflib-sqlalchemy are counted from SQLAlchemy's
+cursor events. Queries slower than a threshold are appended to a
+slow_query_log as JSON lines.
+'''
+
+# Imports ######################################################################
+import json
+import logging
+import threading
+import time
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# profile of the query on this thread
+profile_local = threading.local()
+
+##############################
+# CUSTOM_EVALS hook
+##############################
+def profile_eval(ctx, part):
+    '''
+    Args:
+        ctx (QueryContext):     evaluation context
+        part (CompValue):       algebra operator
+
+    Returns:
+       timed solutions of the operator
+
+    Raises:
+        NotImplementedError to leave the operator to rdflib
+    '''
+    profile = getattr(profile_local, 'profile', None)
+    if profile is None:
+        raise NotImplementedError()
+
+    # second pass, rdflib evaluates it
+    if profile.skip is part:
+        profile.skip = None
+        raise NotImplementedError()
+
+    from rdflib.plugins.sparql.evaluate import evalPart
+
+    profile.skip = part
+    start = time.perf_counter()
+    try:
+        solutions = evalPart(ctx, part)
+    finally:
+        profile.skip = None
+
+    # return timed
+    return profile.timed(part, solutions, time.perf_counter() - start)
+
+##############################
+# SQLAlchemy cursor event
+##############################
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    '''
+    Counts a statement for the profile on this thread.
+    '''
+    profile = getattr(profile_local, 'profile', None)
+    if profile is not None:
+        profile.sql_statements += 1
+
+################################################################################
+# Class to profile a query
+################################################################################
+
+
+class query_profile(object):
+    '''
+    sample instantiation,
+    with query_profile(store) as profile:
+        result = graph.query(prepared)
+        len(result)
+    tree = profile.algebra(prepared.algebra)
+    where,
+    1. store, the store queried, statements are counted if it has a
+       SQLAlchemy engine
+    '''
+
+    # profiles running, the hook is installed while any are
+    active = 0
+    lock = threading.Lock()
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, store=None):
+        '''
+        Args:
+            store (rdflib Store):   store queried
+        '''
+        # id of operator to [operator, calls, solutions, seconds]
+        self.parts = {}
+        self.skip = None
+
+        # count statements? None if not an SQL store
+        self.sql_statements = None
+        engine = getattr(store, 'engine', None)
+        if engine is not None:
+            from sqlalchemy import event
+            if not event.contains(engine, 'before_cursor_execute', count_statement):
+                event.listen(engine, 'before_cursor_execute', count_statement)
+            self.sql_statements = 0
+
+    ##########################
+    # start on this thread
+    ##########################
+    def __enter__(self):
+        from rdflib.plugins.sparql import CUSTOM_EVALS
+
+        with query_profile.lock:
+            query_profile.active += 1
+            CUSTOM_EVALS['profile'] = profile_eval
+
+        profile_local.profile = self
+        return self
+
+    ##########################
+    # stop
+    ##########################
+    def __exit__(self, exc_type, exc_value, traceback):
+        from rdflib.plugins.sparql import CUSTOM_EVALS
+
+        profile_local.profile = None
+
+        with query_profile.lock:
+            query_profile.active -= 1
+            if not query_profile.active:
+                CUSTOM_EVALS.pop('profile', None)
+
+    ##########################
+    # time an operator
+    ##########################
+    def timed(self, part, solutions, elapsed):
+        '''
+        Args:
+            part (CompValue):   algebra operator
+            solutions:          what rdflib returned for it
+            elapsed (float):    seconds in the call
+
+        Returns:
+           the solutions, timed as they are read
+        '''
+        entry = self.parts.setdefault(id(part), [part, 0, 0, 0.0])
+        entry[1] += 1
+        entry[3] += elapsed
+
+        # query results are dict.s
+        if isinstance(solutions, dict):
+            return solutions
+
+        # return timed
+        return self.iterate(entry, solutions)
+
+    ##########################
+    # time the solutions
+    ##########################
+    def iterate(self, entry, solutions):
+        '''
+        Args:
+            entry (list):           operator statistics
+            solutions (iterable):   operator solutions
+
+        Returns:
+           generator: the solutions
+        '''
+        solutions = iter(solutions)
+        while True:
+            start = time.perf_counter()
+            try:
+                solution = next(solutions)
+            except StopIteration:
+                entry[3] += time.perf_counter() - start
+                return
+            entry[3] += time.perf_counter() - start
+            entry[2] += 1
+            yield solution
+
+    ##########################
+    # algebra with timings
+    ##########################
+    def algebra(self, part):
+        '''
+        Args:
+            part (CompValue):   query algebra
+
+        Returns:
+           dict.: operator name, its statistics and the operators below
+        '''
+        from rdflib.plugins.sparql.parserutils import CompValue
+
+        node = {'operator': part.name}
+
+        entry = self.parts.get(id(part), None)
+        if entry is not None:
+            node.update({'calls': entry[1], 'solutions': entry[2], 'time': round(entry[3], 6)})
+
+        # patterns of a BGP
+        if part.name == 'BGP':
+            node.update({'triples': [' '.join(term.n3() for term in triple) for triple in part.triples]})
+
+        children = [self.algebra(part[key]) for key in ['p', 'p1', 'p2']
+                    if key in part and isinstance(part[key], CompValue)]
+        if children:
+            node.update({'children': children})
+
+        # return tree
+        return node
+
+###########################################
+# end of query_profile class
+###########################################
+
+################################################################################
+# Class to log slow queries
+################################################################################
+
+
+class slow_query_log(object):
+    '''
+    sample instantiation,
+    log = slow_query_log('db/landrs_test_slow_queries.log', 1.0)
+    where,
+    1. location, file the JSON lines are appended to
+    2. threshold, seconds above which a query is logged
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, location, threshold):
+        '''
+        Args:
+            location (str):     log file
+            threshold (float):  seconds
+        '''
+        self.location = location
+        self.threshold = threshold
+        self.lock = threading.Lock()
+
+    ##########################
+    # log if slow
+    ##########################
+    def record(self, query, elapsed, stats=None):
+        '''
+        Args:
+            query (str):        sparql query
+            elapsed (float):    seconds taken
+            stats (dict.):      optional, counts for the query
+
+        Returns:
+           bool: True if logged
+        '''
+        if elapsed < self.threshold:
+            return False
+
+        entry = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'elapsed': round(elapsed, 3), 'query': query}
+        entry.update(stats or {})
+
+        with self.lock:
+            with open(self.location, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+
+        logger.warning('slow query, %.3fs: %s' % (elapsed, query))
+
+        # logged
+        return True
+
+###########################################
+# end of slow_query_log class
+###########################################
@@ -0,0 +1,248 @@
+'''
+Named query registry for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+Queries are parsed and translated to algebra once, with prepareQuery, and
+evaluated with initBindings for their parameters. The same query text is
+used against ld.landrs.org, with the parameters bound by a VALUES block, so
+no query string is built by hand. Queries are served on
+/api/v1/query/<name>?param=value.
+'''
+
+# Imports ######################################################################
+import logging
+import threading
+
+# RDFLIB
+from rdflib import Literal, URIRef
+from rdflib.namespace import RDF, RDFS, XSD
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# prefixes for the named queries
+query_prefixes = {'rdf': str(RDF), 'rdfs': str(RDFS), 'xsd': str(XSD),
+                  'sosa': 'http://www.w3.org/ns/sosa/',
+                  'landrs': 'http://schema.landrs.org/schema/',
+                  'rdfg': 'http://www.w3.org/2004/03/trix/rdfg-1/',
+                  'dcterms': 'http://purl.org/dc/terms/',
+                  'prov': 'http://www.w3.org/ns/prov#',
+                  'qudt': 'http://qudt.org/2.1/schema/qudt#',
+                  'geosparql': 'http://www.opengis.net/ont/geosparql#'}
+
+# built in queries, parameters are 'iri' or 'literal'
+named_queries = {
+    'node_type': {
+        'description': 'most specific type of a node',
+        'params': {'node': 'iri'},
+        'query': 'SELECT ?type WHERE { '
+                 '  ?node a ?type . '
+                 '  FILTER NOT EXISTS { '
+                 '    ?subtype ^a ?node ; rdfs:subClassOf ?type . '
+                 '    FILTER ( ?subtype != ?type ) '
+                 '  } '
+                 '}'},
+    'node': {
+        'description': 'properties of a node',
+        'params': {'node': 'iri'},
+        'query': 'SELECT ?type ?attribute WHERE { ?node ?type ?attribute . }'},
+    'attached_sensors': {
+        'description': 'sensors attached to a drone',
+        'params': {'drone': 'iri'},
+        'query': 'SELECT DISTINCT ?sensor WHERE { '
+                 '  ?x landrs:isPartOf ?drone . '
+                 '  ?h landrs:isPartOf ?x . '
+                 '  ?h sosa:hosts ?sensor . '
+                 '  ?sensor a landrs:Sensor . '
+                 '}'},
+    'data_graphs': {
+        'description': 'data store graphs and their labels',
+        'params': {},
+        'query': 'SELECT ?graph ?label WHERE { '
+                 '  ?graph a rdfg:Graph . '
+                 '  OPTIONAL { ?graph rdfs:label ?label } '
+                 '}'},
+    'observations': {
+        'description': 'observations of a collection',
+        'params': {'collection': 'iri'},
+        'query': 'SELECT ?observation ?sensor ?time ?value ?unit WHERE { '
+                 '  ?collection sosa:hasMember ?observation . '
+                 '  ?observation sosa:madeBySensor ?sensor ; sosa:resultTime ?time . '
+                 '  OPTIONAL { ?observation sosa:hasResult ?result . '
+                 '             ?result qudt:numericValue ?value . '
+                 '             OPTIONAL { ?result qudt:unit ?unit } } '
+                 '} ORDER BY ?time'},
+}
+
+################################################################################
+# Class to hold prepared queries
+################################################################################
+
+
+class query_registry(object):
+    '''
+    sample instantiation,
+    queries = query_registry()
+    result = queries.query(graph, 'node', {'node': 'http://ld.landrs.org/id/x'})
+
+    Queries are prepared on first use.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, queries=named_queries):
+        '''
+        Args:
+            queries (dict.):    named queries, as named_queries
+        '''
+        self.queries = dict(queries)
+        self.prepared = {}
+        self.lock = threading.Lock()
+
+    ##############################
+    # add a query
+    ##############################
+    def register(self, name, query, params=None, description=''):
+        '''
+        Args:
+            name (str):         query name
+            query (str):        sparql, parameters as variables
+            params (dict.):     parameter name to 'iri' or 'literal'
+            description (str):  what it returns
+        '''
+        with self.lock:
+            self.queries.update({name: {'query': query, 'params': params or {},
+                                        'description': description}})
+            self.prepared.pop(name, None)
+
+    ##############################
+    # list queries
+    ##############################
+    def list(self):
+        '''
+        Returns:
+           dict.: name to description and parameters
+        '''
+        return {name: {'description': q['description'], 'params': list(q['params'])}
+                for name, q in self.queries.items()}
+
+    ##############################
+    # get prepared query
+    ##############################
+    def prepare(self, name):
+        '''
+        Args:
+            name (str): query name
+
+        Returns:
+           rdflib Query: parsed and translated query
+
+        Raises:
+            KeyError if not registered
+        '''
+        with self.lock:
+            prepared = self.prepared.get(name, None)
+            if prepared is None:
+                # loaded on first use
+                from rdflib.plugins.sparql import prepareQuery
+                prepared = prepareQuery(self.queries[name]['query'], initNs=query_prefixes)
+                self.prepared.update({name: prepared})
+
+                logger.info('query prepared: %s.' % name)
+
+        # return query
+        return prepared
+
+    ##############################
+    # parameters to nodes
+    ##############################
+    def bindings(self, name, params):
+        '''
+        Args:
+            name (str):         query name
+            params (dict.):     parameter values, str or rdflib nodes
+
+        Returns:
+           dict.: variable name to node
+
+        Raises:
+            KeyError if not registered, Exception for a missing parameter
+        '''
+        bindings = {}
+        for param, kind in self.queries[name]['params'].items():
+            value = params.get(param, None)
+            if value is None:
+                raise Exception("missing parameter: " + param)
+
+            if not isinstance(value, (URIRef, Literal)):
+                value = URIRef(value) if kind == 'iri' else Literal(value)
+            bindings.update({param: value})
+
+        # return bindings
+        return bindings
+
+    ##############################
+    # result cache key
+    ##############################
+    def cache_key(self, name, bindings):
+        '''
+        Args:
+            name (str):         query name
+            bindings (dict.):   variable name to node, from bindings
+
+        Returns:
+           str: the query and its parameters by name
+        '''
+        return name + ' ' + ' '.join('%s=%s' % (k, v) for k, v in sorted((k, v.n3()) for k, v in bindings.items()))
+
+    ##############################
+    # run on a local graph
+    ##############################
+    def query(self, graph, name, params=None):
+        '''
+        Args:
+            graph (Graph):      graph to query
+            name (str):         query name
+            params (dict.):     parameter values
+
+        Returns:
+           rdflib Result: query result
+        '''
+        return graph.query(self.prepare(name), initBindings=self.bindings(name, params or {}))
+
+    ##############################
+    # query text for an endpoint
+    ##############################
+    def remote(self, name, params=None):
+        '''
+        Args:
+            name (str):         query name
+            params (dict.):     parameter values
+
+        Returns:
+           str: sparql with the parameters bound by a VALUES block at the
+                start of the WHERE clause
+        '''
+        query = self.queries[name]['query']
+        bindings = self.bindings(name, params or {})
+
+        # prefixes used
+        prologue = ''.join('PREFIX %s: <%s> ' % (prefix, ns) for prefix, ns in query_prefixes.items()
+                           if prefix + ':' in query)
+
+        # bind parameters
+        if bindings:
+            variables = ' '.join('?' + v for v in bindings)
+            values = ' '.join(node.n3() for node in bindings.values())
+            pos = query.index('{') + 1
+            query = query[:pos] + ' VALUES (%s) { (%s) } ' % (variables, values) + query[pos:]
+
+        # return text
+        return prologue + query
+
+###########################################
+# end of query_registry class
+###########################################
@@ -0,0 +1,177 @@
+'''
+SPARQL result cache for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+The yasgui page and dashboards re-issue the same queries every few seconds.
+The cache keeps the latest results in a bounded LRU, keyed by the query
+text (whitespace normalized outside of string literals) and the requested
+content type. Every add or remove on the store increments a generation
+counter, a result is only returned while the generation it was computed at
+is current. The generation also stamps ETags for the sparql endpoint.
+'''
+
+# Imports ######################################################################
+import logging
+import re
+import threading
+import uuid
+from collections import OrderedDict
+
+# RDFLIB
+from rdflib.store import TripleAddedEvent, TripleRemovedEvent
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# string literals in a query, long forms first
+query_literals = re.compile(r'("""(?:[^\\]|\\.)*?"""|\'\'\'(?:[^\\]|\\.)*?\'\'\'|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')', re.DOTALL)
+
+##############################
+# normalize query text
+##############################
+def normalize_query(query):
+    '''
+    Args:
+        query (str):    sparql query
+
+    Returns:
+       str: query with whitespace outside string literals collapsed
+    '''
+    parts = query_literals.split(query.strip())
+
+    # odd parts are the literals
+    return ''.join(part if i % 2 else re.sub(r'\s+', ' ', part) for i, part in enumerate(parts))
+
+################################################################################
+# Class to hold query results
+################################################################################
+
+
+class result_cache(object):
+    '''
+    sample instantiation,
+    cache = result_cache(store, 128)
+    where,
+    1. store, the rdflib store queried. The cache subscribes to the store's
+       add/remove events to count generations.
+    2. size, maximum number of results held
+    3. max_bytes, largest streamed result kept
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, store, size=128, max_bytes=1000000):
+        '''
+        Args:
+            store (rdflib Store):   store to watch for changes
+            size (int):             maximum number of results
+            max_bytes (int):        largest streamed result kept
+        '''
+        self.size = size
+        self.max_bytes = max_bytes
+        self.generation = 0
+
+        # ETags from an earlier run must not match
+        self.epoch = uuid.uuid4().hex[:8]
+
+        # results by key, least recently used first
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+        # watch for graph changes
+        store.dispatcher.subscribe(TripleAddedEvent, self.graph_changed)
+        store.dispatcher.subscribe(TripleRemovedEvent, self.graph_changed)
+
+    ##########################
+    # key for a query
+    ##########################
+    def key(self, query, return_type, dataset=None):
+        '''
+        Args:
+            query (str):        sparql query
+            return_type (str):  requested content type
+            dataset (dict.):    optional, 'default' and 'named' graph IRIs
+                                from the request
+
+        Returns:
+           tuple: cache key
+        '''
+        if dataset:
+            dataset = tuple(tuple(dataset.get(k, None) or []) for k in ['default', 'named'])
+
+        # return key
+        return normalize_query(query), return_type, dataset or None
+
+    ##########################
+    # get a result
+    ##########################
+    def get(self, key):
+        '''
+        Args:
+            key (tuple):    cache key
+
+        Returns:
+           result as put, None if not cached or stale
+        '''
+        with self.lock:
+            entry = self.results.get(key, None)
+            if entry is None:
+                return None
+
+            # written since?
+            if entry[0] != self.generation:
+                self.results.pop(key)
+                return None
+
+            self.results.move_to_end(key)
+            return entry[1]
+
+    ##########################
+    # add a result
+    ##########################
+    def put(self, key, result, generation):
+        '''
+        Args:
+            key (tuple):        cache key
+            result:             query result
+            generation (int):   generation when the query started
+        '''
+        with self.lock:
+            # written while running?
+            if generation != self.generation:
+                return
+
+            self.results.update({key: (generation, result)})
+            self.results.move_to_end(key)
+            while len(self.results) > self.size:
+                self.results.popitem(last=False)
+
+    ##########################
+    # ETag for a result
+    ##########################
+    def etag(self, return_type):
+        '''
+        Args:
+            return_type (str):  requested content type
+
+        Returns:
+           str: ETag, changes with the generation
+        '''
+        return '"%s-%d-%x"' % (self.epoch, self.generation, hash(return_type) & 0xffff)
+
+    ###########################################
+    # store event handler, next generation
+    ###########################################
+    def graph_changed(self, event):
+        '''
+        Args:
+            event (rdflib Event):   TripleAddedEvent or TripleRemovedEvent
+        '''
+        self.generation += 1
+
+###########################################
+# end of result_cache class
+###########################################
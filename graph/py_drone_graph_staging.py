@@ -0,0 +1,582 @@
+'''
+Staged writes for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+The store path writes triple by triple, each add being a separate
+rdflib-sqlalchemy transaction. A staged_graph stands in for a graph during
+the store path, buffering adds and sets in memory. A graph_staging area
+holds the staged graphs of several datasets and commits them to the store
+with a single addN, or to an enclosing staging area so a failed sample can be
+discarded without touching the rest of a batch.
+
+Reads see the staged writes of a staging area (the hot tier) through a
+staged_store, the store with a snapshot of the staged writes applied, so
+reads need not commit them first.
+
+A commit replaces objects (removes) and adds in one store transaction. The
+rdflib-sqlalchemy store begins a transaction for each add, addN and remove,
+store_transaction has them share the connection of a single transaction in
+the committing thread, so a failed commit leaves the store untouched.
+'''
+
+# Imports ######################################################################
+import contextlib
+import logging
+import threading
+
+# RDFLIB
+from rdflib import plugin
+from rdflib.graph import Graph, ConjunctiveGraph
+from rdflib.store import Store
+
+# my imports
+from graph.py_drone_graph_execution import read_store
+from graph.py_drone_graph_changes import change_transaction
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+################################################################################
+# Class to buffer writes to a graph
+################################################################################
+
+
+class staged_graph(object):
+    '''
+    sample instantiation,
+    s_graph = staged_graph(graph)
+    where,
+    1. graph, the rdflib graph (or staged_graph) to write to on commit
+
+    Supports the subset of the rdflib Graph interface used by the store path,
+    add, addN, set and objects (with subject and predicate given).
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, parent):
+        '''
+        Args:
+            parent (Graph):     graph or staged_graph the writes are for
+        '''
+        self.parent = parent
+        self.identifier = parent.identifier
+
+        # staged objects keyed by (subject, predicate)
+        self.added = {}
+
+        # (subject, predicate) pairs whose parent objects are replaced
+        self.cleared = set()
+
+        # staged triple count
+        self.count = 0
+
+    ##############
+    # add a triple
+    ##############
+    def add(self, triple):
+        '''
+        Args:
+            triple (tuple): (s, p, o)
+        '''
+        s, p, o = triple
+        objects = self.added.setdefault((s, p), [])
+        if o not in objects:
+            objects.append(o)
+            self.count += 1
+
+    ################
+    # add quads
+    ################
+    def addN(self, quads):
+        '''
+        Args:
+            quads (iterable): (s, p, o, c), c is ignored
+        '''
+        for s, p, o, c in quads:
+            self.add((s, p, o))
+
+    #####################################
+    # set a triple, replaces the objects
+    #####################################
+    def set(self, triple):
+        '''
+        Args:
+            triple (tuple): (s, p, o)
+        '''
+        s, p, o = triple
+        self.count += 1 - len(self.added.get((s, p), []))
+        self.added.update({(s, p): [o]})
+        self.cleared.add((s, p))
+
+    ###############################
+    # objects for subject/predicate
+    ###############################
+    def objects(self, subject, predicate):
+        '''
+        Args:
+            subject (Node):     subject, required
+            predicate (Node):   predicate, required
+
+        Returns:
+           generator: objects, parent objects first
+        '''
+        staged = self.added.get((subject, predicate), [])
+
+        # parent objects unless replaced
+        if (subject, predicate) not in self.cleared:
+            for o in self.parent.objects(subject, predicate):
+                if o not in staged:
+                    yield o
+
+        for o in staged:
+            yield o
+
+    #########################
+    # staged triple count
+    #########################
+    def __len__(self):
+        return self.count
+
+    #################################
+    # staged graphs are never empty
+    #################################
+    def __bool__(self):
+        return True
+
+    ###########################
+    # staged triples as quads
+    ###########################
+    def quads(self):
+        '''
+        Returns:
+           generator: (s, p, o, parent) for each staged triple
+        '''
+        for (s, p), objects in self.added.items():
+            for o in objects:
+                yield (s, p, o, self.parent)
+
+    ##############################
+    # push writes to the parent
+    ##############################
+    def commit(self):
+        '''
+        Pushes the staged writes to the parent, one addN if the parent is a
+        graph.
+        '''
+        if isinstance(self.parent, staged_graph):
+            # replaced objects
+            for s, p in self.cleared:
+                self.parent.set((s, p, self.added[(s, p)][0]))
+
+            # and the rest
+            for s, p, o, c in self.quads():
+                self.parent.add((s, p, o))
+        else:
+            with store_transaction(self.parent.store):
+                # replaced objects
+                for s, p in self.cleared:
+                    self.parent.remove((s, p, None))
+
+                self.parent.addN(self.quads())
+
+        # clear
+        self.discard()
+
+    ##################
+    # drop the writes
+    ##################
+    def discard(self):
+        self.added = {}
+        self.cleared = set()
+        self.count = 0
+
+###########################################
+# end of staged_graph class
+###########################################
+
+################################################################################
+# Class to hold the staged graphs of a store operation
+################################################################################
+
+
+class graph_staging(object):
+    '''
+    sample instantiation,
+    staging = graph_staging()
+    sample_staging = graph_staging(staging)
+    where,
+    1. parent, optional enclosing graph_staging to commit to
+
+    stage(graph) returns the staged_graph to write to in place of graph.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, parent=None):
+        '''
+        Args:
+            parent (graph_staging): enclosing staging, None to commit to store
+        '''
+        self.parent = parent
+
+        # staged graphs keyed by graph identifier
+        self.graphs = {}
+
+        # index entries for nodes/graphs the staged writes create
+        self.indexed = []
+
+        # snapshot for reads, until the next commit into it
+        self.view = None
+
+    ##############################
+    # get staged graph for graph
+    ##############################
+    def stage(self, graph):
+        '''
+        Args:
+            graph (Graph):  store backed graph to stage writes for
+
+        Returns:
+           staged_graph: graph to write to
+        '''
+        s_graph = self.graphs.get(graph.identifier, None)
+        if s_graph is None:
+            # stage on top of the enclosing staging if we have one
+            target = graph
+            if self.parent is not None:
+                target = self.parent.stage(graph)
+            s_graph = staged_graph(target)
+            self.graphs.update({graph.identifier: s_graph})
+
+        # return it
+        return s_graph
+
+    ##########################################
+    # index entry dropped with the writes
+    ##########################################
+    def index(self, index, key, value):
+        '''
+        Args:
+            index (dict.):  index of nodes or graphs, e.g. graph_index
+            key (Node):     key to add
+            value (object): value for key, valid once the writes commit
+        '''
+        index.update({key: value})
+        self.indexed.append((index, key))
+
+    #########################
+    # staged triple count
+    #########################
+    def __len__(self):
+        return sum(len(s_graph) for s_graph in self.graphs.values())
+
+    ##############################
+    # staged writes, for reads
+    ##############################
+    def snapshot(self):
+        '''
+        Taken again after a commit into, or out of, this staging. Call with
+        writes to the staging locked.
+
+        Returns:
+           tuple: in memory store of the staged triples, in their graphs, and
+                  dict. of graph identifier to the (subject, predicate) pairs
+                  whose store objects are replaced
+        '''
+        if self.view is None:
+            added = plugin.get('IOMemory', Store)()
+            cleared = {}
+            for s_graph in self.graphs.values():
+                context = Graph(added, identifier=s_graph.identifier)
+                added.addN((s, p, o, context) for s, p, o, c in s_graph.quads())
+                cleared.update({s_graph.identifier: set(s_graph.cleared)})
+            self.view = (added, cleared)
+
+        # return snapshot
+        return self.view
+
+    ##########################################
+    # commit all staged graphs, one addN
+    ##########################################
+    def commit(self):
+        '''
+        Returns:
+           int: number of triples committed
+        '''
+        count = len(self)
+
+        # nested? Push to enclosing staging
+        if self.parent is not None:
+            for s_graph in self.graphs.values():
+                s_graph.commit()
+            self.parent.indexed.extend(self.indexed)
+            self.parent.view = None
+
+        elif self.graphs:
+            # all graphs share the store, single transaction
+            store = next(iter(self.graphs.values())).parent.store
+            with store_transaction(store):
+                # replaced objects first
+                for s_graph in self.graphs.values():
+                    for s, p in s_graph.cleared:
+                        s_graph.parent.remove((s, p, None))
+
+                store.addN(quad for s_graph in self.graphs.values() for quad in s_graph.quads())
+
+            logger.info('staged triples committed: %d.' % count)
+
+        # clear
+        self.graphs = {}
+        self.indexed = []
+        self.view = None
+
+        # return count
+        return count
+
+    ##################
+    # drop the writes
+    ##################
+    def discard(self):
+        self.graphs = {}
+        self.view = None
+
+        # and what they created
+        for index, key in self.indexed:
+            index.pop(key, None)
+        self.indexed = []
+
+###########################################
+# end of graph_staging class
+###########################################
+
+################################################################################
+# Class to read a store with staged writes
+################################################################################
+
+
+class staged_store(read_store):
+    '''
+    sample instantiation,
+    store = staged_store(d_graph.store, *hot_tier.snapshot())
+
+    Read only, the union of the store and a snapshot of staged writes, less
+    the store objects the staged writes replace. A triple both staged and in
+    the store (the staging committed since the snapshot) is read once.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, store, added, cleared):
+        '''
+        Args:
+            store (rdflib Store):   store to read
+            added (rdflib Store):   staged triples, from graph_staging.snapshot
+            cleared (dict.):        graph identifier to replaced (subject,
+                                    predicate) pairs, from snapshot
+        '''
+        super().__init__(store)
+        self.added = added
+        self.cleared = cleared
+
+    ##########################
+    # lookup
+    ##########################
+    def triples(self, triple_pattern, context=None):
+        identifier = None if context is None else context.identifier
+        staged_context = None if identifier is None else Graph(self.added, identifier=identifier)
+
+        # staged triples and their graphs
+        staged = {}
+        for triple, contexts in self.added.triples(triple_pattern, staged_context):
+            staged.update({triple: [c.identifier for c in contexts]})
+
+        for triple, contexts in self.store.triples(triple_pattern, context):
+            # graphs not replaced by the staged writes
+            s, p, o = triple
+            graphs = [c.identifier if isinstance(c, Graph) else c for c in contexts]
+            graphs = [g for g in graphs if (s, p) not in self.cleared.get(g, ())]
+
+            # staged too?
+            graphs.extend(g for g in staged.pop(triple, []) if g not in graphs)
+            if graphs:
+                yield triple, (Graph(self, identifier=g) for g in graphs)
+
+        for triple, graphs in staged.items():
+            yield triple, (Graph(self, identifier=g) for g in graphs)
+
+    def triples_choices(self, triple, context=None):
+        # by the lookups of the base store
+        return Store.triples_choices(self, triple, context)
+
+    def __len__(self, context=None):
+        # the store count, less the store objects replaced, plus the staged
+        # triples not stored already, per staged graph
+        identifier = None if context is None else context.identifier
+        graphs = set(self.cleared)
+        graphs.update(c.identifier for c in self.added.contexts())
+        if identifier is not None:
+            graphs &= {identifier}
+
+        length = self.store.__len__(context)
+        for g in graphs:
+            store_context = Graph(self.store, identifier=g)
+            cleared = self.cleared.get(g, ())
+            for s, p in cleared:
+                length -= sum(1 for t in self.store.triples((s, p, None), store_context))
+            for triple, contexts in self.added.triples((None, None, None), Graph(self.added, identifier=g)):
+                s, p, o = triple
+                if (s, p) in cleared or not any(True for t in self.store.triples(triple, store_context)):
+                    length += 1
+        return length
+
+    def contexts(self, triple=None):
+        graphs = set()
+        if triple is None:
+            for context in self.store.contexts():
+                graphs.add(context.identifier if isinstance(context, Graph) else context)
+            for context in self.added.contexts():
+                graphs.add(context.identifier)
+        else:
+            # graphs holding the triple, less replaced objects
+            for t, contexts in self.triples(triple):
+                graphs.update(c.identifier for c in contexts)
+
+        for g in graphs:
+            yield Graph(self, identifier=g)
+
+###########################################
+# end of staged_store class
+###########################################
+
+##############################
+# graph with staged writes
+##############################
+def staged_view(graph, staging, lock):
+    '''
+    Args:
+        graph (ConjunctiveGraph):   graph over the store
+        staging (graph_staging):    staged writes, e.g. the hot tier
+        lock (RLock):               held while writing to staging
+
+    Returns:
+       ConjunctiveGraph: graph, read with the staged writes
+    '''
+    with lock:
+        if not staging.graphs:
+            return graph
+        added, cleared = staging.snapshot()
+
+    # return view
+    store = staged_store(graph.store, added, cleared)
+    return ConjunctiveGraph(store, identifier=graph.default_context.identifier)
+
+################################################################################
+# Class to share a transaction between store calls
+################################################################################
+
+
+class transaction_engine(object):
+    '''
+    sample instantiation,
+    store.engine = transaction_engine(store.engine)
+    where,
+    1. engine, the SQLAlchemy engine of a rdflib-sqlalchemy store
+
+    Stands in for the engine. In a thread that has begun a transaction begin
+    and connect return its connection, which the store's add, addN, remove
+    and lookups use in a with block, elsewhere they are the engine's.
+    '''
+
+    #######################
+    # class initialization
+    #######################
+    def __init__(self, engine):
+        '''
+        Args:
+            engine (Engine):    SQLAlchemy engine
+        '''
+        self.engine = engine
+
+        # connection of the transaction in each thread
+        self.local = threading.local()
+
+    ###############################
+    # anything else is the engine's
+    ###############################
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+    #################################
+    # transaction of this thread
+    #################################
+    def connection(self):
+        '''
+        Returns:
+           Connection: of the transaction begun in this thread, or None
+        '''
+        return getattr(self.local, 'connection', None)
+
+    def begin(self):
+        connection = self.connection()
+        if connection is None:
+            return self.engine.begin()
+        return contextlib.nullcontext(connection)
+
+    def connect(self):
+        connection = self.connection()
+        if connection is None:
+            return self.engine.connect()
+        return contextlib.nullcontext(connection)
+
+###########################################
+# end of transaction_engine class
+###########################################
+
+# engines are replaced once
+engine_lock = threading.Lock()
+
+##############################
+# writes in one transaction
+##############################
+@contextlib.contextmanager
+def store_transaction(store):
+    '''
+    with store_transaction(store):
+        store.remove(...)
+        store.addN(...)
+
+    Store writes in the block commit together when it exits, or not at all
+    if it raises, and are logged by the store's change logs once committed.
+    Nested blocks join the outer transaction. Stores without an engine write
+    as they go.
+
+    Args:
+        store (rdflib Store):   store written to
+    '''
+    if getattr(store, 'engine', None) is None:
+        yield
+        return
+
+    # share the engine's transactions
+    with engine_lock:
+        if not isinstance(store.engine, transaction_engine):
+            store.engine = transaction_engine(store.engine)
+    engine = store.engine
+
+    # in one already?
+    if engine.connection() is not None:
+        yield
+        return
+
+    with change_transaction(store), engine.engine.begin() as connection:
+        engine.local.connection = connection
+        try:
+            yield
+        finally:
+            engine.local.connection = None
@@ -21,6 +21,7 @@ import base64
 import uuid
 import logging
 import re
+import copy
 from string import Template
 
 # RDFLIB
@@ -28,14 +29,16 @@ import rdflib
 from rdflib.serializer import Serializer
 from rdflib import plugin, Graph, Literal, URIRef, BNode
 from rdflib.store import Store
-from rdflib.plugins.sparql.processor import processUpdate
-from SPARQLWrapper import SPARQLWrapper, JSON
 from rdflib.graph import Graph, ConjunctiveGraph
 
 # my imports
 from graph.py_drone_graph_core import py_drone_graph_core, LANDRS, LDLBASE
 from graph.py_drone_graph_core import SOSA, QUDT_UNIT, QUDT, GEO, RDFG, \
     ontology_landrs, ontology_myID
+from graph.py_drone_graph_staging import graph_staging
+from graph.py_drone_graph_cardinality import cardinality_tracker
+from graph.py_drone_graph_labels import label_dict
+from graph.py_drone_graph_columnar import observation_view_store
 
 # namespaces from rdflib
 from rdflib.namespace import CSVW, DC, DCAT, DCTERMS, DOAP, FOAF, ODRL2, ORG, OWL, \
@@ -53,6 +56,9 @@ SHACL = rdflib.Namespace('http://www.w3.org/ns/shacl#')
 # setup logging ################################################################
 logger = logging.getLogger(__name__)
 
+# observation view stores kept, latest queried
+max_observation_views = 8
+
 ################################################################################
 # Class to house rdf graph storage functions for drone
 ################################################################################
@@ -91,25 +97,53 @@ class py_drone_graph_store():
     ##################################################
     # store data for sensor, creates SOSA.Observation
     ##################################################
-    def store_data_point(self, values, flight_dict):
+    def store_data_point(self, values, flight_dict, staging=None):
         '''
         Args:
             collection_id (str):    uuid for observation collection
                                     '*' to create new
             value (str):            dictionary values to store, with time
+            staging (graph_staging): optional, stage observation writes
+                                    for a later bulk commit
 
         Returns:
            dict.: query result
         '''
+        # hot tier? Stage the sample on top of it
+        if staging is None and self.hot_tier is not None:
+            with self.hot_tier_lock:
+                sample_staging = graph_staging(self.hot_tier)
+                try:
+                    ret = self.store_data_point(values, flight_dict, sample_staging)
+                except Exception:
+                    sample_staging.discard()
+                    self.cardinality.reset()
+                    raise
+
+                # keep?
+                if ret.get('status', False):
+                    sample_staging.commit()
+
+                    # reads see the hot tier, cached results are stale
+                    if self.result_cache is not None:
+                        self.result_cache.graph_changed(None)
+                else:
+                    sample_staging.discard()
+                    # tracked counts may include dropped writes
+                    self.cardinality.reset()
+
+                # flush at end of store or if full/old
+                if values.get('end_store', False) or self.hot_tier_due():
+                    self.flush_store()
+
+            return ret
+
         # return dict
         ret = {}
 
         # observation_collection
         collection_name = values.get('observation_collection', '*')
 
-        # get obs. col. label
-        the_observation_collection = flight_dict.get('flight_collection', 'the_observation_collection')
-
         # dataset
         dataset = values.get('dataset', None)
 
@@ -117,15 +151,18 @@ class py_drone_graph_store():
             ret.update({"status": False, "Error": "no dataset found."})
             return ret
 
-        # get label for sensors in 'per sensor storage' shacl section
-        sensor_label = flight_dict.get('flight_sensor_label', 'sensor_label')
-
         # create?
         if collection_name != '*':
             collection_id_node = URIRef(collection_name) #self.find_node_from_uuid(collection_id) #, collection_type)
-            if (collection_id_node, None, None) not in self.g1:
-                ret.update({"status": False, "Error": "collection not found."})
-                return ret
+
+            # known collection? Else check graph and index
+            collection_type = self.collection_index.get(collection_id_node, None)
+            if collection_type is None:
+                if (collection_id_node, None, None) not in self.g1:
+                    ret.update({"status": False, "Error": "collection not found."})
+                    return ret
+                collection_type = self.g1.value(collection_id_node, RDF.type)
+                self.collection_index.update({collection_id_node: collection_type})
 
         else:  # collection_id is '*'
             # find existing graph associated with obs. coll. or create
@@ -133,28 +170,52 @@ class py_drone_graph_store():
             collection_id = self.generate_uuid()
             ret.update({"collection uuid": collection_id})
 
-            # create new node in graph
+            # create new node in graph, staged with the sample
             collection_id_node = self.BASE.term(collection_id)
+            self.cardinality.created(collection_id_node)
             # TODO: do we nned to add to both graphs?
-            self.g1.add((collection_id_node, RDF.type, SOSA.ObservationCollection))
-            self.g1.add((collection_id_node, RDFS.label,
-                         Literal("Drone data collection")))
+            g1 = self.staged(self.g1, staging)
+            g1.add((collection_id_node, RDF.type, SOSA.ObservationCollection))
+            g1.add((collection_id_node, RDFS.label,
+                    Literal("Drone data collection")))
+            collection_type = SOSA.ObservationCollection
+            if staging is None:
+                self.collection_index.update({collection_id_node: collection_type})
+            else:
+                staging.index(self.collection_index, collection_id_node, collection_type)
+            self.cardinality.add(self.g1, collection_id_node, RDFS.label,
+                                 Literal("Drone data collection"))
 
         # if we get here find or create graph to store
-        collection_type = self.g1.value(collection_id_node, RDF.type)
-        graph, first_store = self.observation_collection_graph(collection_id_node, collection_type, dataset)
-        if not graph:
+        graph, first_store = self.observation_collection_graph(collection_id_node, collection_type, dataset,
+                                                               staging)
+        if graph is None:
             ret.update({"status": False, "Error": "could not attach graph."})
             return ret
 
+        # write to staging?
+        if staging is not None:
+            graph = staging.stage(graph)
+
         # end store?
         if 'end_store' in values.keys():
             # bail if end
             if values['end_store']:
+                # end of session, forget created nodes
+                self.cardinality.reset()
+
                 # ended if here
                 ret.update({"status": True, "action": 'end store'})
                 return ret
 
+        # columnar observation store?
+        if self.observation_store is not None and dataset:
+            self.observation_store.store(dataset, collection_id_node, flight_dict, values)
+
+            # return success
+            ret.update({"status": True, 'observation_collection': collection_id_node})
+            return ret
+
         ## create dictionary of nodes #########################################
 
         # get sensor data from stream
@@ -163,68 +224,244 @@ class py_drone_graph_store():
         # loop over sensors, create sub graphs
         count = 0
         for k in sensors:
-            #print("Sensor", sensors[k])
-            local_dict_of_nodes = {}
+            local_dict_of_nodes = self.sensor_dict_of_nodes(values, flight_dict, k, count,
+                                                            collection_id_node, first_store)
+
+            # create sub-graph
+            Flight_store = flight_dict.get('flight_flight_store', 'Flight_store')
+            temp_dict_of_nodes = self.create_flight_from_plan(local_dict_of_nodes, Flight_store, graph, count)
+            if not temp_dict_of_nodes:
+                return {"status": False, "Error": "Could not create sensor store."}
 
-            # add obs col
-            obs_col = the_observation_collection
+            # update loop counter
+            count += 1
 
-            # get sensor and add to dictionary
-            sensors[k] = URIRef(sensors[k])
-            new_label = sensor_label
-            if count > 0:
-                new_label = sensor_label + '-' + str(count)
+        # return success
+        ret.update({"status": True, 'observation_collection': collection_id_node})
+        return ret
 
-                # re-use obs col
-                obs_col = the_observation_collection + '-' + str(count)
-            else:
-                # first reading?
-                if first_store: #'first_reading' in values and values['first_reading']:
-                    print("First store.")
-                    startTime = flight_dict.get('flight_time_stamp_start', 'startTime')
-                    local_dict_of_nodes.update({startTime: values['time_stamp']})
+    ##################################################
+    # dictionary of nodes for a sensor reading
+    ##################################################
+    def sensor_dict_of_nodes(self, values, flight_dict, k, count, collection_id_node, first_store):
+        '''
+        Args:
+            values (dict.):             store_data_point values
+            flight_dict (dict.):        ini file flight dict.
+            k (str):                    sensor key in values
+            count (int):                sensor number in sample
+            collection_id_node (URIRef): observation collection
+            first_store (bool):         first sample stored for dataset
+
+        Returns:
+           dict.: dictionary of nodes for the Flight_store shapes
+        '''
+        # get obs. col. label
+        the_observation_collection = flight_dict.get('flight_collection', 'the_observation_collection')
 
-                # set end for observation, gets overwritten
-                endTime = flight_dict.get('flight_time_stamp_end', 'endTime')
-                local_dict_of_nodes.update({endTime: values['time_stamp']})
+        # get label for sensors in 'per sensor storage' shacl section
+        sensor_label = flight_dict.get('flight_sensor_label', 'sensor_label')
 
-            # add obs coll
-            local_dict_of_nodes.update({obs_col: collection_id_node})
+        # family index kept as it is built
+        local_dict_of_nodes = label_dict()
 
-            # add sensor
-            local_dict_of_nodes.update({new_label: sensors[k]})
+        # add obs col
+        obs_col = the_observation_collection
 
-            # add reading from sensor, co2?
-            sensor_quantity = flight_dict.get('flight_sensor_value', 'sensor_quantity')
-            local_dict_of_nodes.update({sensor_quantity: values[k]})  # XSD.double
+        # get sensor and add to dictionary
+        sensor_node = URIRef(values['sensors'][k])
+        new_label = sensor_label
+        if count > 0:
+            new_label = sensor_label + '-' + str(count)
 
-            # get units, append '_units' fo sensor label
-            if k + '_units' in values.keys():
-                #print("UNITS", values[k + '_units'])
-                units = values[k + '_units']
-                sensor_quantity_units = flight_dict.get('flight_sensor_units', 'sensor_quantity_units')
-                local_dict_of_nodes.update({sensor_quantity_units: URIRef(units)})  # units
+            # re-use obs col
+            obs_col = the_observation_collection + '-' + str(count)
+        else:
+            # first reading?
+            if first_store: #'first_reading' in values and values['first_reading']:
+                print("First store.")
+                startTime = flight_dict.get('flight_time_stamp_start', 'startTime')
+                local_dict_of_nodes.update({startTime: values['time_stamp']})
 
-            # fix
-            sensor_quantity_geo_fix = flight_dict.get('flight_geo_fix', 'sensor_quantity_geo_fix')
-            local_dict_of_nodes.update({sensor_quantity_geo_fix: values['geo_fix']})  # GEOSPARQL.wktLiteral
+            # set end for observation, gets overwritten
+            endTime = flight_dict.get('flight_time_stamp_end', 'endTime')
+            local_dict_of_nodes.update({endTime: values['time_stamp']})
 
-            # and for observation
-            timeStamp = flight_dict.get('flight_time_stamp', 'timeStamp')
-            local_dict_of_nodes.update({timeStamp: values['time_stamp']})
+        # add obs coll
+        local_dict_of_nodes.update({obs_col: collection_id_node})
 
-            # create sub-graph
+        # add sensor
+        local_dict_of_nodes.update({new_label: sensor_node})
+
+        # add reading from sensor, co2?
+        sensor_quantity = flight_dict.get('flight_sensor_value', 'sensor_quantity')
+        local_dict_of_nodes.update({sensor_quantity: values[k]})  # XSD.double
+
+        # get units, append '_units' fo sensor label
+        if k + '_units' in values.keys():
+            units = values[k + '_units']
+            sensor_quantity_units = flight_dict.get('flight_sensor_units', 'sensor_quantity_units')
+            local_dict_of_nodes.update({sensor_quantity_units: URIRef(units)})  # units
+
+        # fix
+        sensor_quantity_geo_fix = flight_dict.get('flight_geo_fix', 'sensor_quantity_geo_fix')
+        local_dict_of_nodes.update({sensor_quantity_geo_fix: values['geo_fix']})  # GEOSPARQL.wktLiteral
+
+        # and for observation
+        timeStamp = flight_dict.get('flight_time_stamp', 'timeStamp')
+        local_dict_of_nodes.update({timeStamp: values['time_stamp']})
+
+        # return dict
+        return local_dict_of_nodes
+
+    ##################################################
+    # RDF view of a columnar dataset
+    ##################################################
+    def observation_view(self, dataset):
+        '''
+        The triples the observations would have had in the triple store,
+        generated from the rows as they are looked up, node IRIs are derived
+        from the dataset and row so repeated views agree.
+
+        Args:
+            dataset (URIRef):   dataset
+
+        Returns:
+           ConjunctiveGraph: read only graph with a dataset context, None if
+                             dataset not in the observation store
+        '''
+        info = None
+        if self.observation_store is not None:
+            info = self.observation_store.dataset(dataset)
+        if info is None:
+            return None
+
+        # kept, it holds the triples on shared nodes
+        view_store = self.observation_views.get(dataset, None)
+        if view_store is None:
+            flight_dict = info['flight_dict']
             Flight_store = flight_dict.get('flight_flight_store', 'Flight_store')
-            temp_dict_of_nodes = self.create_flight(local_dict_of_nodes, Flight_store, graph, count)
-            if not temp_dict_of_nodes:
-                return {"status": False, "Error": "Could not create sensor store."}
+            collection_id_node = URIRef(info['collection'])
 
-            # update loop counter
-            count += 1
+            def expand(row, graph, first_store, node_id):
+                self.observation_row(row, graph, first_store, node_id, flight_dict, Flight_store,
+                                     collection_id_node)
 
-        # return success
-        ret.update({"status": True, 'observation_collection': collection_id_node})
-        return ret
+            view_store = observation_view_store(self.g.store, self.observation_store, dataset, expand)
+
+        # latest last, the least recently queried dropped
+        with self.observation_view_lock:
+            view_store = self.observation_views.pop(dataset, view_store)
+            self.observation_views.update({dataset: view_store})
+            while len(self.observation_views) > max_observation_views:
+                self.observation_views.pop(next(iter(self.observation_views)))
+
+        # rows stored since last read
+        view_store.refresh()
+
+        # return view
+        return ConjunctiveGraph(view_store)
+
+    ##################################################
+    # triples of an observation row
+    ##################################################
+    def observation_row(self, row, graph, first_store, node_id, flight_dict, Flight_store, collection_id_node):
+        '''
+        Args:
+            row (tuple):                observation row
+            graph (Graph):              graph to write to
+            first_store (bool):         first sample of the dataset
+            node_id (function):         node_id(label) id of a node minted for
+                                        the row
+            flight_dict (dict.):        flight dict. the rows were stored with
+            Flight_store (str):         label of the store shapes
+            collection_id_node (URIRef): observation collection
+        '''
+        sample, slot, time, sensor, value, unit = row[:6]
+
+        values = {'sensors': {'sensor': sensor}, 'sensor': value, 'time_stamp': time,
+                  'geo_fix': self.observation_store.geo_fix(row)}
+        if unit is not None:
+            values.update({'sensor_units': unit})
+
+        local_dict_of_nodes = self.sensor_dict_of_nodes(values, flight_dict, 'sensor', slot,
+                                                        collection_id_node, first_store)
+
+        # deterministic nodes
+        def mint(label, blankNode):
+            if blankNode:
+                return BNode(node_id(label))
+            return self.BASE.term(node_id(label))
+
+        plan = self.get_flight_plan(Flight_store, list(local_dict_of_nodes.keys()), slot)
+        if plan is None:
+            raise Exception("no store shapes for " + Flight_store)
+
+        # counts from the graph written to, not the store
+        self.run_flight_plan(plan, local_dict_of_nodes, graph, mint, cardinality_tracker())
+
+    ##################################################
+    # store a batch of data points, single commit
+    ##################################################
+    def store_data_batch(self, samples, flight_dict):
+        '''
+        Args:
+            samples (list):         list of store_data_point value dicts.,
+                                    may be for several collections/datasets
+            flight_dict (dict.):    ini file flight dict.
+
+        Returns:
+           dict.: overall status and per sample results
+        '''
+        # hot tier writes and indexes are shared with the store path
+        with self.hot_tier_lock:
+            # write out any hot tier first, keeps updates in order
+            self.flush_store()
+
+            # batch staging, committed once
+            staging = graph_staging()
+
+            # results
+            results = []
+            stored = 0
+
+            # loop over samples
+            for index, values in enumerate(samples):
+                # stage each sample seperately so a failure can be dropped
+                sample_staging = graph_staging(staging)
+                try:
+                    ret = self.store_data_point(values, flight_dict, sample_staging)
+                except Exception as ex:
+                    ret = {"status": False, "Error": str(ex)}
+
+                # keep?
+                if ret.get('status', False):
+                    sample_staging.commit()
+                    stored += 1
+                else:
+                    sample_staging.discard()
+                    self.cardinality.reset()
+
+                # save result
+                ret.update({"index": index})
+                results.append(ret)
+
+            # write the batch
+            try:
+                count = staging.commit()
+            except Exception as ex:
+                logger.error('batch commit failed: %s.' % str(ex))
+                staging.discard()
+                self.cardinality.reset()
+                # nothing written
+                for ret in results:
+                    if ret['status']:
+                        ret.update({"status": False, "Error": "batch commit failed."})
+                return {"status": False, "Error": "batch commit failed: " + str(ex), 
+                        "stored": 0, "results": results}
+
+            # return status
+            return {"status": True, "stored": stored, "triples": count, "results": results}
 
     # flight creation support functions (graph) ################################
 
@@ -257,7 +494,7 @@ class py_drone_graph_store():
         Args:
             shape_target (URIRef):  target class to create
             flight_shape (dict.):   dictionary of shape dictionaries
-            dict_of_nodes (dict.):  dictionary of nodes related to/part of flight
+            dict_of_nodes (label_dict): dictionary of nodes related to/part of flight
             graph (rdflib graph):   graph to append to
 
         Returns:
@@ -299,6 +536,9 @@ class py_drone_graph_store():
                 # create new node in graph
                 oc_node = self.BASE.term(oc_id)
 
+            # we know all its properties
+            self.cardinality.created(oc_node)
+
             graph.add((oc_node, RDF.type, target_class))
 
             # multiple inheritance?
@@ -332,27 +572,24 @@ class py_drone_graph_store():
                     continue
 
                 # check if maxcount not exist or if under maxcount or if count is 1 set instead of append
-                in_count = len(list(graph.objects(oc_node, URIRef(property['path']))))
+                in_count = self.cardinality.count(graph, oc_node, URIRef(property['path']))
                 max_c = property.get('maxCount', in_count + 1)
                 #print("MAX", in_count, max_c, property['path'], label)
                 #if 'maxCount' not in property.keys() or in_count < int(property['maxCount']) or in_count == 1:
                 if in_count < max_c or (in_count == 1 and max_c == 1):
                     # if OK update
                     if property['datatype'] == str(XSD.string):
-                        # dont exceed maxcount
-                        if in_count == 1 and max_c == 1:
-                            graph.set((oc_node, URIRef(property['path']), Literal(
-                                dict_of_nodes[property['name']])))
-                        else:
-                            graph.add((oc_node, URIRef(property['path']), Literal(
-                                dict_of_nodes[property['name']])))
+                        dat_lit = Literal(dict_of_nodes[property['name']])
                     else:
                         dat_lit = Literal(dict_of_nodes[property['name']], datatype=URIRef(property['datatype']))
-                        # dont exceed maxcount
-                        if in_count == 1 and max_c == 1:
-                            graph.set((oc_node, URIRef(property['path']), dat_lit))
-                        else:
-                            graph.add((oc_node, URIRef(property['path']), dat_lit))                    
+
+                    # dont exceed maxcount
+                    if in_count == 1 and max_c == 1:
+                        graph.set((oc_node, URIRef(property['path']), dat_lit))
+                        self.cardinality.set(graph, oc_node, URIRef(property['path']), dat_lit)
+                    else:
+                        graph.add((oc_node, URIRef(property['path']), dat_lit))
+                        self.cardinality.add(graph, oc_node, URIRef(property['path']), dat_lit)
 
             # deal with sh:nodeKind sh:IRI
             elif 'class' in property.keys():
@@ -370,9 +607,7 @@ class py_drone_graph_store():
                 if property['nodeKind'] == str(SH.IRI) or property['nodeKind'] == str(SH.BlankNode):
                     # Example, 'path': 'http://www.w3.org/ns/sosa/madeBySensor', 'class': 'http://www.w3.org/ns/sosa/Sensor',
                     # check for wildcards
-                    prop_labels = [val for key, val in dict_of_nodes.items() \
-                        if prop_label == key[:len(prop_label)] and \
-                            (len(key) == len(prop_label) or key[len(prop_label)] == '-')]
+                    prop_labels = [dict_of_nodes[key] for key in dict_of_nodes.family(prop_label)]
 
                     # exist? Includes prop_label if that exists
                     if prop_labels:
@@ -402,14 +637,28 @@ class py_drone_graph_store():
     #################################################
     def get_flight_shapes(self, flight_label):
         '''
+        Compiled shapes are held in the shape catalog until the shape graph
+        changes. The returned dictionary is shared, copy before modifying.
+
+        Args:
+            flight_label (str): label of the shape graph, e.g. Flight_store
+
         Returns:
            dict.: dictionary of shapes
         '''
+        # shape graph id
+        graph_id = self.BASE.term(flight_label)
+
+        # already compiled?
+        entry = self.shape_catalog.get(graph_id)
+        if entry:
+            return entry['shapes']
+
         # get shapes #################################################################
         flight_shapes = {}
 
         # get graph
-        graph = self.g.get_context(self.BASE.term(flight_label))
+        graph = self.g.get_context(graph_id)
 
         if not graph:
             print("NOGRAPH")
@@ -432,6 +681,9 @@ class py_drone_graph_store():
 
             flight_shapes.update({label: shape_dict})
 
+        # add to catalog
+        self.shape_catalog.put(graph_id, flight_shapes)
+
         # return the shapes
         return flight_shapes
 
@@ -441,7 +693,7 @@ class py_drone_graph_store():
     def create_flight(self, dict_of_nodes, flight_shape, graph, id):
         '''
         Args:
-            dict_of_nodes (dict.):  dictionary of the boundary instances 
+            dict_of_nodes (label_dict): dictionary of the boundary instances
                                     required to setup flight
 
         Returns:
@@ -462,9 +714,7 @@ class py_drone_graph_store():
 
             # multiples in dictionary?
             # TODO, check for '-' after shape_target
-            node_keys = [key for key, val in dict_of_nodes.items() \
-                if shape_target == key[:len(shape_target)] and \
-                    (len(key) == len(shape_target) or key[len(shape_target)] == '-')]
+            node_keys = dict_of_nodes.family(shape_target)
 
             if node_keys:
                 for n in node_keys:
@@ -491,7 +741,8 @@ class py_drone_graph_store():
         # get shapes #############################################
         flight_shape = input_dict.get('input_shape', 'Flight_input')
 
-        flight_shapes = self.get_flight_shapes(flight_shape)
+        # copy, we update the shape dictionaries for the form
+        flight_shapes = copy.deepcopy(self.get_flight_shapes(flight_shape))
 
         # boundary label
         #flight_graph_boundary = input_dict.get('graph_boundary', 'graph_boundary')
@@ -510,6 +761,9 @@ class py_drone_graph_store():
             # append name/class to re move from property list
             sub_graph.append(shape_target)
 
+            # instances for drop downs may have changed since compiled
+            self.add_shape_instances(shape['properties'])
+
             # loop over proberties defined in shape
             for property in shape['properties']:
 
@@ -660,7 +914,7 @@ class py_drone_graph_store():
            dict.: uuid and status
         '''
         # create dictionary of nodes
-        dict_of_nodes = {}
+        dict_of_nodes = label_dict()
 
         # get name substitution
         name_substutute = input_dict.get('name_substutute', None)
@@ -731,9 +985,7 @@ class py_drone_graph_store():
             for constraint_w in constraint_shapes:
                 # does the constarint exist in the boundary list?
                 # wildcard
-                constraints = [key for key, val in dict_of_nodes.items() \
-                    if constraint_w == key[:len(constraint_w)] and \
-                        (len(key) == len(constraint_w) or key[len(constraint_w)] == '-')]
+                constraints = dict_of_nodes.family(constraint_w)
 
                 # TODO if not bail?
                 for constraint in constraints:
@@ -748,9 +1000,7 @@ class py_drone_graph_store():
                         c_name = property['name']
                         # is the target class in the boundary list?
                         # wildcard
-                        c_names = [key for key, val in dict_of_nodes.items() \
-                            if c_name == key[:len(c_name)] and \
-                                (len(key) == len(c_name) or key[len(c_name)] == '-')]
+                        c_names = dict_of_nodes.family(c_name)
 
                         # loop
                         for cname in c_names:
@@ -855,9 +1105,7 @@ class py_drone_graph_store():
         sensor = flight_dict.get('flight_sensor', 'sensor')
 
         # get wildcard from dict
-        sensors = [{key:str(val)} for key, val in combined_dict_of_nodes.items() \
-                    if sensor == key[:len(sensor)] and \
-                        (len(key) == len(sensor) or key[len(sensor)] == '-')]
+        sensors = [{key: str(combined_dict_of_nodes[key])} for key in combined_dict_of_nodes.family(sensor)]
 
         # get instance paramiters, e.g. units
         Instance_parse = flight_dict.get('flight_instance_parse', 'Instance_parse')
@@ -0,0 +1,285 @@
+'''
+Streaming SPARQL results for py_drone_graph.
+
+University of Notre Dame, IN
+LANDRS project https://www.landrs.org
+
+rdflib builds the whole result of a query (the bindings list, or the graph
+of a CONSTRUCT) before it is serialized. stream_query evaluates the query
+algebra itself and serializes each solution as it is produced, SPARQL JSON,
+CSV, TSV or JSON lines for SELECT and N-Triples for CONSTRUCT, so memory use
+does not grow with the size of the result. Solution modifiers that need all
+the solutions (ORDER BY, DISTINCT) still hold them in the evaluator.
+'''
+
+# Imports ######################################################################
+import csv
+import io
+import json
+import logging
+
+# RDFLIB
+from rdflib import BNode, URIRef, Variable
+from rdflib.plugins.serializers.nt import _nt_row
+from rdflib.plugins.serializers.nquads import _nq_row
+
+# setup logging ################################################################
+logger = logging.getLogger(__name__)
+
+# content types
+sparql_json = 'application/sparql-results+json'
+sparql_csv = 'text/csv'
+sparql_tsv = 'text/tab-separated-values'
+n_triples = 'application/n-triples'
+
+# one JSON object per line, head first then a binding per solution
+json_lines = 'application/x-ndjson'
+
+# solutions per chunk
+chunk_rows = 100
+
+##############################
+# choose streamed format
+##############################
+def stream_format(query_type, return_type):
+    '''
+    Args:
+        query_type (str):   algebra name, e.g. SelectQuery
+        return_type (str):  requested content type (Accept)
+
+    Returns:
+       str: content type to stream, None if the result is not streamed
+    '''
+    return_type = return_type or ''
+    if query_type == 'SelectQuery':
+        for content_type in [sparql_csv, sparql_tsv, json_lines]:
+            if content_type in return_type:
+                return content_type
+        return sparql_json
+
+    if query_type == 'ConstructQuery':
+        if n_triples in return_type or 'text/plain' in return_type:
+            return n_triples
+
+    # return not streamed
+    return None
+
+##############################
+# term as SPARQL JSON
+##############################
+def json_term(term):
+    '''
+    Args:
+        term (Node):    bound value
+
+    Returns:
+       dict.: SPARQL JSON result term
+    '''
+    if isinstance(term, URIRef):
+        return {'type': 'uri', 'value': str(term)}
+    if isinstance(term, BNode):
+        return {'type': 'bnode', 'value': str(term)}
+
+    ret = {'type': 'literal', 'value': str(term)}
+    if term.language:
+        ret.update({'xml:lang': term.language})
+    elif term.datatype:
+        ret.update({'datatype': str(term.datatype)})
+
+    # return term
+    return ret
+
+##############################
+# solution as SPARQL JSON
+##############################
+def json_row(solution, names, variables):
+    '''
+    Args:
+        solution (FrozenBindings):  solution
+        names (list):               variable names
+        variables (list):           projected Variables
+
+    Returns:
+       dict.: SPARQL JSON binding
+    '''
+    row = {}
+    for name, variable in zip(names, variables):
+        value = solution.get(variable)
+        if value is not None:
+            row.update({name: json_term(value)})
+
+    # return binding
+    return row
+
+##############################
+# term as SPARQL CSV
+##############################
+def csv_term(term):
+    '''
+    Args:
+        term (Node):    bound value, or None
+
+    Returns:
+       str: SPARQL CSV value
+    '''
+    if term is None:
+        return ''
+    if isinstance(term, BNode):
+        return '_:' + str(term)
+
+    # return value
+    return str(term)
+
+##############################
+# statement as N-Quads
+##############################
+def nq_row(triple, context):
+    '''
+    The one use of rdflib's private N-Quads row writer, for the export,
+    journal and change log.
+
+    Args:
+        triple (tuple):     subject, predicate, object
+        context (Node):     graph identifier
+
+    Returns:
+       str: N-Quads line, newline terminated
+    '''
+    return _nq_row(triple, context)
+
+##############################
+# group rows into chunks
+##############################
+def chunks(rows):
+    '''
+    Args:
+        rows (iterable):    serialized rows
+
+    Returns:
+       generator: strings of chunk_rows rows
+    '''
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield ''.join(chunk)
+            chunk = []
+
+    # remainder
+    if chunk:
+        yield ''.join(chunk)
+
+##############################
+# stream SELECT solutions
+##############################
+def stream_select(solutions, variables, content_type):
+    '''
+    Args:
+        solutions (iterable):   FrozenBindings
+        variables (list):       projected Variables
+        content_type (str):     sparql_json, sparql_csv, sparql_tsv or
+                                json_lines
+
+    Returns:
+       generator: serialized rows
+    '''
+    names = [str(v) for v in variables]
+
+    if content_type == sparql_json:
+        yield '{"head": {"vars": %s}, "results": {"bindings": [' % json.dumps(names)
+        separator = ''
+        for solution in solutions:
+            yield separator + json.dumps(json_row(solution, names, variables))
+            separator = ', '
+        yield ']}}'
+
+    elif content_type == json_lines:
+        yield json.dumps({'head': {'vars': names}}) + '\n'
+        for solution in solutions:
+            yield json.dumps(json_row(solution, names, variables)) + '\n'
+
+    elif content_type == sparql_csv:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\r\n')
+        writer.writerow(names)
+        for solution in solutions:
+            writer.writerow([csv_term(solution.get(v)) for v in variables])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    else:
+        yield '\t'.join('?' + name for name in names) + '\n'
+        for solution in solutions:
+            yield '\t'.join('' if solution.get(v) is None else solution.get(v).n3() for v in variables) + '\n'
+
+##############################
+# stream CONSTRUCT triples
+##############################
+def stream_construct(solutions, template):
+    '''
+    Args:
+        solutions (iterable):   FrozenBindings
+        template (list):        triple patterns
+
+    Returns:
+       generator: N-Triples lines
+    '''
+    from rdflib.plugins.sparql.evalutils import _fillTemplate
+
+    for solution in solutions:
+        for triple in _fillTemplate(template, solution):
+            yield _nt_row(triple)
+
+##############################
+# stream a query result
+##############################
+def stream_query(graph, query, return_type, initBindings=None, guard=None):
+    '''
+    Args:
+        graph (Graph):          graph to query, ConjunctiveGraph for all
+        query (str or Query):   sparql query, or prepared query
+        return_type (str):      requested content type (Accept)
+        initBindings (dict.):   optional, variable name to node
+        guard (query_guard):    optional, counts the solutions against its
+                                row limit
+
+    Returns:
+       tuple: generator of str chunks and content type, None if the query
+              type or requested format is not streamed
+    '''
+    # loaded on first use
+    from rdflib.plugins.sparql import prepareQuery
+    from rdflib.plugins.sparql.sparql import QueryContext
+    from rdflib.plugins.sparql.evaluate import evalPart
+
+    if not hasattr(query, 'algebra'):
+        query = prepareQuery(query)
+    main = query.algebra
+
+    # FROM/FROM NAMED, or not streamed?
+    content_type = stream_format(main.name, return_type)
+    if content_type is None or main.datasetClause:
+        return None
+
+    # context, as rdflib evalQuery
+    ctx = QueryContext(graph, initBindings=dict((Variable(k), v) for k, v in (initBindings or {}).items()))
+    ctx.prologue = query.prologue
+
+    # solutions of the WHERE, lazy unless modifiers need them all
+    solutions = evalPart(ctx, main.p)
+    if guard is not None:
+        solutions = guard.count_rows(solutions)
+
+    if main.name == 'SelectQuery':
+        rows = stream_select(solutions, main.PV, content_type)
+    else:
+        template = main.template
+        if not template:
+            # a construct-where query
+            template = main.p.p.triples
+        rows = stream_construct(solutions, template)
+
+    # return chunks
+    return chunks(rows), content_type
@@ -43,28 +43,46 @@ files/,                location for the graph dump turtle files
 '''
 
 # Imports ######################################################################
+# time the startup phases, from here
+import time
+boot_time = time.time()
+
+import atexit
 import json
+import signal
 import sys
 import os
 import random
 import datetime
 from configparser import ConfigParser, ExtendedInterpolation
 import logging
+import multiprocessing
 import urllib
+import threading
 
 # flask imports
 import flask
-from flask import request, jsonify, send_from_directory, render_template_string
+from flask import request, jsonify, render_template_string
 from flask import render_template, Response, redirect, url_for
 from flask_cors import CORS
 from jinja2.exceptions import TemplateNotFound
 
 # LANDRS imports
 import graph.py_drone_graph as ldg
+from graph.py_drone_graph_core import store_exists
+from graph.py_drone_graph_columnar import observation_columns
+from graph.py_drone_graph_execution import query_limit
+from graph.py_drone_graph_export import gzip_type
+from graph.py_drone_graph_stream import chunks, json_lines
+from graph.py_drone_graph_labels import label_dict
 from config.config_generate_form import generate_form
 from config.config_form2rdf import Form2RDFController
 from data_acquisition import data_acquisition
 from data_acquisition.data_acquisition import Data_acquisition
+from data_acquisition.data_acquisition_sink import get_sink
+
+# startup report, seconds by phase
+startup_times = {'imports': time.time() - boot_time}
 
 # Defines ######################################################################
 # things I need to know
@@ -132,12 +150,12 @@ graph_location = config.get('GRAPH', 'db_location', fallback=None)
 # test for dict. entry
 if graph_location:
     # exist?
-    if os.path.isfile(graph_location + '.sqlite'):
+    if store_exists(graph_location, config.get('GRAPH', 'store', fallback='sqlite')):
         # dynamic file available?
         if os.path.isfile(config_file_dynamic):
             print("Loading dynamic ini")
             config.read(config_file_dynamic)
-    elif os.path.isfile(config_file_dynamic):
+    elif os.path.isfile(config_file_dynamic) and __name__ == '__main__':
         # else remove it
         os.remove(config_file_dynamic)
     
@@ -173,7 +191,8 @@ try:
 except:
     logging_level = 10
 logging_file = get_config('DEFAULT', 'logging_file', 'landrs.log')
-logging.basicConfig(filename=logging_file, filemode='w', level=logging_level)
+if __name__ == '__main__':
+    logging.basicConfig(filename=logging_file, filemode='w', level=logging_level)
 
 # get drone id
 ontology_myID = get_config('DRONE', 'drone_uuid', ontology_myID)
@@ -202,9 +221,6 @@ Now added graph dictionary from configuration.
 my_base = get_config('DEFAULT', 'base', 'http://ld.landrs.org/id/')
 my_host_name = get_config('DEFAULT', 'host_name', 'http://ld.landrs.org/')
 
-# instantiate graph
-d_graph = ldg.py_drone_graph(ontology_myID, graph_dict, my_base, my_host_name)
-
 # instantiate flight
 # get flight dictionary
 flight_dict = {}
@@ -215,24 +231,96 @@ if 'FLIGHT' in config.keys():
 #get port. here as sent to data acquisition#####################################
 port = int(get_config('DEFAULT', 'port', '5000'))
 
-################################################################################
-# start data acquisition thread, start as daemon so terminates with the main program
-# now created in data_acquistion class
-################################################################################
 # get list of sensors for current flight
 prop_label = 'sensor'
-dict_sensors = [{key: val} for key, val in dataacquisition_dict.items() \
-                    if prop_label == key[:len(prop_label)] and \
-                            (len(key) == len(prop_label) or key[len(prop_label)] == '-')]
+settings = label_dict(dataacquisition_dict)
+dict_sensors = [{key: settings[key]} for key in settings.family(prop_label)]
+
+startup_times.update({'config': time.time() - boot_time - sum(startup_times.values())})
 
-# get instance paramiters, e.g. units
-Instance_parse = flight_dict.get('flight_instance_parse', 'Instance_parse')
-instance_data = d_graph.parse_instance(dict_sensors, Instance_parse)
+# created by load_graph, in the background
+d_graph = None
+instance_data = None
+data_acquire = None
 
+# load progress, for /api/v1/ready and /api/v1/health
+load_status = {"status": "loading", "phase": "starting", "started": time.time(),
+               "elapsed": 0, "error": None}
+
+def load_graph():
+    '''
+    Creates the graph (opening the store and loading any files), the sensor
+    instance data and data acquisition. Runs in the background so the API
+    server starts at once, endpoints that need the graph return 503 until
+    load_status is ready.
+    '''
+    global d_graph, instance_data, data_acquire
+
+    try:
+        # instantiate graph
+        load_status.update({"phase": "graph"})
+        d_graph = ldg.py_drone_graph(ontology_myID, graph_dict, my_base, my_host_name)
+        startup_times.update(d_graph.startup_times)
+        start_time = time.time()
+
+        ################################################################################
+        # start data acquisition thread, start as daemon so terminates with the main program
+        # now created in data_acquistion class
+        ################################################################################
+        # get instance paramiters, e.g. units
+        load_status.update({"phase": "instances"})
+        Instance_parse = flight_dict.get('flight_instance_parse', 'Instance_parse')
+        instance_data = d_graph.parse_instance(dict_sensors, Instance_parse)
+
+        # where to store data, in process or the store endpoint
+        load_status.update({"phase": "acquisition"})
+        data_sink = get_sink(dataacquisition_dict, d_graph, flight_dict,
+                        'http://localhost:' + str(port) + '/api/v1/store')
+
+        # create datalogger class
+        data_acquire = Data_acquisition(dataacquisition_dict, data_sink, instance_data)
+        startup_times.update({'sensor creation': time.time() - start_time})
+
+        load_status.update({"status": "ready", "phase": "ready"})
+    except Exception as ex:
+        logging.exception("graph load failed.")
+        load_status.update({"status": "failed", "error": str(ex)})
 
-# create datalogger class
-data_acquire = Data_acquisition(dataacquisition_dict, 
-                'http://localhost:' + str(port) + '/api/v1/store', instance_data)
+    load_status.update({"elapsed": time.time() - load_status["started"]})
+    print("Graph load", load_status)
+
+    # report, if flask is serving too
+    startup_report('load')
+
+# startup parts done, the report waits for both
+startup_done = set()
+startup_lock = threading.Lock()
+
+def startup_report(part):
+    '''
+    Prints and logs the startup times once the graph is loaded and flask has
+    served its first request.
+
+    Args:
+        part (str): 'load' or 'flask', the part finished
+    '''
+    with startup_lock:
+        startup_done.add(part)
+        if startup_done != {'load', 'flask'}:
+            return
+
+        startup_times.update({'total': time.time() - boot_time})
+        load_status.update({"startup": startup_times})
+
+    report = ', '.join('%s %.2fs' % (phase, seconds) for phase, seconds in startup_times.items())
+    print("Startup times:", report)
+    logging.info("Startup times: %s.", report)
+
+# start loading when imported, by flask run or a WSGI server too, but not in
+# the processes that parse files (they import this module again)
+flask_time = time.time()
+if multiprocessing.parent_process() is None:
+    threading.Thread(target=load_graph, daemon=True).start()
 
 ################################################################################
 # Main Flask program to provide API for drone interface
@@ -252,6 +340,64 @@ if get_config('DEFAULT', 'DEBUG', 'True') == 'True':
 
 # start of API creation ########################################################
 
+##############################################
+# graph not loaded yet, service unavailable
+##############################################
+# endpoints available while loading
+loading_endpoints = ['ready', 'health', 'static']
+
+
+# flask ready when it serves its first request
+@app.before_request
+def flask_ready():
+    if 'flask ready' not in startup_times:
+        startup_times.update({'flask ready': time.time() - flask_time})
+        startup_report('flask')
+
+
+@app.before_request
+def check_loaded():
+    if load_status["status"] != "ready" and request.endpoint not in loading_endpoints:
+        return json.dumps(dict(load_status, elapsed=time.time() - load_status["started"])), 503, \
+            {'Content-Type': 'application/json; charset=utf-8', 'Retry-After': '5'}
+
+# write the changes a request made to the change log
+@app.after_request
+def commit_changes(response):
+    if load_status["status"] == "ready" and d_graph.change_log is not None:
+        d_graph.change_log.commit()
+    return response
+
+##############################################
+# readiness and health
+##############################################
+
+
+@app.route('/api/v1/ready')
+def ready():
+    '''
+    Returns:
+       json: load status, 200 when the graph is loaded else 503
+    '''
+    ret = dict(load_status)
+    if ret["status"] == "loading":
+        ret.update({"elapsed": time.time() - ret["started"]})
+
+    return json.dumps(ret), 200 if ret["status"] == "ready" else 503, {'Content-Type': 'application/json; charset=utf-8'}
+
+
+@app.route('/api/v1/health')
+def health():
+    '''
+    Returns:
+       json: load status, 200 while loading or loaded, 500 if the load failed
+    '''
+    ret = dict(load_status)
+    if ret["status"] == "loading":
+        ret.update({"elapsed": time.time() - ret["started"]})
+
+    return json.dumps(ret), 500 if ret["status"] == "failed" else 200, {'Content-Type': 'application/json; charset=utf-8'}
+
 ##########################################################################
 # Setup root to return OpenAPI compilent response with drone ontology data
 ##########################################################################
@@ -370,22 +516,184 @@ def sparql_endpoint():
 
     print("Query", query, "Type", q_type)
 
+    # query the RDF view of a columnar dataset?
+    view = request.values.get('view', None)
+
+    # profile rather than run?
+    explain = request.values.get('explain', 'false') == 'true'
+
+    # graphs to query, SPARQL protocol
+    dataset = {'default': request.values.getlist('default-graph-uri'),
+               'named': request.values.getlist('named-graph-uri')}
+
     if query != "":
+        # unchanged since the copy the client has?
+        etag = None
+        if request.method == "GET" and q_type == "query" and not view and not explain:
+            etag = d_graph.query_etag(request.headers.get('Accept'))
+            if etag is not None and request.if_none_match.contains_raw(etag):
+                return '', 304, {'ETag': etag, 'Vary': 'Accept'}
+
         # lets query the graph!
         try:
-            # query
-            ret, ret_type = d_graph.run_sql(
-                query, q_type, request.headers.get('Accept'))
+            # query, results streamed
+            if q_type == "query" and explain:
+                ret, ret_type = d_graph.run_sql(
+                    query, q_type, request.headers.get('Accept'), view, explain=True, dataset=dataset)
+            elif q_type == "query":
+                ret, ret_type = d_graph.stream_sql(query, request.headers.get('Accept'), view, dataset)
+            else:
+                ret, ret_type = d_graph.run_sql(
+                    query, q_type, request.headers.get('Accept'), view)
 
             # return results
-            return ret, 200, {'Content-Type': '{}; charset=utf-8'.format(ret_type)}
-
+            headers = {'Content-Type': '{}; charset=utf-8'.format(ret_type)}
+            if etag is not None:
+                headers.update({'ETag': etag, 'Vary': 'Accept'})
+            if not isinstance(ret, (str, bytes)):
+                return Response(ret, 200, headers)
+            return ret, 200, headers
+
+        except query_limit as ex:
+            # timed out, or too large
+            return json.dumps({"error": str(ex)}), 503, {'Content-Type': 'application/sparql-results+json; charset=utf-8'}
         except:
             # return error
             return json.dumps({"error": "query failed"}), 500, {'Content-Type': 'application/sparql-results+json; charset=utf-8'}
     else:
         return json.dumps({"error": "no query"}), 500, {'Content-Type': 'application/sparql-results+json; charset=utf-8'}
 
+#######################################################################
+# SPARQL jobs, for queries longer than a request
+#######################################################################
+
+
+@app.route('/api/v1/sparql/jobs', methods=['GET', 'POST'])
+def sparql_jobs():
+    '''
+    POST query (and optional view) to start a job, GET to list the jobs
+
+    Returns:
+       json: the job id, or the status of all jobs
+    '''
+    if request.method == "GET":
+        return json.dumps(d_graph.query_jobs.status()), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+    query = request.values.get('query', None)
+    if query is None and request.is_json:
+        query = request.get_json().get('query', None)
+    if not query:
+        return json.dumps({"error": "no query"}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+    try:
+        job_id = d_graph.submit_job(query, request.values.get('view', None),
+                                    {'default': request.values.getlist('default-graph-uri'),
+                                     'named': request.values.getlist('named-graph-uri')})
+    except Exception as ex:
+        return json.dumps({"error": str(ex)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+    # accepted, poll the job
+    return json.dumps({"id": job_id, "status": "queued"}), 202, \
+        {'Content-Type': 'application/json; charset=utf-8', 'Location': url_for('sparql_job', job_id=job_id)}
+
+
+@app.route('/api/v1/sparql/jobs/<string:job_id>', methods=['GET', 'DELETE'])
+def sparql_job(job_id):
+    '''
+    GET the job status, DELETE to cancel it or remove its result
+
+    Args:
+        job_id (str):   job id
+
+    Returns:
+       json: job status
+    '''
+    if request.method == "DELETE":
+        if not d_graph.query_jobs.cancel(job_id):
+            return json.dumps({"error": "no job: " + job_id}), 404, {'Content-Type': 'application/json; charset=utf-8'}
+        return json.dumps({"status": "success"}), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+    status = d_graph.query_jobs.status(job_id)
+    if status is None:
+        return json.dumps({"error": "no job: " + job_id}), 404, {'Content-Type': 'application/json; charset=utf-8'}
+
+    return json.dumps(status), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+
+@app.route('/api/v1/sparql/jobs/<string:job_id>/result')
+def sparql_job_result(job_id):
+    '''
+    Result of a finished job, a page with offset and limit, else all of it
+
+    Args:
+        job_id (str):   job id
+
+    Returns:
+       query results
+    '''
+    if d_graph.query_jobs.status(job_id) is None:
+        return json.dumps({"error": "no job: " + job_id}), 404, {'Content-Type': 'application/json; charset=utf-8'}
+
+    try:
+        if 'offset' in request.args or 'limit' in request.args:
+            offset = request.args.get('offset', 0, type=int)
+            limit = request.args.get('limit', 1000, type=int)
+            if offset < 0 or limit < 0:
+                return json.dumps({"error": "offset and limit must not be negative"}), 400, \
+                    {'Content-Type': 'application/json; charset=utf-8'}
+
+            ret, ret_type = d_graph.query_jobs.page(job_id, offset, limit)
+            return ret, 200, {'Content-Type': '{}; charset=utf-8'.format(ret_type)}
+
+        # stream it all
+        ret, ret_type = d_graph.query_jobs.download(job_id, request.headers.get('Accept'))
+        return Response(ret, 200, {'Content-Type': '{}; charset=utf-8'.format(ret_type)})
+
+    except Exception as ex:
+        # not finished
+        return json.dumps({"error": str(ex)}), 409, {'Content-Type': 'application/json; charset=utf-8'}
+
+#######################################################################
+# Named queries
+#######################################################################
+
+
+@app.route('/api/v1/query')
+def list_named_queries():
+    '''
+    Returns:
+       json: the named queries, their descriptions and parameters
+    '''
+    return json.dumps(d_graph.named_queries.list()), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+
+@app.route('/api/v1/query/<string:name>')
+def named_query(name):
+    '''
+    Runs a named, prepared, query e.g. /api/v1/query/node?node=<iri>
+
+    Args:
+        name (str): query name
+
+    Returns:
+       json: query results
+    '''
+    if name not in d_graph.named_queries.queries:
+        return json.dumps({"error": "no query: " + name}), 404, {'Content-Type': 'application/json; charset=utf-8'}
+
+    try:
+        ret, ret_type = d_graph.run_named_query(name, request.args.to_dict(), request.headers.get('Accept'))
+
+        # return results
+        return ret, 200, {'Content-Type': '{}; charset=utf-8'.format(ret_type)}
+
+    except query_limit as ex:
+        # timed out, or too large
+        return json.dumps({"error": str(ex)}), 503, {'Content-Type': 'application/json; charset=utf-8'}
+    except Exception as ex:
+        # return error
+        return json.dumps({"error": str(ex)}), 500, {'Content-Type': 'application/json; charset=utf-8'}
+
 #######################################################################
 # Static page to provide yasgui interface
 #######################################################################
@@ -404,22 +712,33 @@ def sparql():
     return render_template('sparql.html', name=heading)
 
 ###################################################
-# Download the entire graph as turtle
+# Download the entire graph
 ###################################################
 
 
 @app.route("/api/v1/turtle/<path:path>")
 def get_graph_file(path):
     '''
-    Provide your preferred filename e.g. dgraph.ttl
-    actually creates the file on the drone in /files
-    may need to clean this up periodically
-    (or allways use the same filename)
+    Provide your preferred filename e.g. dgraph.ttl, the whole store is
+    streamed as N-Quads for .nq and N-Triples (also Turtle) for .nt or
+    .ttl, gzip compressed if the name ends in .gz
+
+    Args:
+        path (str): file name to download as
+
+    Returns:
+       the store as an attachment
     '''
-    # create file
-    d_graph.save_graph(os.path.join("./files", path))
-    # and download file
-    return send_from_directory("./files", path, as_attachment=True)
+    compress = path.endswith('.gz')
+    ret, ret_type = d_graph.export_store(filename=path, compress=compress)
+
+    # download as file
+    headers = {'Content-Type': gzip_type if compress else '{}; charset=utf-8'.format(ret_type),
+               'Content-Disposition': 'attachment; filename="{}"'.format(os.path.basename(path))}
+    if d_graph.change_log is not None:
+        # changes to follow the copy with
+        headers.update({'X-Change-Sequence': str(d_graph.change_log.last())})
+    return Response(ret, 200, headers)
 
 ####################################
 # list graphs
@@ -437,7 +756,7 @@ def list_graphs():
     return ret, 200, {'Content-Type': 'text/turtle; charset=utf-8'}
 
 ####################################
-# dump graph in turtle format
+# dump graph
 ####################################
 
 
@@ -448,26 +767,70 @@ def dump_graph(id):
         id (str): uuid graph
 
     Returns:
-       turtle: the data in the graph in turtle format
+       n-triples: the data in the graph streamed as N-Triples, or N-Quads if
+       asked for, gzip encoded if the client accepts it
     '''
+    accept = request.headers.get('Accept')
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+
     # get info from id
     try:
-        # serialize graph
-        ret = d_graph.dump_graph(id)
-
-        # good result?
-        if ret:
-            # return data
-            return ret, 200, {'Content-Type': 'text/turtle; charset=utf-8'}
-        else:
-            # no such graph
-            return json.dumps({"error": "graph: " + id + " does not exist"}), 500, \
-                {'Content-Type': 'application/sparql-results+json; charset=utf-8'}
+        # stream graph
+        ret = d_graph.export_store(accept, id=id, compress=compress)
     except:
         # error
         return json.dumps({"error": "could not retreive graph"}), 500, \
             {'Content-Type': 'application/sparql-results+json; charset=utf-8'}
 
+    if ret is None:
+        # no such graph
+        return json.dumps({"error": "graph: " + id + " does not exist"}), 500, \
+            {'Content-Type': 'application/sparql-results+json; charset=utf-8'}
+
+    ret, ret_type = ret
+    headers = {'Content-Type': '{}; charset=utf-8'.format(ret_type), 'Vary': 'Accept, Accept-Encoding'}
+    if compress:
+        headers.update({'Content-Encoding': 'gzip'})
+    if d_graph.change_log is not None:
+        headers.update({'X-Change-Sequence': str(d_graph.change_log.last())})
+    return Response(ret, 200, headers)
+
+####################################
+# changes since a sequence number
+####################################
+
+
+@app.route("/api/v1/changes")
+def get_changes():
+    '''
+    Changes to the store after sequence number since, apply them to a copy
+    of the store exported at since (X-Change-Sequence of the export)
+
+    Returns:
+       json lines: sequence, action (add or remove) and N-Quads quad of each
+       change, 410 if the changes since are no longer kept
+    '''
+    if d_graph.change_log is None:
+        return json.dumps({"error": "change log is off"}), 404, {'Content-Type': 'application/json; charset=utf-8'}
+
+    since = request.args.get('since', 0, type=int)
+
+    # of the store as flushed, hot tier writes follow within hot_tier_period
+    last = d_graph.change_log.last()
+
+    try:
+        rows = d_graph.change_log.changes(since, last)
+    except Exception as ex:
+        # copy the store again
+        return json.dumps({"error": str(ex), "start": d_graph.change_log.start, "last": last}), 410, \
+            {'Content-Type': 'application/json; charset=utf-8'}
+
+    # stream them
+    ret = chunks(json.dumps({"sequence": sequence, "action": action, "quad": quad}) + '\n'
+                 for sequence, action, quad in rows)
+    return Response(ret, 200, {'Content-Type': '{}; charset=utf-8'.format(json_lines),
+                               'X-Change-Sequence': str(last)})
+
 ###################
 # Sensors endpoint,
 ###################
@@ -512,6 +875,60 @@ def get_id_data(id):
     return ret, 200, {'Content-Type': 'text/turtle; charset=utf-8'}
     # return json.dumps(ret), 200, {'Content-Type': 'application/sparql-results+json; charset=utf-8'}    # #find my drone data
 
+####################################
+# Observations endpoint,
+####################################
+
+
+@app.route("/api/v1/observations")
+def get_observations():
+    '''
+    Time series from the columnar observation store, e.g.
+    /api/v1/observations?dataset=<iri>&sensor=<iri>&start=<time>&end=<time>
+
+    Returns:
+       json: columns and rows for the dataset, streamed as the rows are read
+    '''
+    dataset = request.args.get('dataset', None)
+    if not dataset or d_graph.observation_store is None:
+        return json.dumps({"error": "no observation store or dataset"}), 500, {'Content-Type': 'application/json; charset=utf-8'}
+
+    # read a page at a time
+    rows = d_graph.observation_store.scan(dataset, request.args.get('sensor', None),
+                                          request.args.get('start', None),
+                                          request.args.get('end', None))
+
+    # stream data as json
+    def body():
+        yield '{"dataset": %s, "columns": %s, "rows": [' % (json.dumps(dataset), json.dumps(observation_columns))
+        for chunk in chunks((', ' if i else '') + json.dumps(row) for i, row in enumerate(rows)):
+            yield chunk
+        yield ']}'
+
+    return Response(body(), 200, {'Content-Type': 'application/json; charset=utf-8'})
+
+###########################################################################
+# Reload changed ontology files
+###########################################################################
+
+
+@app.route("/api/v1/reload", methods=['POST'])
+def reload_files():
+    '''
+    Re-imports the files added, changed or removed since they were loaded,
+    the graphs of unchanged files and the datasets are untouched.
+
+    Returns:
+       json:    lists of 'added', 'changed' and 'removed' files.
+    '''
+    try:
+        ret = d_graph.reload_files()
+    except Exception as ex:
+        return json.dumps({"error": str(ex)}), 500, {'Content-Type': 'application/json; charset=utf-8'}
+
+    # return changes
+    return json.dumps(ret), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
 ###########################################################################
 # Store data point
 ###########################################################################
@@ -548,6 +965,40 @@ def store_data_point():
 
     return json.dumps({"error": "no data"}), 500, {'Content-Type': 'application/sparql-results+json; charset=utf-8'}
 
+###########################################################################
+# Store a batch of data points
+###########################################################################
+
+
+@app.route("/api/v1/store/batch", methods=['POST'])
+def store_data_batch():
+    '''
+    Stores a batch of data points, e.g. buffered data replayed after a link
+    outage. The request body is a JSON array of the data accepted by
+    /api/v1/store, or {"samples": [...]}. The batch is written to the store
+    in a single commit.
+
+    Returns:
+       json:    status information on store and the status of each sample.
+    '''
+    # get samples from body
+    data = request.get_json(force=True, silent=True)
+    if isinstance(data, dict):
+        data = data.get('samples', None)
+
+    if not isinstance(data, list):
+        return json.dumps({"error": "no data"}), 500, {'Content-Type': 'application/sparql-results+json; charset=utf-8'}
+
+    # configured?
+    if 'flight' not in flight_dict.keys():
+        return json.dumps({"error": "not configured for logging."}), 500, {'Content-Type': 'application/json; charset=utf-8'}
+
+    # call store function
+    ret = d_graph.store_data_batch(data, flight_dict)
+
+    # return status
+    return json.dumps(ret), 200 if ret['status'] else 500, {'Content-Type': 'application/sparql-results+json; charset=utf-8'}
+
 ##############################################
 # base of web server, display config. options
 ##############################################
@@ -780,7 +1231,7 @@ def flight_create():
 
             # remove old sensor data
             prop_label = flight_dict.get('flight_sensor', 'sensor')
-            k_remove = [key for key, val in dataacquisition_dict.items() if prop_label == key[:len(prop_label)]]
+            k_remove = label_dict(dataacquisition_dict).family(prop_label)
             for kr in k_remove:
                 dataacquisition_dict.pop(kr)
 
@@ -868,10 +1319,22 @@ def catch_all(path):
     '''
     return json.dumps({"status": "no endpoint: " + path}), 200, {'Content-Type': 'application/sparql-results+json; charset=utf-8'}
 
+def flush_on_exit():
+    '''
+    Writes out the hot tier on exit.
+    '''
+    if d_graph is not None:
+        d_graph.flush_store()
+
 # run the api server ###########################################################
 # #get port
 # port = int(get_config('DEFAULT', 'port', '5000'))
 
 
 # start
-app.run(host='0.0.0.0', port=port)
+if __name__ == '__main__':
+    # exit on SIGTERM, so the hot tier is flushed
+    atexit.register(flush_on_exit)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    app.run(host='0.0.0.0', port=port)
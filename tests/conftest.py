@@ -0,0 +1,25 @@
+'''
+Shared test fixtures, the change log tests read a SQL store.
+
+From module root call,
+python3 -m pytest tests
+'''
+import pytest
+from rdflib import ConjunctiveGraph, URIRef, Literal, plugin
+from rdflib.store import Store
+
+EX = 'http://example.org/'
+
+
+@pytest.fixture
+def sql_graph(tmp_path):
+    '''
+    Returns:
+       ConjunctiveGraph: empty, over a SQLAlchemy store in tmp_path
+    '''
+    store = plugin.get('SQLAlchemy', Store)(identifier=URIRef(EX + 'store'))
+    g = ConjunctiveGraph(store)
+    g.open(Literal('sqlite:///' + str(tmp_path / 'store.sqlite')), create=True)
+    yield g
+    g.close()
+
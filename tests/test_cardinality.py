@@ -0,0 +1,45 @@
+'''
+Cardinality tracker tests.
+
+From module root call,
+python3 -m pytest tests/test_cardinality.py
+'''
+from rdflib import Graph, URIRef, Literal
+from rdflib.namespace import PROV
+from graph.py_drone_graph_cardinality import cardinality_tracker
+
+OC = URIRef('http://ld.landrs.org/id/oc')
+DATASET = URIRef('http://ld.landrs.org/id/dataset')
+
+
+def test_created_nodes_counted_without_store():
+    graph = Graph(identifier=DATASET)
+    tracker = cardinality_tracker()
+    tracker.created(OC)
+
+    # store not consulted for our nodes
+    graph.add((OC, PROV.endedAtTime, Literal('0')))
+    assert tracker.count(graph, OC, PROV.endedAtTime) == 0
+
+    tracker.add(graph, OC, PROV.endedAtTime, Literal('1'))
+    tracker.add(graph, OC, PROV.endedAtTime, Literal('1'))
+    assert tracker.count(graph, OC, PROV.endedAtTime) == 1
+
+    tracker.add(graph, OC, PROV.endedAtTime, Literal('2'))
+    tracker.set(graph, OC, PROV.endedAtTime, Literal('3'))
+    assert tracker.count(graph, OC, PROV.endedAtTime) == 1
+
+    # other graphs are counted separately
+    assert tracker.count(Graph(), OC, PROV.endedAtTime) == 0
+
+
+def test_other_nodes_from_store():
+    graph = Graph(identifier=DATASET)
+    graph.add((OC, PROV.endedAtTime, Literal('0')))
+    tracker = cardinality_tracker()
+    tracker.created(OC)
+    tracker.reset()
+
+    tracker.add(graph, OC, PROV.endedAtTime, Literal('1'))
+    assert tracker.count(graph, OC, PROV.endedAtTime) == 1
+    assert OC not in tracker.nodes
@@ -0,0 +1,36 @@
+'''
+Shape catalog tests.
+
+From module root call,
+python3 -m pytest tests/test_catalog.py
+'''
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal
+from rdflib.namespace import RDFS
+from rdflib.store import TripleRemovedEvent
+from graph.py_drone_graph_catalog import shape_catalog
+
+SHAPES = URIRef('http://ld.landrs.org/id/Flight_store')
+OTHER = URIRef('http://ld.landrs.org/id/landrs_test')
+
+
+def test_entry_kept_until_graph_changes():
+    # compiled entry survives writes to other graphs
+    g = ConjunctiveGraph()
+    catalog = shape_catalog(g.store)
+    catalog.put(SHAPES, {'Observation': {}})
+
+    Graph(g.store, identifier=OTHER).add((OTHER, RDFS.label, Literal('data')))
+    assert catalog.get(SHAPES)['shapes'] == {'Observation': {}}
+
+    # but not a write to the shape graph
+    Graph(g.store, identifier=SHAPES).add((SHAPES, RDFS.label, Literal('shape')))
+    assert catalog.get(SHAPES) is None
+
+
+def test_remove_from_all_graphs():
+    # a removal without a graph may touch any shape graph
+    g = ConjunctiveGraph()
+    catalog = shape_catalog(g.store)
+    catalog.put(SHAPES, {})
+    catalog.graph_changed(TripleRemovedEvent(triple=(SHAPES, None, None), context=None))
+    assert catalog.get(SHAPES) is None
@@ -0,0 +1,114 @@
+'''
+Change log tests.
+
+From module root call,
+python3 -m pytest tests/test_changes.py
+'''
+import pytest
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal
+from rdflib.namespace import RDF, RDFS
+from graph.py_drone_graph_changes import change_log
+from graph.py_drone_graph_export import export_graph
+from graph.py_drone_graph_staging import store_transaction
+
+EX = 'http://example.org/'
+FLIGHT = URIRef(EX + 'flight')
+
+
+def apply(copy, rows):
+    for sequence, action, quad in rows:
+        changed = ConjunctiveGraph()
+        changed.parse(data=quad, format='nquads')
+        for s, p, o, c in changed.quads((None, None, None)):
+            if action == 'add':
+                copy.get_context(c.identifier).add((s, p, o))
+            else:
+                copy.get_context(c.identifier).remove((s, p, o))
+
+
+def test_changes_follow_store(tmp_path, sql_graph):
+    g = sql_graph
+    changes = change_log(g.store, str(tmp_path / 'log.sqlite'))
+    flight = Graph(g.store, identifier=FLIGHT)
+    for i in range(5):
+        flight.add((URIRef(EX + 'obs%d' % i), RDF.type, URIRef(EX + 'Observation')))
+
+    # adding a stored triple changes nothing
+    flight.add((URIRef(EX + 'obs0'), RDF.type, URIRef(EX + 'Observation')))
+
+    # a copy at this point
+    since = changes.last()
+    assert since == 5
+    copy = ConjunctiveGraph()
+    copy.parse(data=''.join(export_graph(g)), format='nquads')
+
+    # a pattern removal is logged as the quads it removed
+    flight.remove((None, RDF.type, None))
+    flight.addN([(URIRef(EX + 'obs9'), RDFS.label, Literal('nine'), flight)])
+    g.update('INSERT DATA { GRAPH <%s> { <%sobs8> <%s> "eight" } }' % (FLIGHT, EX, RDFS.label))
+
+    rows = list(changes.changes(since))
+    assert [r[0] for r in rows] == list(range(6, 13))
+    assert [r[1] for r in rows] == ['remove'] * 5 + ['add'] * 2
+
+    apply(copy, rows)
+    assert set(copy.quads((None, None, None))) == set(g.quads((None, None, None)))
+
+
+def test_changes_kept(tmp_path, sql_graph):
+    g = sql_graph
+    flight = Graph(g.store, identifier=FLIGHT)
+    changes = change_log(g.store, str(tmp_path / 'log.sqlite'), max_changes=3)
+    for i in range(5):
+        flight.add((URIRef(EX + 'obs%d' % i), RDF.type, URIRef(EX + 'Observation')))
+    changes.commit()
+
+    # oldest dropped
+    with pytest.raises(Exception):
+        changes.changes(0)
+    assert [r[0] for r in changes.changes(2)] == [3, 4, 5]
+
+    # sequence carries on over a restart, and a reset
+    changes.reset()
+    again = change_log(g.store, str(tmp_path / 'log.sqlite'))
+    assert again.start == 5
+    assert list(again.changes(5)) == []
+    # one log records the store
+    changes.recording = False
+    flight.add((URIRef(EX + 'obs5'), RDF.type, URIRef(EX + 'Observation')))
+    assert again.last() == 6
+
+
+def test_failed_writes_not_logged(tmp_path, sql_graph):
+    g = sql_graph
+    store = g.store
+    changes = change_log(store, str(tmp_path / 'log.sqlite'))
+    flight = Graph(store, identifier=FLIGHT)
+    flight.add((URIRef(EX + 'obs0'), RDF.type, URIRef(EX + 'Observation')))
+
+    # the add event is dispatched, the write fails
+    def fail(statement):
+        raise Exception('add failed')
+    store._add_ignore_on_conflict = fail
+    with pytest.raises(Exception):
+        flight.addN([(URIRef(EX + 'obs1'), RDF.type, URIRef(EX + 'Observation'), flight)])
+    assert changes.last() == 1
+
+    # a rolled back transaction, the remove had succeeded
+    with pytest.raises(Exception):
+        with store_transaction(store):
+            flight.remove((None, RDF.type, None))
+            flight.addN([(URIRef(EX + 'obs1'), RDF.type, URIRef(EX + 'Observation'), flight)])
+    assert changes.last() == 1
+    assert len(flight) == 1
+
+    # a failed write inside one that commits
+    with store_transaction(store):
+        flight.remove((None, RDF.type, None))
+        with pytest.raises(Exception):
+            flight.add((URIRef(EX + 'obs2'), RDF.type, URIRef(EX + 'Observation')))
+        del store._add_ignore_on_conflict
+        flight.add((URIRef(EX + 'obs3'), RDF.type, URIRef(EX + 'Observation')))
+        assert changes.last() == 1
+    assert [r[1] for r in changes.changes(1)] == ['remove', 'add']
+    assert set(flight.subjects()) == {URIRef(EX + 'obs3')}
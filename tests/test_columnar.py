@@ -0,0 +1,135 @@
+'''
+Columnar observation store tests.
+
+From module root call,
+python3 -m pytest tests/test_columnar.py
+'''
+import pytest
+from rdflib import URIRef, Literal, Namespace
+from rdflib.graph import ConjunctiveGraph
+from rdflib.namespace import PROV, RDF
+import graph.py_drone_graph_columnar as columnar
+from graph.py_drone_graph_columnar import observation_store, observation_view_store
+
+SOSA = Namespace('http://www.w3.org/ns/sosa/')
+
+DATASET = URIRef('http://ld.landrs.org/id/dataset')
+OC = URIRef('http://ld.landrs.org/id/oc')
+S1 = 'http://ld.landrs.org/id/S1'
+S2 = 'http://ld.landrs.org/id/S2'
+
+
+def sample(i, geo_fix='POINT(-86.2 41.7 230.5)'):
+    return {'sensor': str(i) + '.5', 'sensor-1': str(i), 'sensor_units': 'http://qudt.org/1.1/vocab/unit#PPM',
+            'geo_fix': geo_fix, 'time_stamp': '2020-07-11T15:25:0' + str(i),
+            'sensors': {'sensor': S1, 'sensor-1': S2}}
+
+
+def test_store_and_filter(tmp_path):
+    obs = observation_store(str(tmp_path / 'obs.sqlite'))
+    for i in range(3):
+        assert obs.store(DATASET, OC, {'flight': 'f'}, sample(i)) == 2
+
+    info = obs.dataset(DATASET)
+    assert info['count'] == 6
+    assert info['collection'] == str(OC)
+    assert info['flight_dict'] == {'flight': 'f'}
+
+    rows = obs.observations(DATASET, sensor=S1, start='2020-07-11T15:25:01')
+    assert [(r[0], r[4], r[5]) for r in rows] == [(1, 1.5, 'http://qudt.org/1.1/vocab/unit#PPM'),
+                                                   (2, 2.5, 'http://qudt.org/1.1/vocab/unit#PPM')]
+    assert obs.geo_fix(rows[0]) == 'POINT(-86.2 41.7 230.5)'
+
+    # unknown datasets are empty
+    assert obs.observations(URIRef('http://ld.landrs.org/id/other')) == []
+    assert obs.dataset(URIRef('http://ld.landrs.org/id/other')) is None
+
+
+def test_sample_numbers_continue(tmp_path):
+    obs = observation_store(str(tmp_path / 'obs.sqlite'))
+    obs.store(DATASET, OC, {}, sample(0, 'unknown'))
+
+    # reopened store carries on
+    obs = observation_store(str(tmp_path / 'obs.sqlite'))
+    obs.store(DATASET, OC, {}, sample(1))
+
+    rows = obs.observations(DATASET)
+    assert [r[0] for r in rows] == [0, 0, 1, 1]
+    assert obs.geo_fix(rows[0]) == 'unknown'
+
+
+def test_pages(tmp_path, monkeypatch):
+    obs = observation_store(str(tmp_path / 'obs.sqlite'))
+    for i in range(5):
+        obs.store(DATASET, OC, {}, sample(i))
+
+    rows = obs.observations(DATASET, after=(1, 0), last=(3, 0), limit=2)
+    assert [r[:2] for r in rows] == [(1, 1), (2, 0)]
+    assert obs.row(DATASET, 4, 1)[:2] == (4, 1)
+
+    # a page at a time
+    monkeypatch.setattr(columnar, 'observation_page', 3)
+    assert [r[:2] for r in obs.scan(DATASET, last=(3, 1))] == [r[:2] for r in obs.observations(DATASET)][:8]
+
+
+def view_of(obs, expanded):
+    # a row, an observation of the collection
+    def expand(row, graph, first_store, node_id):
+        expanded.append(row[:2])
+        node = URIRef('http://ld.landrs.org/id/' + node_id('observation'))
+        graph.add((node, RDF.type, SOSA.Observation))
+        graph.add((node, SOSA.madeBySensor, URIRef(row[3])))
+        graph.add((node, SOSA.hasSimpleResult, Literal(row[4])))
+        graph.add((OC, SOSA.hasMember, node))
+        graph.add((OC, SOSA.madeBySensor, URIRef(row[3])))
+        graph.set((OC, PROV.endedAtTime, Literal(row[2])))
+        if first_store:
+            graph.add((OC, PROV.startedAtTime, Literal(row[2])))
+
+    store = ConjunctiveGraph()
+    store.get_context(DATASET).add((OC, RDF.type, SOSA.ObservationCollection))
+    return observation_view_store(store.store, obs, DATASET, expand)
+
+
+def test_observation_view(tmp_path):
+    obs = observation_store(str(tmp_path / 'obs.sqlite'))
+    for i in range(3):
+        obs.store(DATASET, OC, {}, sample(i))
+
+    expanded = []
+    view_store = view_of(obs, expanded)
+    view_store.refresh()
+    view = ConjunctiveGraph(view_store)
+
+    # 6 rows of 4 triples, the collection's type, end, start and 2 sensors
+    assert len(list(view.triples((None, None, None)))) == 6 * 4 + 5
+    assert view.value(OC, PROV.startedAtTime) == Literal('2020-07-11T15:25:00')
+    assert view.value(OC, PROV.endedAtTime) == Literal('2020-07-11T15:25:02')
+    assert set(view.objects(OC, SOSA.madeBySensor)) == {URIRef(S1), URIRef(S2)}
+    assert [c.identifier for c in view.contexts()] == [DATASET]
+
+    # a row's node only expands that row
+    members = sorted(view.objects(OC, SOSA.hasMember))
+    assert len(members) == 6
+    del expanded[:]
+    view_store.row_triples.cache_clear()
+    assert view.value(members[3], SOSA.hasSimpleResult) == Literal(1.0)
+    assert view.value(None, SOSA.hasMember, members[3]) == OC
+    assert expanded == [(1, 1)]
+
+    # stored rows are read after a refresh
+    obs.store(DATASET, OC, {}, sample(3))
+    assert len(list(view.objects(OC, SOSA.hasMember))) == 6
+    view_store.refresh()
+    assert len(list(view.objects(OC, SOSA.hasMember))) == 8
+    assert view.value(OC, PROV.endedAtTime) == Literal('2020-07-11T15:25:03')
+
+    # same nodes every view
+    assert sorted(ConjunctiveGraph(view_of(obs, [])).objects(OC, SOSA.hasMember)) == []
+    again = view_of(obs, [])
+    again.refresh()
+    assert sorted(ConjunctiveGraph(again).objects(OC, SOSA.hasMember))[:6] == members
+
+    # read only
+    with pytest.raises(Exception):
+        view.add((OC, RDF.type, SOSA.Observation))
@@ -0,0 +1,73 @@
+'''
+SPARQL dataset tests.
+
+From module root call,
+python3 -m pytest tests/test_dataset.py
+'''
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal
+from rdflib.namespace import RDFS
+from rdflib.plugins.sparql import prepareQuery
+from graph.py_drone_graph_dataset import query_dataset, dataset_graph
+from graph.py_drone_graph_execution import query_guard, guarded_graph
+
+EX = 'http://example.org/'
+FLIGHTS = [URIRef(EX + 'flight%d' % i) for i in range(3)]
+
+
+def sample_graph():
+    g = ConjunctiveGraph()
+    for i, flight in enumerate(FLIGHTS):
+        graph = Graph(g.store, identifier=flight)
+        graph.add((URIRef(EX + 'drone'), RDFS.label, Literal('drone')))
+        graph.add((URIRef(EX + 'obs%d' % i), RDFS.label, Literal('obs %d' % i)))
+    return g
+
+
+def labels(graph, query, protocol=None):
+    prepared = prepareQuery(query)
+    default, named = query_dataset(prepared, protocol)
+    return sorted(str(row[0]) for row in dataset_graph(graph, default, named).query(prepared))
+
+
+def test_query_dataset():
+    prepared = prepareQuery('SELECT * FROM <%s> FROM NAMED <%s> { ?s ?p ?o }' % (FLIGHTS[0], FLIGHTS[1]))
+    assert query_dataset(prepared) == ([FLIGHTS[0]], [FLIGHTS[1]])
+    # not left for rdflib to load
+    assert prepared.algebra.datasetClause is None
+
+    # protocol overrides the query
+    prepared = prepareQuery('SELECT * FROM <%s> { ?s ?p ?o }' % FLIGHTS[0])
+    assert query_dataset(prepared, {'default': [str(FLIGHTS[2])], 'named': []}) == ([FLIGHTS[2]], [])
+
+    prepared = prepareQuery('SELECT * { ?s ?p ?o }')
+    assert query_dataset(prepared, {'default': [], 'named': []}, [str(FLIGHTS[1])]) == ([FLIGHTS[1]], None)
+    assert query_dataset(prepared) == (None, None)
+
+
+def test_default_graph_merge():
+    g = sample_graph()
+    query = 'SELECT ?l FROM <%s> FROM <%s> { ?s <%s> ?l }' % (FLIGHTS[0], FLIGHTS[1], RDFS.label)
+    # drone is in both graphs, once in the merge
+    assert labels(g, query) == ['drone', 'obs 0', 'obs 1']
+
+    query = 'SELECT ?l { ?s <%s> ?l }' % RDFS.label
+    assert labels(g, query, {'default': [str(FLIGHTS[2])]}) == ['drone', 'obs 2']
+
+
+def test_named_graphs():
+    g = sample_graph()
+    assert labels(g, 'SELECT DISTINCT ?g FROM NAMED <%s> { GRAPH ?g { ?s ?p ?o } }' % FLIGHTS[1]) == [str(FLIGHTS[1])]
+
+    # outside the dataset
+    assert labels(g, 'SELECT ?l FROM NAMED <%s> { GRAPH <%s> { ?s ?p ?l } }' % (FLIGHTS[1], FLIGHTS[0])) == []
+
+    # default graph empty with only named graphs
+    assert labels(g, 'SELECT ?l FROM NAMED <%s> { ?s ?p ?l }' % FLIGHTS[1]) == []
+
+
+def test_only_selected_graphs_read():
+    g = sample_graph()
+    guard = query_guard()
+    graph = guarded_graph(dataset_graph(g, [FLIGHTS[0]], []), guard)
+    assert len(graph.query('SELECT * { ?s ?p ?o }')) == 2
+    assert guard.scans == 2
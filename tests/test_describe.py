@@ -0,0 +1,63 @@
+'''
+DESCRIBE tests.
+
+From module root call,
+python3 -m pytest tests/test_describe.py
+'''
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal, BNode
+from rdflib.namespace import RDF, RDFS
+from graph.py_drone_graph_describe import is_describe, prepare_describe, describe_nodes, concise_description
+from graph.py_drone_graph_execution import query_guard, guarded_graph
+
+EX = 'http://example.org/'
+FLIGHT = URIRef(EX + 'flight')
+DRONE = URIRef(EX + 'drone')
+
+
+def sample_graph():
+    g = ConjunctiveGraph()
+    graph = Graph(g.store, identifier=URIRef(EX + 'graph'))
+    graph.add((FLIGHT, RDF.type, URIRef(EX + 'Flight')))
+    graph.add((FLIGHT, URIRef(EX + 'drone'), DRONE))
+    graph.add((DRONE, RDF.type, URIRef(EX + 'Drone')))
+
+    # nested blank nodes, with a cycle
+    a, b, c = BNode(), BNode(), BNode()
+    graph.add((FLIGHT, URIRef(EX + 'path'), a))
+    graph.add((a, URIRef(EX + 'first'), b))
+    graph.add((a, URIRef(EX + 'second'), c))
+    graph.add((b, RDFS.label, Literal('b')))
+    graph.add((c, URIRef(EX + 'back'), a))
+    return g
+
+
+def test_is_describe():
+    assert is_describe('DESCRIBE <%s>' % FLIGHT)
+    assert is_describe('PREFIX ex: <%s>\n# describe it\n describe ex:flight' % EX)
+    assert not is_describe('SELECT * { ?s ?p "DESCRIBE" }')
+
+
+def test_concise_description():
+    g = sample_graph()
+    guard = query_guard()
+    description = concise_description(guarded_graph(g, guard), [FLIGHT])
+
+    # flight, then a, then b and c, cycle back to a not followed
+    assert len(description) == 7
+    assert (DRONE, RDF.type, URIRef(EX + 'Drone')) not in description
+    assert guard.lookups == 3
+
+
+def test_describe_query():
+    g = sample_graph()
+
+    prepared, terms = prepare_describe('PREFIX ex: <%s> DESCRIBE ex:flight ex:drone' % EX)
+    assert describe_nodes(g, prepared, terms) == [FLIGHT, DRONE]
+
+    prepared, terms = prepare_describe('DESCRIBE ?d <%s> WHERE { ?f <%sdrone> ?d }' % (FLIGHT, EX))
+    nodes = describe_nodes(g, prepared, terms)
+    assert nodes == [FLIGHT, DRONE]
+    assert len(concise_description(g, nodes)) == 8
+
+    prepared, terms = prepare_describe('DESCRIBE * WHERE { ?f a <%sFlight> }' % EX)
+    assert describe_nodes(g, prepared, terms) == [FLIGHT]
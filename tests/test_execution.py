@@ -0,0 +1,110 @@
+'''
+SPARQL execution pool tests.
+
+From module root call,
+python3 -m pytest tests/test_execution.py
+'''
+import json
+import time
+import pytest
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal
+from rdflib.namespace import RDFS
+from graph.py_drone_graph_execution import query_executor, query_guard, query_limit, guarded_graph
+from graph.py_drone_graph_stream import stream_query
+
+EX = 'http://example.org/'
+CARTESIAN = 'SELECT * WHERE { ?a ?b ?c . ?d ?e ?f . ?g ?h ?i }'
+
+
+def sample_graph(n=50):
+    g = ConjunctiveGraph()
+    graph = Graph(g.store, identifier=URIRef(EX + 'graph'))
+    for i in range(n):
+        graph.add((URIRef(EX + 'n%d' % i), RDFS.label, Literal(i)))
+    return g
+
+
+def test_same_results():
+    g = sample_graph()
+    query = 'SELECT ?s WHERE { GRAPH ?g { ?s ?p 3 } }'
+    guarded = guarded_graph(g, query_guard(10, 100, 1000))
+    assert list(guarded.query(query)) == list(g.query(query))
+
+
+def test_scan_limit():
+    g = sample_graph()
+    guard = query_guard(max_scan=1000)
+    with pytest.raises(query_limit, match='more than 1000 triples'):
+        guarded_graph(g, guard).query(CARTESIAN).bindings
+
+
+def test_row_limit():
+    g = sample_graph()
+    guard = query_guard(max_rows=10)
+    chunks, content_type = stream_query(guarded_graph(g, guard), 'SELECT * { ?s ?p ?o }',
+                                        'text/csv', guard=guard)
+    with pytest.raises(query_limit, match='more than 10 results'):
+        list(chunks)
+
+    with pytest.raises(query_limit):
+        query_guard(max_rows=10).check_result(g.query('SELECT * { ?s ?p ?o }'))
+
+
+def test_timeout():
+    g = sample_graph()
+    executor = query_executor(1, 0.5)
+
+    guard = executor.guard()
+    start = time.time()
+    with pytest.raises(query_limit, match='timed out'):
+        executor.run(guard, lambda: guarded_graph(g, guard).query(CARTESIAN).bindings)
+
+    # worker stops and is free for the next query
+    guard = executor.guard()
+    assert executor.run(guard, lambda: len(guarded_graph(g, guard))) == 50
+    assert time.time() - start < 5
+
+
+def test_stream_cancel():
+    g = sample_graph()
+    executor = query_executor(1, 10)
+
+    guard = executor.guard()
+    chunks, content_type = stream_query(guarded_graph(g, guard), CARTESIAN, 'text/csv', guard=guard)
+    chunks = executor.stream(guard, chunks)
+    next(chunks)
+
+    # client goes away
+    chunks.close()
+    assert guard.cancelled == 'query closed'
+
+    guard = executor.guard()
+    chunks, content_type = stream_query(guarded_graph(g, guard), 'SELECT * { ?s ?p ?o }',
+                                        'application/sparql-results+json', guard=guard)
+    assert len(json.loads(''.join(executor.stream(guard, chunks)))['results']['bindings']) == 50
+
+
+def test_stream_slow_client():
+    executor = query_executor(1, 0.5)
+
+    def rows(n):
+        for i in range(n):
+            # as a store lookup
+            guard.check()
+            yield str(i)
+
+    # client reads slower than the query timeout
+    guard = executor.guard()
+    chunks = executor.stream(guard, rows(20))
+    received = []
+    for chunk in chunks:
+        received.append(chunk)
+        time.sleep(0.1)
+    assert len(received) == 20
+
+    # an open stream does not hold the query worker
+    guard = executor.guard()
+    chunks = executor.stream(guard, rows(100))
+    assert next(chunks) == '0'
+    assert executor.run(executor.guard(), lambda: 'free') == 'free'
+    chunks.close()
@@ -0,0 +1,64 @@
+'''
+Streaming export tests.
+
+From module root call,
+python3 -m pytest tests/test_export.py
+'''
+import gzip
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal, BNode, plugin
+from rdflib.store import Store
+from rdflib.namespace import RDF, RDFS
+import graph.py_drone_graph_export as export
+from graph.py_drone_graph_export import export_graph, export_format, n_quads
+from graph.py_drone_graph_stream import n_triples
+
+EX = 'http://example.org/'
+GRAPHS = [URIRef(EX + 'graph%d' % i) for i in range(3)]
+
+
+def sample_graph(g):
+    for graph_id in GRAPHS:
+        graph = Graph(g.store, identifier=graph_id)
+        for i in range(20):
+            node = URIRef(EX + 'n%d' % i)
+            graph.add((node, RDF.type, URIRef(EX + 'Node')))
+            graph.add((node, RDFS.label, Literal('node %d' % i, lang='en')))
+            graph.add((node, RDFS.seeAlso, BNode()))
+    return g
+
+
+def sql_graph(tmp_path):
+    store = plugin.get('SQLAlchemy', Store)(identifier=URIRef(EX + 'store'))
+    g = ConjunctiveGraph(store)
+    g.open(Literal('sqlite:///' + str(tmp_path / 'export.sqlite')), create=True)
+    return sample_graph(g)
+
+
+def test_export_format():
+    assert export_format('application/n-quads') == n_quads
+    assert export_format(filename='dgraph.ttl.gz') == n_triples
+    assert export_format('*/*', default=n_triples) == n_triples
+    assert export_format('application/n-quads', 'dgraph.nt') == n_triples
+
+
+def check_export(g):
+    quads = ConjunctiveGraph()
+    quads.parse(data=''.join(export_graph(g)), format='nquads')
+    assert sorted(c.identifier for c in quads.contexts()) == GRAPHS
+    assert len(quads.get_context(GRAPHS[1])) == 60
+
+    graph = Graph().parse(data=''.join(export_graph(g, n_triples, GRAPHS[2])), format='nt')
+    assert len(graph) == 60
+
+    data = gzip.decompress(b''.join(export_graph(g, compress=True))).decode('utf-8')
+    assert len(data.splitlines()) == 180
+
+
+def test_export_memory():
+    check_export(sample_graph(ConjunctiveGraph()))
+
+
+def test_export_sql_pages(tmp_path, monkeypatch):
+    # pages end inside each table
+    monkeypatch.setattr(export, 'page_rows', 7)
+    check_export(sql_graph(tmp_path))
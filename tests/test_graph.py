@@ -14,6 +14,8 @@ python3 -m unittest tests/test_graph.py
 import unittest
 import os
 import shutil
+from rdflib import URIRef
+from rdflib.namespace import RDF
 
 #get the graph class
 from graph.py_drone_graph import py_drone_graph
@@ -59,6 +61,30 @@ class TestGraphMethods(unittest.TestCase):
                     "sensor-1": "431.5", 'observation_collection': '*'}, flight_dict)
         self.assertIn('collection uuid', result)
 
+    #test collection and dataset graphs are indexed
+    def test_storage_index(self):
+        flight_dict = {'flight_time_stamp_end': 'endTime', 'flight_time_stamp_start': 'startTime'}
+        data = {"time_stamp": "2020-07-11T15:25:10.106776", "geo_fix": "POINT(78.65 -43.76 486.1)", \
+                "sensors": {"sensor-1": "http://ld.landrs.org/id/c2Vuc29y"}, "sensor-1": "431.5", \
+                'observation_collection': '*', 'dataset': 'http://ld.landrs.org/id/ZGF0YXNldA'}
+        result = self.d_graph.store_data_point(dict(data), flight_dict)
+        self.assertTrue(result['status'])
+
+        # both indexed, second store uses them
+        collection = result['observation_collection']
+        self.assertIn(collection, self.d_graph.collection_index)
+        self.assertIn('http://ld.landrs.org/id/ZGF0YXNldA', self.d_graph.graph_index)
+
+        data.update({'observation_collection': str(collection)})
+        result = self.d_graph.store_data_point(data, flight_dict)
+        self.assertTrue(result['status'])
+
+        # dropped when the store changes them
+        self.d_graph.g1.remove((collection, RDF.type, None))
+        self.assertNotIn(collection, self.d_graph.collection_index)
+        self.d_graph.g.get_context(URIRef('http://ld.landrs.org/id/ZGF0YXNldA')).remove((None, None, None))
+        self.assertNotIn('http://ld.landrs.org/id/ZGF0YXNldA', self.d_graph.graph_index)
+
     #test db has data, RUN THIS BEFORE STORAGE
     def test_db(self):
         print("DB TEST")
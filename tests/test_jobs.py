@@ -0,0 +1,106 @@
+'''
+SPARQL job tests.
+
+From module root call,
+python3 -m pytest tests/test_jobs.py
+'''
+import csv
+import io
+import json
+import time
+import pytest
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal
+from graph.py_drone_graph_jobs import query_jobs
+from graph.py_drone_graph_execution import guarded_graph
+from graph.py_drone_graph_stream import stream_query, json_lines, n_triples
+
+EX = 'http://example.org/'
+SELECT = 'SELECT ?s ?label WHERE { ?s <%slabel> ?label } ORDER BY ?label' % EX
+
+
+def sample_graph(n=2500):
+    g = ConjunctiveGraph()
+    graph = Graph(g.store, identifier=URIRef(EX + 'graph'))
+    for i in range(n):
+        graph.add((URIRef(EX + 'n%d' % i), URIRef(EX + 'label'), Literal('node %05d' % i)))
+    return g
+
+
+def evaluate(graph, query, guard):
+    return stream_query(guarded_graph(graph, guard), query, json_lines + ', ' + n_triples, guard=guard)
+
+
+def wait(jobs, job_id):
+    for i in range(100):
+        status = jobs.status(job_id)
+        if status['status'] not in ['queued', 'running']:
+            return status
+        time.sleep(0.05)
+    return status
+
+
+def test_select_pages(tmp_path):
+    g = sample_graph()
+    jobs = query_jobs(str(tmp_path / 'jobs'))
+    job_id = jobs.submit(SELECT, evaluate, g, SELECT)
+
+    status = wait(jobs, job_id)
+    assert status['status'] == 'done'
+    assert status['results'] == 2500
+
+    # page across an indexed offset
+    page, content_type = jobs.page(job_id, 995, 10)
+    assert content_type == 'application/sparql-results+json'
+    page = json.loads(page)
+    assert page['head']['vars'] == ['s', 'label']
+    assert [b['label']['value'] for b in page['results']['bindings']] == ['node %05d' % i for i in range(995, 1005)]
+    assert json.loads(jobs.page(job_id, 2500, 10)[0])['results']['bindings'] == []
+    with pytest.raises(ValueError):
+        jobs.page(job_id, -1, 10)
+
+    # whole result
+    chunks, content_type = jobs.download(job_id)
+    assert len(json.loads(''.join(chunks))['results']['bindings']) == 2500
+    chunks, content_type = jobs.download(job_id, 'text/csv')
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert rows[0] == ['s', 'label']
+    assert rows[1] == [EX + 'n0', 'node 00000']
+
+    # kept over a restart
+    assert query_jobs(str(tmp_path / 'jobs')).status(job_id)['results'] == 2500
+
+
+def test_construct_and_eviction(tmp_path):
+    g = sample_graph(100)
+    query = 'CONSTRUCT { ?s <%sname> ?label } WHERE { ?s <%slabel> ?label }' % (EX, EX)
+    jobs = query_jobs(str(tmp_path / 'jobs'), max_bytes=12000)
+
+    first = jobs.submit(query, evaluate, g, query)
+    assert wait(jobs, first)['status'] == 'done'
+    page, content_type = jobs.page(first, 10, 5)
+    assert content_type == 'application/n-triples'
+    assert len(Graph().parse(data=page, format='nt')) == 5
+
+    # both do not fit, the least recently read goes
+    second = jobs.submit(query, evaluate, g, query)
+    assert wait(jobs, second)['status'] == 'done'
+    assert jobs.status(first) is None
+
+    # too large for the cap
+    jobs.max_bytes = 1000
+    third = jobs.submit(query, evaluate, g, query)
+    status = wait(jobs, third)
+    assert status['status'] == 'failed'
+    assert 'larger than' in status['error']
+
+
+def test_cancel(tmp_path):
+    g = sample_graph(50)
+    query = 'SELECT * WHERE { ?a ?b ?c . ?d ?e ?f . ?g ?h ?i }'
+    jobs = query_jobs(str(tmp_path / 'jobs'), max_bytes=0)
+    job_id = jobs.submit(query, evaluate, g, query)
+    time.sleep(0.2)
+
+    assert jobs.cancel(job_id)
+    assert wait(jobs, job_id)['status'] == 'cancelled'
+    assert not jobs.cancel('missing')
@@ -0,0 +1,107 @@
+'''
+Journaled store tests.
+
+From module root call,
+python3 -m pytest tests/test_journal.py
+'''
+import os
+import threading
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal, BNode
+from rdflib.namespace import RDFS, XSD
+from graph.py_drone_graph_journal import journal_store
+
+DATASET = URIRef('http://ld.landrs.org/id/dataset')
+OC = URIRef('http://ld.landrs.org/id/oc')
+
+
+def open_store(location, compact=100000, sync_period=0):
+    store = journal_store(identifier=URIRef('store_test'), compact=compact, sync_period=sync_period)
+    store.open(location, create=True)
+    return store
+
+
+def test_replay_adds_and_removes(tmp_path):
+    location = str(tmp_path / 'db' / 'test')
+    store = open_store(location)
+    graph = Graph(store, identifier=DATASET)
+    b = BNode()
+    graph.add((OC, RDFS.label, Literal('a "quoted"\nlabel', lang='en')))
+    graph.add((OC, RDFS.comment, Literal('1.5', datatype=XSD.double)))
+    graph.add((OC, RDFS.seeAlso, b))
+    graph.add((b, RDFS.label, Literal('end')))
+    graph.set((b, RDFS.label, Literal('new end')))
+    graph.remove((OC, RDFS.comment, None))
+    store.close()
+
+    # new store from the journal
+    graph = Graph(open_store(location), identifier=DATASET)
+    assert len(graph) == 3
+    assert graph.value(OC, RDFS.label) == Literal('a "quoted"\nlabel', lang='en')
+    assert graph.value(graph.value(OC, RDFS.seeAlso), RDFS.label) == Literal('new end')
+
+
+def test_compaction(tmp_path):
+    location = str(tmp_path / 'test')
+    store = open_store(location, compact=5)
+    graph = Graph(store, identifier=DATASET)
+    for i in range(12):
+        graph.add((OC, RDFS.label, Literal(str(i))))
+
+    # compacted in the background, close waits for it
+    store.close()
+    assert os.path.isfile(location + '.nq')
+    assert not os.path.isfile(location + '.journal.old')
+
+    # torn line at end of journal is skipped
+    with open(location + '.journal', 'a') as f:
+        f.write('A <http://ld.landrs.org/id/oc> <http://www.w3.org/2000/01/rdf-schema#lab')
+
+    g = ConjunctiveGraph(open_store(location))
+    assert len(g.get_context(DATASET)) == 12
+
+
+def test_interrupted_compaction(tmp_path):
+    location = str(tmp_path / 'test')
+    first = '<http://ld.landrs.org/id/oc> <http://www.w3.org/2000/01/rdf-schema#label> "1" <http://ld.landrs.org/id/dataset> .\n'
+    second = first.replace('"1"', '"2"')
+    third = first.replace('"1"', '"3"')
+
+    # crashed with the journal set aside
+    with open(location + '.nq', 'w') as f:
+        f.write(first)
+    with open(location + '.journal.old', 'w') as f:
+        f.write('A ' + second + 'D ' + first)
+    with open(location + '.journal', 'w') as f:
+        f.write('A ' + third)
+
+    store = open_store(location)
+    labels = sorted(Graph(store, identifier=DATASET).objects(OC, RDFS.label))
+    assert labels == [Literal('2'), Literal('3')]
+    store.close()
+    assert not os.path.isfile(location + '.journal.old')
+
+    labels = sorted(Graph(open_store(location), identifier=DATASET).objects(OC, RDFS.label))
+    assert labels == [Literal('2'), Literal('3')]
+
+
+def test_write_while_reading(tmp_path):
+    store = open_store(str(tmp_path / 'test'), sync_period=0.05)
+    errors = []
+
+    # graphs added while another thread lists them
+    def write():
+        for i in range(2000):
+            Graph(store, identifier=URIRef(DATASET + str(i))).add((OC, RDFS.label, Literal(str(i))))
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while writer.is_alive():
+        try:
+            [c.identifier for c in store.contexts() for k in range(20)]
+        except Exception as ex:
+            errors.append(ex)
+            break
+    writer.join()
+
+    assert errors == []
+    assert len(list(store.contexts())) == 2000
@@ -0,0 +1,38 @@
+'''
+Label family tests.
+
+From module root call,
+python3 -m pytest tests/test_labels.py
+'''
+import copy
+from graph.py_drone_graph_labels import label_dict
+
+
+def wildcard(d, label):
+    # the scan label_dict replaces
+    return [key for key in d.keys() if label == key[:len(label)] and
+            (len(key) == len(label) or key[len(label)] == '-')]
+
+
+def test_family_matches_wildcard_scan():
+    d = label_dict({'sensor': 1, 'sensor_label': 2, 'sensor-1': 3, 'sensor_label-1': 4,
+                    'sensor-1-2': 5, 'the_dataset': 6})
+    d.update({'sensor-2': 7})
+    d['sensor_label-2'] = 8
+
+    for label in ['sensor', 'sensor_label', 'sensor-1', 'the_dataset', 'sens', 'missing']:
+        assert d.family(label) == wildcard(d, label)
+
+
+def test_family_follows_removals():
+    d = label_dict({'sensor': 1, 'sensor-1': 2})
+    d.pop('sensor')
+    del d['sensor-1']
+    assert d.family('sensor') == []
+    assert d.families == {}
+
+    d.setdefault('sensor-3', 1)
+    e = copy.deepcopy(d)
+    e['sensor-4'] = 2
+    assert d.family('sensor') == ['sensor-3']
+    assert e.family('sensor') == ['sensor-3', 'sensor-4']
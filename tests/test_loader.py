@@ -0,0 +1,83 @@
+'''
+Graph file loader tests.
+
+From module root call,
+python3 -m pytest tests/test_loader.py
+'''
+import os
+from rdflib import Graph
+from rdflib.compare import isomorphic
+import graph.py_drone_graph_loader as loader
+
+TTL = '''@prefix ex: <http://example.org/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+ex:a rdfs:label "a" ; rdfs:seeAlso <b>, [ rdfs:label "blank"@en ] .
+'''
+PUBLIC_ID = 'http://ld.landrs.org/'
+
+
+def test_snapshot_matches_load(tmp_path):
+    fn = str(tmp_path / 'test.ttl')
+    with open(fn, 'w') as f:
+        f.write(TTL)
+
+    snapshot = loader.parse_file(fn, 'ttl', PUBLIC_ID)
+    graph = Graph()
+    graph.addN((s, p, o, graph) for s, p, o in loader.snapshot_triples(snapshot))
+
+    expected = Graph()
+    expected.load(fn, format='ttl', publicID=PUBLIC_ID)
+    assert isomorphic(graph, expected)
+    assert ('ex', expected.namespace_manager.store.namespace('ex')) in snapshot['namespaces']
+
+
+def test_cache_by_content(tmp_path, monkeypatch):
+    fn = str(tmp_path / 'test.ttl')
+    with open(fn, 'w') as f:
+        f.write(TTL)
+    cache = loader.graph_cache(str(tmp_path / 'cache'))
+
+    # count parses
+    parsed = []
+    parse_file = loader.parse_file
+    monkeypatch.setattr(loader, 'parse_file', lambda *args: parsed.append(args) or parse_file(*args))
+
+    first = cache.load(fn, 'ttl', PUBLIC_ID)
+    assert cache.load(fn, 'ttl', PUBLIC_ID) == first
+    assert len(parsed) == 1
+
+    # another base is another snapshot
+    cache.load(fn, 'ttl', 'http://example.org/base/')
+    assert len(parsed) == 2
+
+    # so is a change to the file
+    with open(fn, 'a') as f:
+        f.write('<http://example.org/c> <http://example.org/p> "c" .\n')
+    changed = cache.load(fn, 'ttl', PUBLIC_ID)
+    assert len(parsed) == 3
+    assert len(changed['triples']) == len(first['triples']) + 3
+    assert len(os.listdir(str(tmp_path / 'cache'))) == 3
+
+
+def test_parse_files_in_pool(tmp_path):
+    file_paths = []
+    for i in range(3):
+        fn = str(tmp_path / ('test%d.ttl' % i))
+        with open(fn, 'w') as f:
+            f.write(TTL + '<http://example.org/n> <http://example.org/p> "%d" .\n' % i)
+        file_paths.append(fn)
+
+    # and one that does not parse
+    fn = str(tmp_path / 'bad.ttl')
+    with open(fn, 'w') as f:
+        f.write('not turtle')
+    file_paths.append(fn)
+
+    results = loader.parse_files(file_paths, 'ttl', PUBLIC_ID, 2)
+    assert isinstance(results[3], Exception)
+    for fn, snapshot in zip(file_paths[:3], results):
+        expected = Graph()
+        expected.load(fn, format='ttl', publicID=PUBLIC_ID)
+        graph = Graph()
+        graph.addN((s, p, o, graph) for s, p, o in loader.snapshot_triples(snapshot))
+        assert isomorphic(graph, expected)
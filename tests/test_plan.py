@@ -0,0 +1,99 @@
+'''
+Compiled store plan tests.
+
+From module root call,
+python3 -m pytest tests/test_plan.py
+'''
+import rdflib
+from rdflib import ConjunctiveGraph, Graph, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import PROV, SH, XSD
+from graph.py_drone_graph_catalog import shape_catalog
+from graph.py_drone_graph_cardinality import cardinality_tracker
+from graph.py_drone_graph_labels import label_dict
+from graph.py_drone_graph_plan import py_drone_graph_plan
+from graph.py_drone_graph_store import py_drone_graph_store
+
+SOSA = rdflib.Namespace('http://www.w3.org/ns/sosa/')
+QUDT = rdflib.Namespace('http://qudt.org/schema/qudt/')
+BASE = rdflib.Namespace('http://ld.landrs.org/id/')
+
+VIOLATION = str(SH.Violation)
+
+SHAPES = {
+    'the_collection': {'target_class': SOSA.ObservationCollection, 'properties': [
+        {'path': str(SOSA.hasMember), 'class': str(SOSA.Observation), 'nodeKind': str(SH.IRI),
+         'name': 'Observation'},
+        {'path': str(PROV.endedAtTime), 'datatype': str(XSD.string), 'name': 'endTime',
+         'maxCount': 1, 'severity': VIOLATION}]},
+    'Observation': {'target_class': SOSA.Observation, 'properties': [
+        {'path': str(SOSA.madeBySensor), 'class': str(SOSA.Sensor), 'nodeKind': str(SH.IRI),
+         'name': 'sensor_label'},
+        {'path': str(SOSA.hasResult), 'class': str(QUDT.QuantityValue), 'nodeKind': str(SH.BlankNode),
+         'name': 'Result'},
+        {'path': str(SOSA.resultTime), 'datatype': str(XSD.dateTime), 'name': 'timeStamp',
+         'maxCount': 1, 'severity': VIOLATION}]},
+    'Result': {'target_class': QUDT.QuantityValue, 'nodeKind': str(SH.BlankNode), 'properties': [
+        {'path': str(QUDT.numericValue), 'datatype': str(XSD.double), 'name': 'sensor_quantity',
+         'maxCount': 1, 'severity': VIOLATION}]},
+}
+
+
+class planner(py_drone_graph_store, py_drone_graph_plan):
+    BASE = BASE
+
+    def __init__(self):
+        self.count = 0
+        self.shape_catalog = shape_catalog(ConjunctiveGraph().store)
+        self.cardinality = cardinality_tracker()
+
+    def generate_uuid(self):
+        self.count += 1
+        return 'node' + str(self.count)
+
+    def get_flight_shapes(self, flight_label):
+        if self.shape_catalog.get(BASE.term(flight_label)) is None:
+            self.shape_catalog.put(BASE.term(flight_label), SHAPES)
+        return SHAPES
+
+
+def store_samples(create):
+    graph = Graph()
+    for t in range(3):
+        nodes = label_dict({'the_collection': BASE.oc, 'sensor_label': BASE.sensor,
+                            'sensor_quantity': str(t) + '.5', 'timeStamp': '2020-07-11T15:25:0' + str(t),
+                            'endTime': '2020-07-11T15:25:0' + str(t)})
+        create(nodes, 'Flight_store', graph, 0)
+    return graph
+
+
+def test_plan_matches_create_flight():
+    interpreted = store_samples(planner().create_flight)
+    compiled = store_samples(planner().create_flight_from_plan)
+
+    assert isomorphic(interpreted, compiled)
+
+    # maxCount 1 on the existing collection, end time replaced
+    assert list(compiled.objects(BASE.oc, PROV.endedAtTime)) == [Literal('2020-07-11T15:25:02')]
+    assert len(list(compiled.objects(BASE.oc, SOSA.hasMember))) == 3
+
+
+def test_plan_matches_create_flight_tracked():
+    # collection created this session, counts from the tracker
+    p = planner()
+    p.cardinality.created(BASE.oc)
+    compiled = store_samples(p.create_flight_from_plan)
+
+    assert isomorphic(store_samples(planner().create_flight), compiled)
+    assert p.cardinality.count(compiled, BASE.oc, PROV.endedAtTime) == 1
+
+
+def test_plan_cached_with_shapes():
+    p = planner()
+    keys = ['the_collection', 'sensor_label', 'sensor_quantity', 'timeStamp', 'endTime']
+    plan = p.get_flight_plan('Flight_store', keys, 0)
+    assert p.get_flight_plan('Flight_store', keys, 0) is plan
+
+    # dropped with the shapes
+    p.shape_catalog.invalidate()
+    assert p.get_flight_plan('Flight_store', keys, 0) is not plan
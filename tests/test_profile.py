@@ -0,0 +1,78 @@
+'''
+SPARQL query profiling tests.
+
+From module root call,
+python3 -m pytest tests/test_profile.py
+'''
+import json
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal
+from rdflib.namespace import RDFS
+from rdflib.plugins.sparql import prepareQuery, CUSTOM_EVALS
+from graph.py_drone_graph_profile import query_profile, slow_query_log
+from graph.py_drone_graph_execution import query_guard, guarded_graph
+
+EX = 'http://example.org/'
+QUERY = 'SELECT ?s ?label WHERE { ?s a <%sThing> . OPTIONAL { ?s <%slabel> ?label } }' % (EX, EX)
+
+
+def sample_graph(n=20):
+    g = ConjunctiveGraph()
+    graph = Graph(g.store, identifier=URIRef(EX + 'graph'))
+    for i in range(n):
+        s = URIRef(EX + 'n%d' % i)
+        graph.add((s, RDFS.label, Literal(i)))
+        graph.add((s, URIRef(EX + 'label'), Literal('node %d' % i)))
+        if i % 2:
+            graph.add((s, URIRef('http://www.w3.org/1999/02/22-rdf-syntax-ns#type'), URIRef(EX + 'Thing')))
+    return g
+
+
+def find(node, name):
+    if node['operator'] == name:
+        return node
+    for child in node.get('children', []):
+        found = find(child, name)
+        if found is not None:
+            return found
+    return None
+
+
+def test_operator_times():
+    g = sample_graph()
+    guard = query_guard()
+    prepared = prepareQuery(QUERY)
+
+    with query_profile(g.store) as profile:
+        result = guarded_graph(g, guard).query(prepared)
+        assert len(result) == 10
+
+    # hook only installed while profiling
+    assert 'profile' not in CUSTOM_EVALS
+
+    tree = profile.algebra(prepared.algebra)
+    assert tree['operator'] == 'SelectQuery'
+    left_join = find(tree, 'LeftJoin')
+    assert left_join['solutions'] == 10
+    assert left_join['time'] >= 0
+
+    # optional part looked up once per solution of the first
+    bgps = [child for child in left_join['children'] if child['operator'] == 'BGP']
+    assert bgps[1]['calls'] == 10
+    assert '?s <%slabel> ?label' % EX in bgps[1]['triples']
+    assert guard.lookups == 11
+
+    # not an SQL store
+    assert profile.sql_statements is None
+
+
+def test_slow_query_log(tmp_path):
+    location = str(tmp_path / 'slow.log')
+    log = slow_query_log(location, 0.5)
+    assert not log.record('SELECT * { ?s ?p ?o }', 0.1)
+    assert log.record('SELECT * { ?s ?p ?o }', 1.5, query_guard().stats())
+
+    with open(location) as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == 1
+    assert lines[0]['elapsed'] == 1.5
+    assert lines[0]['lookups'] == 0
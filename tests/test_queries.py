@@ -0,0 +1,68 @@
+'''
+Named query registry tests.
+
+From module root call,
+python3 -m pytest tests/test_queries.py
+'''
+import pytest
+from rdflib import Graph, URIRef, Literal
+from rdflib.namespace import RDF, RDFS
+from graph.py_drone_graph_queries import query_registry
+
+BASE = 'http://ld.landrs.org/id/'
+LANDRS = 'http://schema.landrs.org/schema/'
+
+
+def sample_graph():
+    g = Graph()
+    node = URIRef(BASE + 'node')
+    g.add((URIRef(LANDRS + 'Sensor'), RDFS.subClassOf, URIRef(LANDRS + 'Thing')))
+    g.add((node, RDF.type, URIRef(LANDRS + 'Sensor')))
+    g.add((node, RDF.type, URIRef(LANDRS + 'Thing')))
+    g.add((node, RDFS.label, Literal('a sensor')))
+    g.add((URIRef(BASE + 'other'), RDFS.label, Literal('other')))
+    return g
+
+
+def test_prepared_query():
+    queries = query_registry()
+    g = sample_graph()
+
+    rows = list(queries.query(g, 'node', {'node': BASE + 'node'}))
+    assert len(rows) == 3
+    assert (RDFS.label, Literal('a sensor')) in [tuple(r) for r in rows]
+
+    # prepared once
+    assert queries.prepare('node') is queries.prepare('node')
+
+    rows = list(queries.query(g, 'node_type', {'node': BASE + 'node'}))
+    assert [r[0] for r in rows] == [URIRef(LANDRS + 'Sensor')]
+
+
+def test_remote_text_matches_local():
+    queries = query_registry()
+    g = sample_graph()
+
+    text = queries.remote('node_type', {'node': BASE + 'node'})
+    assert 'VALUES (?node) { (<' + BASE + 'node>) }' in text
+    assert [r[0] for r in g.query(text)] == [URIRef(LANDRS + 'Sensor')]
+
+
+def test_register_and_parameters():
+    queries = query_registry()
+    queries.register('labelled', 'SELECT ?s WHERE { ?s rdfs:label ?label }', {'label': 'literal'}, 'by label')
+    assert queries.list()['labelled'] == {'description': 'by label', 'params': ['label']}
+
+    rows = list(queries.query(sample_graph(), 'labelled', {'label': 'other'}))
+    assert [r[0] for r in rows] == [URIRef(BASE + 'other')]
+
+    with pytest.raises(Exception, match='label'):
+        queries.bindings('labelled', {})
+
+
+def test_cache_key_names_parameters():
+    queries = query_registry()
+    queries.register('between', 'SELECT ?s WHERE { ?s rdfs:label ?from, ?to }', {'from': 'literal', 'to': 'literal'})
+    forward = queries.cache_key('between', queries.bindings('between', {'from': 'a', 'to': 'b'}))
+    swapped = queries.cache_key('between', queries.bindings('between', {'from': 'b', 'to': 'a'}))
+    assert forward != swapped
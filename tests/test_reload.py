@@ -0,0 +1,101 @@
+'''
+Incremental file reload tests.
+
+From module root call,
+python3 -m pytest tests/test_reload.py
+'''
+import os
+import pytest
+from rdflib import Graph, URIRef, Literal
+from rdflib.namespace import RDFS
+from graph.py_drone_graph import py_drone_graph
+
+EX = 'http://example.org/'
+DATASET = URIRef('http://ld.landrs.org/id/dataset')
+
+
+def write(fn, triples):
+    with open(fn, 'w') as f:
+        f.write('@prefix ex: <%s> .\n@prefix rdfs: <%s> .\n' % (EX, RDFS))
+        f.write(triples)
+
+
+def open_graph(tmp_path, file_reload):
+    gdict = {'name': 'landrs_test', 'db_location': os.path.relpath(str(tmp_path / 'db' / 'test')),
+             'file_format': 'ttl', 'file': str(tmp_path / 'ont') + '/', 'file_reload': file_reload,
+             'flight_shacl_filename': str(tmp_path / 'none.ttl')}
+    return py_drone_graph('MjlmNmVmZTAtNGU1OS00N2I4LWI3MzYtODZkMDQ0MTRiNzcxCg==', gdict,
+                          'http://ld.landrs.org/id/', 'http://ld.landrs.org/')
+
+
+def labels(graph):
+    return sorted(str(o) for o in graph.objects(None, RDFS.label))
+
+
+def test_reload_changed_files(tmp_path):
+    os.makedirs(str(tmp_path / 'ont'))
+    write(str(tmp_path / 'ont' / 'a.ttl'), 'ex:a rdfs:label "a" . ex:shared rdfs:label "shared" .\n')
+    write(str(tmp_path / 'ont' / 'b.ttl'), 'ex:b rdfs:label "b" . ex:shared rdfs:label "shared" .\n')
+    write(str(tmp_path / 'ont' / 'c_shape.ttl'), 'ex:c rdfs:label "c" .\n')
+
+    d_graph = open_graph(tmp_path, 'False')
+    assert labels(d_graph.g1) == ['a', 'b', 'shared']
+    assert labels(d_graph.g2) == ['c']
+
+    # logged data
+    Graph(d_graph.store, identifier=DATASET).add((DATASET, RDFS.label, Literal('logged')))
+
+    # nothing changed
+    assert d_graph.reload_files() == {'added': [], 'changed': [], 'removed': []}
+
+    # change a, remove b (shared triple still in a), add d
+    write(str(tmp_path / 'ont' / 'a.ttl'), 'ex:a rdfs:label "a2" . ex:shared rdfs:label "shared" .\n')
+    os.remove(str(tmp_path / 'ont' / 'b.ttl'))
+    write(str(tmp_path / 'ont' / 'd.ttl'), 'ex:d rdfs:label "d" .\n')
+
+    changes = d_graph.reload_files()
+    assert changes['changed'] == [str(tmp_path / 'ont' / 'a.ttl')]
+    assert changes['removed'] == [str(tmp_path / 'ont' / 'b.ttl')]
+    assert changes['added'] == [str(tmp_path / 'ont' / 'd.ttl')]
+    assert labels(d_graph.g1) == ['a2', 'd', 'shared']
+    assert labels(d_graph.g2) == ['c']
+    assert labels(Graph(d_graph.store, identifier=DATASET)) == ['logged']
+
+    # snapshots of the old a and b dropped
+    assert len(os.listdir(d_graph.graph_cache.location)) == 3
+    d_graph.store.close()
+
+    # on startup
+    write(str(tmp_path / 'ont' / 'c_shape.ttl'), 'ex:c rdfs:label "c2" .\n')
+    d_graph = open_graph(tmp_path, 'Changed')
+    assert labels(d_graph.g1) == ['a2', 'd', 'shared']
+    assert labels(d_graph.g2) == ['c2']
+    assert labels(Graph(d_graph.store, identifier=DATASET)) == ['logged']
+
+
+def test_reload_keeps_other_writes(tmp_path):
+    os.makedirs(str(tmp_path / 'ont'))
+    write(str(tmp_path / 'ont' / 'a.ttl'), 'ex:a rdfs:label "a" . ex:form rdfs:label "form" .\n')
+
+    d_graph = open_graph(tmp_path, 'False')
+
+    # a form writes a triple the file has, and one a new version adds
+    d_graph.g1.add((URIRef(EX + 'form'), RDFS.label, Literal('form')))
+    d_graph.g1.add((URIRef(EX + 'later'), RDFS.label, Literal('later')))
+
+    write(str(tmp_path / 'ont' / 'a.ttl'), 'ex:a rdfs:label "a2" . ex:later rdfs:label "later" .\n')
+    d_graph.reload_files()
+    assert labels(d_graph.g1) == ['a2', 'form', 'later']
+
+    # a failed reload leaves the graph and manifest as they were
+    write(str(tmp_path / 'ont' / 'a.ttl'), 'ex:a rdfs:label "a3" .\n')
+    def fail(statement):
+        raise Exception('add failed')
+    d_graph.store._add_ignore_on_conflict = fail
+    with pytest.raises(Exception):
+        d_graph.reload_files()
+    assert labels(d_graph.g1) == ['a2', 'form', 'later']
+
+    del d_graph.store._add_ignore_on_conflict
+    d_graph.reload_files()
+    assert labels(d_graph.g1) == ['a3', 'form', 'later']
@@ -0,0 +1,54 @@
+'''
+SPARQL result cache tests.
+
+From module root call,
+python3 -m pytest tests/test_results.py
+'''
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal
+from rdflib.namespace import RDFS
+from graph.py_drone_graph_results import result_cache, normalize_query
+from graph.py_drone_graph_journal import journal_store
+
+NODE = URIRef('http://ld.landrs.org/id/node')
+
+
+def test_normalize_query():
+    assert normalize_query('  SELECT ?s\n  WHERE {\t?s ?p "a  b" }  ') == 'SELECT ?s WHERE { ?s ?p "a  b" }'
+    assert normalize_query("SELECT * { ?s ?p '''x\n  y''' }") == "SELECT * { ?s ?p '''x\n  y''' }"
+    assert normalize_query('ASK { ?s ?p "a" }') != normalize_query('ASK { ?s ?p "a " }')
+
+
+def test_generation_invalidates():
+    # IOMemory does not dispatch removals
+    g = ConjunctiveGraph(journal_store())
+    cache = result_cache(g.store)
+    graph = Graph(g.store, identifier=URIRef('http://ld.landrs.org/id/graph'))
+
+    key = cache.key('SELECT * { ?s ?p ?o }', 'application/json')
+    assert cache.key('SELECT *\n{ ?s ?p ?o }', 'application/json') == key
+    assert cache.key('SELECT * { ?s ?p ?o }', 'text/turtle') != key
+
+    etag = cache.etag('application/json')
+    cache.put(key, 'result', cache.generation)
+    assert cache.get(key) == 'result'
+
+    # write to the store
+    graph.add((NODE, RDFS.label, Literal('node')))
+    assert cache.get(key) is None
+    assert cache.etag('application/json') != etag
+
+    # result from before a write is not kept
+    generation = cache.generation
+    graph.remove((NODE, RDFS.label, None))
+    cache.put(key, 'old', generation)
+    assert cache.get(key) is None
+
+
+def test_lru():
+    cache = result_cache(ConjunctiveGraph().store, 2)
+    for i in range(3):
+        cache.put(i, i, cache.generation)
+        cache.get(0)
+    assert cache.get(0) == 0
+    assert cache.get(1) is None
+    assert cache.get(2) == 2
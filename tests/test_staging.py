@@ -0,0 +1,128 @@
+'''
+Staged write tests.
+
+From module root call,
+python3 -m pytest tests/test_staging.py
+'''
+import threading
+import pytest
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal, plugin
+from rdflib.namespace import RDF
+from rdflib.store import Store
+from graph.py_drone_graph_staging import graph_staging, staged_view
+
+DATASET = URIRef('http://ld.landrs.org/id/dataset')
+OC = URIRef('http://ld.landrs.org/id/oc')
+END = URIRef('http://www.w3.org/ns/prov#endedAtTime')
+SOSA_OC = URIRef('http://www.w3.org/ns/sosa/ObservationCollection')
+
+
+def test_commit_replaces_set_values():
+    g = ConjunctiveGraph()
+    graph = Graph(g.store, identifier=DATASET)
+    graph.add((OC, END, Literal('1')))
+
+    staging = graph_staging()
+    staged = staging.stage(graph)
+    staged.set((OC, END, Literal('2')))
+    staged.set((OC, END, Literal('3')))
+
+    # nothing written until commit, reads see the staged value
+    assert list(graph.objects(OC, END)) == [Literal('1')]
+    assert list(staged.objects(OC, END)) == [Literal('3')]
+
+    staging.commit()
+    assert list(graph.objects(OC, END)) == [Literal('3')]
+
+
+def test_discarded_sample_not_committed():
+    g = ConjunctiveGraph()
+    graph = Graph(g.store, identifier=DATASET)
+    staging = graph_staging()
+
+    good = graph_staging(staging)
+    good.stage(graph).add((OC, END, Literal('good')))
+    good.commit()
+
+    bad = graph_staging(staging)
+    bad.stage(graph).add((OC, END, Literal('bad')))
+    bad.discard()
+
+    assert staging.commit() == 1
+    assert list(graph.objects(OC, END)) == [Literal('good')]
+
+
+def test_hot_tier_holds_samples_until_flush():
+    g = ConjunctiveGraph()
+    graph = Graph(g.store, identifier=DATASET)
+    hot_tier = graph_staging()
+
+    # two samples, end time overwritten
+    for t in ['1', '2']:
+        sample = graph_staging(hot_tier)
+        sample.stage(graph).set((OC, END, Literal(t)))
+        sample.commit()
+
+    assert len(hot_tier) == 1
+    assert len(graph) == 0
+
+    assert hot_tier.commit() == 1
+    assert list(graph.objects(OC, END)) == [Literal('2')]
+    assert len(hot_tier) == 0
+
+
+def test_failed_commit_leaves_store(tmp_path):
+    store = plugin.get('SQLAlchemy', Store)(identifier=URIRef('http://ld.landrs.org/id/store'))
+    g = ConjunctiveGraph(store)
+    g.open(Literal('sqlite:///' + str(tmp_path / 'staging.sqlite')), create=True)
+    graph = Graph(store, identifier=DATASET)
+    graph.add((OC, END, Literal('1')))
+
+    staging = graph_staging()
+    staging.stage(graph).set((OC, END, Literal('2')))
+    index = {}
+    staging.index(index, OC, graph)
+
+    # addN fails after the set has removed the old value
+    def fail(statement):
+        raise Exception('add failed')
+    store._add_ignore_on_conflict = fail
+
+    with pytest.raises(Exception):
+        staging.commit()
+    assert list(graph.objects(OC, END)) == [Literal('1')]
+
+    # dropping the writes drops what they indexed
+    staging.discard()
+    assert index == {}
+
+    del store._add_ignore_on_conflict
+    staging.stage(graph).set((OC, END, Literal('2')))
+    staging.commit()
+    assert list(graph.objects(OC, END)) == [Literal('2')]
+
+
+def test_staged_view_reads_hot_tier():
+    g = ConjunctiveGraph()
+    graph = Graph(g.store, identifier=DATASET)
+    graph.add((OC, END, Literal('1')))
+    hot_tier = graph_staging()
+
+    sample = graph_staging(hot_tier)
+    staged = sample.stage(graph)
+    staged.set((OC, END, Literal('2')))
+    staged.add((OC, RDF.type, SOSA_OC))
+    sample.commit()
+
+    # store plus tier, replaced object gone, nothing written
+    view = staged_view(g, hot_tier, threading.RLock())
+    assert list(view.objects(OC, END)) == [Literal('2')]
+    assert (OC, RDF.type, SOSA_OC) in view.get_context(DATASET)
+    assert list(graph.objects(OC, END)) == [Literal('1')]
+    assert len(view) == len(view.get_context(DATASET)) == 2
+
+    # flushed since the view was taken, read once
+    hot_tier.commit()
+    assert sorted(view.objects(OC, None)) == sorted([Literal('2'), SOSA_OC])
+    assert len(view) == len(view.get_context(DATASET)) == 2
+    assert staged_view(g, hot_tier, threading.RLock()) is g
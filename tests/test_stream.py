@@ -0,0 +1,77 @@
+'''
+Streaming SPARQL result tests.
+
+From module root call,
+python3 -m pytest tests/test_stream.py
+'''
+import csv
+import io
+import json
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal, BNode
+from rdflib.compare import isomorphic
+from rdflib.namespace import XSD
+from graph.py_drone_graph_stream import stream_query, chunk_rows
+
+EX = 'http://example.org/'
+SELECT = 'SELECT ?s ?label ?value WHERE { ?s <%slabel> ?label OPTIONAL { ?s <%svalue> ?value } }' % (EX, EX)
+
+
+def sample_graph(n=3):
+    g = ConjunctiveGraph()
+    graph = Graph(g.store, identifier=URIRef(EX + 'graph'))
+    for i in range(n):
+        s = URIRef(EX + 'n%d' % i)
+        graph.add((s, URIRef(EX + 'label'), Literal('node "%d"' % i, lang='en')))
+        if i % 2:
+            graph.add((s, URIRef(EX + 'value'), Literal(i * 1.5, datatype=XSD.double)))
+    b = BNode()
+    graph.add((b, URIRef(EX + 'label'), Literal('blank')))
+    return g
+
+
+def test_json_matches_rdflib():
+    g = sample_graph()
+    chunks, content_type = stream_query(g, SELECT, 'application/sparql-results+json')
+    assert content_type == 'application/sparql-results+json'
+
+    streamed = json.loads(''.join(chunks))
+    expected = json.loads(g.query(SELECT).serialize(format='json'))
+    assert streamed['head'] == expected['head']
+    key = lambda b: json.dumps(b, sort_keys=True)
+    assert sorted(map(key, streamed['results']['bindings'])) == sorted(map(key, expected['results']['bindings']))
+
+
+def test_csv_and_tsv():
+    g = sample_graph()
+    chunks, content_type = stream_query(g, SELECT, 'text/csv')
+    assert content_type == 'text/csv'
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert rows[0] == ['s', 'label', 'value']
+    assert [EX + 'n1', 'node "1"', '1.5'] in rows
+    assert [EX + 'n0', 'node "0"', ''] in rows
+    assert len(rows) == 5
+
+    chunks, content_type = stream_query(g, SELECT, 'text/tab-separated-values')
+    lines = ''.join(chunks).splitlines()
+    assert lines[0] == '?s\t?label\t?value'
+    assert '<%sn0>\t"node \\"0\\""@en\t' % EX in lines
+
+
+def test_construct_n_triples():
+    g = sample_graph()
+    query = 'CONSTRUCT { ?s <%sname> ?label } WHERE { ?s <%slabel> ?label }' % (EX, EX)
+    chunks, content_type = stream_query(g, query, 'application/n-triples')
+    assert content_type == 'application/n-triples'
+
+    streamed = Graph().parse(data=''.join(chunks), format='nt')
+    assert isomorphic(streamed, g.query(query).graph)
+
+    # other formats are not streamed
+    assert stream_query(g, query, 'text/turtle') is None
+    assert stream_query(g, 'ASK { ?s ?p ?o }', 'application/sparql-results+json') is None
+
+
+def test_chunks():
+    g = sample_graph(chunk_rows * 2)
+    chunks, content_type = stream_query(g, SELECT, 'text/csv')
+    assert len(list(chunks)) >= 3